@@ -0,0 +1,9 @@
+import os
+
+
+# Хук должен лежать в корневом conftest.py: xdist вызывает его раньше,
+# чем загружаются conftest.py в каталогах тестов.
+def pytest_xdist_auto_num_workers(config):
+    """Число процессов для -n auto; на одном ядре xdist не нужен."""
+    workers = os.cpu_count() or 1
+    return workers if workers > 1 else 0
@@ -0,0 +1,32 @@
+"""Асинхронный доступ к пользователю и ORM.
+
+Если версия Django даёт нативные async-методы (request.auser — с 5.0,
+QuerySet.afirst и async for — с 4.1), используются они. Иначе
+синхронный вызов уходит в поток соединений с БД через sync_to_async.
+"""
+from asgiref.sync import sync_to_async
+
+
+async def aget_user(request):
+    """Пользователь запроса, загруженный из сессии."""
+    if hasattr(request, 'auser'):
+        return await request.auser()
+
+    def load():
+        # SimpleLazyObject загружает пользователя при первом обращении.
+        request.user.is_authenticated
+        return request.user
+
+    return await sync_to_async(load)()
+
+
+async def alist(queryset):
+    if hasattr(queryset, '__aiter__'):
+        return [obj async for obj in queryset]
+    return await sync_to_async(list)(queryset)
+
+
+async def afirst(queryset):
+    if hasattr(queryset, 'afirst'):
+        return await queryset.afirst()
+    return await sync_to_async(queryset.first)()
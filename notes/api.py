@@ -0,0 +1,347 @@
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views import generic
+
+from .bulk import bulk_update_rows
+from .cache import invalidate_author
+from .forms import clean_note
+from .models import Note, NoteConflict, NoteRevision
+from .pagination import KeysetPaginationMixin, paginate_keyset
+from .slugs import allocate_slugs
+from .trash import trash_notes
+from .views import NoteBase
+
+FIELDS = ('title', 'text')
+
+
+def serialize_note(note):
+    return {
+        'id': note.id,
+        'slug': note.slug,
+        'title': note.title,
+        'text': note.text,
+        'created': note.created,
+        'updated': note.updated,
+        'version': note.version,
+    }
+
+
+class StaleBatch(Exception):
+    """Заметку из пакета изменили между чтением и записью."""
+
+
+def apply_patch(note, patch):
+    """Применяет правки автосохранения, возвращает изменённые поля.
+
+    Порядок: замена отрезка текста, дописывание в конец, заголовок.
+    """
+    changed = []
+    text = note.text
+    replace = patch.get('replace')
+    if replace is not None:
+        if not isinstance(replace, dict) or not isinstance(
+            replace.get('text'), str
+        ):
+            raise ValueError('replace: ожидается объект с полем text.')
+        offset = replace.get('offset')
+        length = replace.get('length', len(replace['text']))
+        if not (
+            isinstance(offset, int) and isinstance(length, int)
+            and 0 <= offset <= len(text) and length >= 0
+        ):
+            raise ValueError('replace: некорректные offset или length.')
+        text = text[:offset] + replace['text'] + text[offset + length:]
+    append = patch.get('append')
+    if append is not None:
+        if not isinstance(append, str):
+            raise ValueError('append: ожидается строка.')
+        text += append
+    if text != note.text:
+        note.text = text
+        changed.append('text')
+    title = patch.get('title')
+    if title is not None:
+        if not isinstance(title, str):
+            raise ValueError('title: ожидается строка.')
+        if title != note.title:
+            note.title = title
+            changed.append('title')
+    return changed
+
+
+def json_response(data, status=200):
+    return JsonResponse(
+        data, status=status, encoder=DjangoJSONEncoder,
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+class NoteApiBase(NoteBase):
+    """Базовый класс JSON API заметок."""
+
+    def handle_no_permission(self):
+        return json_response(
+            {'detail': 'Требуется авторизация.'}, status=401
+        )
+
+
+class NoteApiList(NoteApiBase, KeysetPaginationMixin, generic.View):
+    """Список заметок пользователя постранично по курсору."""
+    paginate_by = 100
+
+    def get(self, request):
+        page = paginate_keyset(
+            self.get_queryset(), self.get_cursor(), self.paginate_by
+        )
+        return json_response({
+            'results': [serialize_note(note) for note in page],
+            'next': page.next_cursor,
+        })
+
+
+class NoteApiDetail(NoteApiBase, generic.View):
+    """Одна заметка пользователя."""
+
+    def get(self, request, slug):
+        note = self.get_queryset().filter(slug=slug).first()
+        if note is None:
+            return json_response({'detail': 'Заметка не найдена.'}, 404)
+        return json_response(serialize_note(note))
+
+
+class NoteApiBatch(NoteApiBase, generic.View):
+    """Пакетное создание, изменение и удаление заметок.
+
+    Принимает JSON вида::
+
+        {"create": [{"title": ..., "text": ..., "slug": ...}],
+         "update": [{"slug": ..., "title": ..., "text": ...,
+                     "version": ...}],
+         "delete": ["slug", ...]}
+
+    Все изменения выполняются в одной транзакции пакетными запросами:
+    либо применяются все, либо ни одно. Заметки с устаревшей version
+    не меняются: ответ 409 с их текущими версиями. Удалённые заметки
+    попадают в корзину.
+    """
+
+    def post(self, request):
+        try:
+            batch = json.load(request)
+        except ValueError:
+            return json_response({'detail': 'Некорректный JSON.'}, 400)
+        if not isinstance(batch, dict):
+            return json_response({'detail': 'Ожидается объект.'}, 400)
+        create = batch.get('create', [])
+        update = batch.get('update', [])
+        delete = batch.get('delete', [])
+        if not all(
+            isinstance(items, list) for items in (create, update, delete)
+        ):
+            return json_response({'detail': 'Ожидаются списки.'}, 400)
+        size = len(create) + len(update) + len(delete)
+        if size > settings.NOTES_API_MAX_BATCH:
+            return json_response(
+                {'detail': 'Слишком большой пакет: не более '
+                           f'{settings.NOTES_API_MAX_BATCH} операций.'},
+                400,
+            )
+        errors = {}
+        versions = {}
+        new_notes = self.build_created(create, errors)
+        changed_notes = self.build_updated(update, errors, versions)
+        self.check_deleted(delete, errors)
+        if errors:
+            return json_response({'errors': errors}, 400)
+        if versions:
+            return json_response({'versions': versions}, 409)
+        conflicts = allocate_slugs(
+            Note, new_notes, Note._meta.get_field('slug').max_length
+        )
+        if conflicts:
+            return json_response({'conflicts': conflicts}, 409)
+        return self.save_batch(new_notes, changed_notes, delete)
+
+    def save_batch(self, new_notes, changed_notes, delete):
+        """Записывает пакет одной транзакцией и возвращает ответ."""
+        try:
+            with transaction.atomic():
+                Note.objects.bulk_create(new_notes)
+                updated = bulk_update_rows(
+                    Note, changed_notes,
+                    (*FIELDS, 'excerpt', 'length', 'updated'),
+                    version_field='version',
+                )
+                if updated != len(changed_notes):
+                    raise StaleBatch
+                NoteRevision.objects.record(changed_notes)
+                deleted = trash_notes(
+                    self.get_queryset().filter(slug__in=delete)
+                )
+        except IntegrityError:
+            # Кто-то занял slug между подбором и вставкой.
+            return json_response({'detail': 'Конфликт slug, повторите.'}, 409)
+        except StaleBatch:
+            return json_response(
+                {'detail': 'Заметки изменились при сохранении, повторите.'},
+                409,
+            )
+        for note in changed_notes:
+            note.version += 1
+        invalidate_author(self.request.user.pk)
+        return json_response({
+            'created': [note.slug for note in new_notes],
+            'updated': {note.slug: note.version for note in changed_notes},
+            'deleted': deleted,
+        })
+
+    def build_created(self, items, errors):
+        notes = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                errors.setdefault('create', {})[index] = 'Ожидается объект.'
+                continue
+            note = Note(
+                author=self.request.user,
+                **{field: item.get(field, '') for field in (*FIELDS, 'slug')}
+            )
+            try:
+                clean_note(note)
+            except ValidationError as error:
+                errors.setdefault('create', {})[index] = error.message_dict
+                continue
+            note.refresh_excerpt()
+            notes.append(note)
+        return notes
+
+    def build_updated(self, items, errors, versions):
+        """Изменённые заметки; versions — текущие версии при конфликте.
+
+        Если в правке указана version, она должна совпасть с версией
+        заметки, иначе правка не применяется.
+        """
+        if not all(isinstance(item, dict) for item in items):
+            errors['update'] = 'Ожидаются объекты.'
+            return []
+        slugs = [
+            item.get('slug') for item in items
+            if isinstance(item.get('slug'), str)
+        ]
+        # in_bulk() не принимает slug: он уникален только среди живых.
+        notes = {
+            note.slug: note
+            for note in self.get_queryset().filter(slug__in=slugs)
+        }
+        now = timezone.now()
+        changed = []
+        for index, item in enumerate(items):
+            if not isinstance(item.get('slug'), str):
+                errors.setdefault('update', {})[index] = {
+                    'slug': ['Ожидается строка.']
+                }
+                continue
+            note = notes.get(item['slug'])
+            if note is None:
+                errors.setdefault('update', {})[index] = {
+                    'slug': ['Заметка не найдена.']
+                }
+                continue
+            if item.get('version', note.version) != note.version:
+                versions[note.slug] = note.version
+                continue
+            for field in FIELDS:
+                if field in item:
+                    setattr(note, field, item[field])
+            try:
+                clean_note(note)
+            except ValidationError as error:
+                errors.setdefault('update', {})[index] = error.message_dict
+                continue
+            note.refresh_excerpt()
+            note.updated = now
+            changed.append(note)
+        return changed
+
+    def check_deleted(self, slugs, errors):
+        for index, slug in enumerate(slugs):
+            if not isinstance(slug, str):
+                errors.setdefault('delete', {})[index] = 'Ожидается строка.'
+
+
+class NoteApiAutosave(NoteApiBase, generic.View):
+    """Автосохранение: небольшие правки заголовка и текста заметки.
+
+    Принимает JSON вида::
+
+        {"replace": {"offset": 10, "length": 3, "text": ...},
+         "append": ..., "title": ..., "version": 7}
+
+    Если version указана и устарела, правка отклоняется с ответом 409:
+    смещения в ней отсчитаны от другого текста.
+    Записываются только изменённые столбцы, slug не проверяется.
+    Правки чаще раза в NOTES_AUTOSAVE_WINDOW секунд сливаются в одну
+    версию истории: в неё попадает текст до начала серии правок.
+    """
+
+    def post(self, request, slug):
+        try:
+            patch = json.load(request)
+        except ValueError:
+            return json_response({'detail': 'Некорректный JSON.'}, 400)
+        if not isinstance(patch, dict):
+            return json_response({'detail': 'Ожидается объект.'}, 400)
+        note = self.get_queryset().filter(slug=slug).first()
+        if note is None:
+            return json_response({'detail': 'Заметка не найдена.'}, 404)
+        if patch.get('version', note.version) != note.version:
+            return self.conflict(note.version)
+        try:
+            changed = apply_patch(note, patch)
+        except ValueError as error:
+            return json_response({'detail': str(error)}, 400)
+        if changed:
+            error = self.save_patch(note, changed)
+            if error is not None:
+                return error
+        return json_response({
+            'slug': note.slug,
+            'length': note.length,
+            'updated': note.updated,
+            'version': note.version,
+        })
+
+    def save_patch(self, note, changed):
+        """Проверяет и сохраняет изменённые поля, ответ — при ошибке."""
+        try:
+            note.full_clean(
+                exclude=[
+                    field.name for field in Note._meta.fields
+                    if field.name not in changed
+                ],
+                validate_unique=False,
+            )
+        except ValidationError as error:
+            return json_response({'errors': error.message_dict}, 400)
+        window = timedelta(seconds=settings.NOTES_AUTOSAVE_WINDOW)
+        try:
+            with transaction.atomic():
+                note.save(
+                    update_fields=(*changed, 'updated'),
+                    revision=timezone.now() - note.updated >= window,
+                )
+        except NoteConflict as conflict:
+            return self.conflict(conflict.current_version)
+        return None
+
+    def conflict(self, current_version):
+        return json_response({
+            'detail': 'Заметку уже изменили, правка не применена.',
+            'version': current_version,
+        }, 409)
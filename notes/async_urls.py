@@ -0,0 +1,21 @@
+from django.urls import path
+
+from notes import async_views, urls
+
+app_name = 'notes'
+
+ASYNC_VIEWS = {
+    'home': async_views.home,
+    'api_list': async_views.api_list,
+    'api_detail': async_views.api_detail,
+}
+
+# Те же маршруты, что в notes.urls, но главная и API — асинхронные.
+urlpatterns = [
+    path(
+        str(pattern.pattern),
+        ASYNC_VIEWS.get(pattern.name, pattern.callback),
+        name=pattern.name,
+    )
+    for pattern in urls.urlpatterns
+]
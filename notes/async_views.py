@@ -0,0 +1,59 @@
+"""Асинхронные версии страниц чтения заметок для ASGI.
+
+Маршруты подключаются через notes.async_urls. Проверка входа и API
+выполняются без занятия потока на весь запрос. Список и заметка
+остаются синхронными: в Django 3.2 нет async-API ни у кэша, ни у ORM,
+и асинхронная версия выполняла бы в потоке те же запросы.
+"""
+from functools import wraps
+
+from django.contrib.auth.mixins import AccessMixin
+from django.template.response import TemplateResponse
+
+from . import api, views
+from .aio import afirst, aget_user
+from .pagination import paginate_keyset
+
+
+def async_view(view_class):
+    """Асинхронная view поверх настроек синхронной view_class."""
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(request, *args, **kwargs):
+            view = view_class()
+            view.setup(request, *args, **kwargs)
+            # Пользователь нужен и шапке страницы, поэтому загружается
+            # здесь, а не при отрисовке шаблона.
+            user = await aget_user(request)
+            if (issubclass(view_class, AccessMixin)
+                    and not user.is_authenticated):
+                return view.handle_no_permission()
+            return await handler(view, request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@async_view(views.Home)
+async def home(view, request):
+    return TemplateResponse(
+        request, view.template_name, view.get_context_data()
+    )
+
+
+@async_view(api.NoteApiList)
+async def api_list(view, request):
+    page = await paginate_keyset(
+        view.get_queryset(), view.get_cursor(), view.paginate_by
+    ).aload()
+    return api.json_response({
+        'results': [api.serialize_note(note) for note in page],
+        'next': page.next_cursor,
+    })
+
+
+@async_view(api.NoteApiDetail)
+async def api_detail(view, request, slug):
+    note = await afirst(view.get_queryset().filter(slug=slug))
+    if note is None:
+        return api.json_response({'detail': 'Заметка не найдена.'}, 404)
+    return api.json_response(api.serialize_note(note))
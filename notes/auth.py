@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+USER_KEY = 'notes:user:{}'
+
+
+def user_cache():
+    """Кэш сессий и пользователей, общий с SESSION_CACHE_ALIAS."""
+    return caches[settings.SESSION_CACHE_ALIAS]
+
+
+def forget_user(user_id):
+    """Убирает пользователя из кэша: следующий запрос прочитает БД."""
+    user_cache().delete(USER_KEY.format(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя запроса из кэша.
+
+    AuthenticationMiddleware вызывает get_user() на каждом запросе;
+    с кэшем это не запрос к auth_user. Сохранение и удаление
+    пользователя, вход и выход сбрасывают запись (notes/signals.py),
+    а хэш сессии по-прежнему сверяется с паролем из кэша: после смены
+    пароля старые сессии не действуют.
+    """
+
+    def get_user(self, user_id):
+        cache = user_cache()
+        key = USER_KEY.format(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.NOTES_USER_CACHE_TIMEOUT)
+        return user
@@ -0,0 +1,18 @@
+"""SQLite, в котором транзакции сразу берут блокировку записи.
+
+Django начинает транзакцию отложенным BEGIN: блокировка записи
+берётся только на первом UPDATE или INSERT. В режиме WAL такой
+переход со снимка, который уже устарел, сразу возвращает SQLITE_BUSY,
+не дожидаясь busy_timeout, и запись падает с «database is locked».
+BEGIN IMMEDIATE берёт блокировку в начале транзакции, и ожидание
+занятой базы идёт по busy_timeout. Читатели WAL им не блокируются.
+Вид BEGIN задаёт settings.SQLITE_TRANSACTION_MODE.
+"""
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {settings.SQLITE_TRANSACTION_MODE}')
@@ -0,0 +1,311 @@
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import OperationalError, connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Note, NoteTag, Tag
+from .runner import shared_test_settings
+from .slugs import cached_slugify
+
+WORDS = (
+    'заметка', 'список', 'план', 'встреча', 'отчёт', 'идея', 'задача',
+    'проект', 'книга', 'покупка', 'звонок', 'письмо', 'сервер', 'релиз',
+    'тест', 'запрос', 'база', 'данные', 'неделя', 'вечер', 'утро', 'дом',
+    'работа', 'поездка', 'фильм', 'рецепт', 'спорт', 'врач', 'отпуск',
+)
+
+
+def benchmark_caches(directory):
+    """Кэши проекта для замеров: те же бэкенды, но отдельные данные.
+
+    Файловые кэши пишут во временный каталог замера, остальные
+    (Redis, memcached, память процесса) получают свой префикс ключей.
+    """
+    caches = {}
+    for alias, config in settings.CACHES.items():
+        config = dict(config)
+        if config['BACKEND'].endswith('FileBasedCache'):
+            config['LOCATION'] = os.path.join(directory, 'cache', alias)
+        else:
+            config['KEY_PREFIX'] = '{}:bench:{}'.format(
+                config.get('KEY_PREFIX', ''), os.path.basename(directory)
+            )
+        caches[alias] = config
+    return caches
+
+
+@contextmanager
+def benchmark_database(verbosity=0, on_disk=False):
+    """Создаёт временную БД для замеров, рабочая база не затрагивается.
+
+    on_disk — для SQLite создать базу в файле, а не в памяти: нужно
+    для замеров с несколькими соединениями и журналом на диске.
+    Настройки те же, что у тестов (notes.runner.shared_test_settings),
+    но кэши — настроенные в проекте, в отдельном месте
+    (benchmark_caches): замеряется тот кэш, что работает на сервере,
+    а пользователи и сессии замеров не попадают в его рабочие данные.
+    """
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    old_test_name = test_settings.get('NAME')
+    with tempfile.TemporaryDirectory() as directory, \
+            override_settings(CACHES=benchmark_caches(directory)), \
+            shared_test_settings(caches=False):
+        if on_disk and connection.vendor == 'sqlite':
+            test_settings['NAME'] = os.path.join(directory, 'bench.sqlite3')
+        old_name = connection.creation.create_test_db(
+            verbosity=verbosity, autoclobber=True, serialize=False
+        )
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity)
+            test_settings['NAME'] = old_test_name
+
+
+def seed_notes(author, count, start=0, text='Текст заметки',
+               batch_size=5000):
+    """Быстро создаёт count заметок автора пачками через bulk_create."""
+    prefix = f'bench-{author.pk}'
+    for offset in range(start, start + count, batch_size):
+        stop = min(offset + batch_size, start + count)
+        notes = [
+            Note(
+                title=f'Заметка {number}',
+                text=text,
+                slug=f'{prefix}-{number}',
+                author=author,
+            )
+            for number in range(offset, stop)
+        ]
+        for note in notes:
+            note.refresh_excerpt()
+        Note.objects.bulk_create(notes)
+
+
+def build_dataset(users, notes, tags=20, tags_per_note=3, seed=0,
+                  first_pk=1_000_000):
+    """Большой набор данных для замеров и тестов производительности.
+
+    users авторов, у каждого notes заметок и tags тегов, у заметки до
+    tags_per_note тегов. Набор детерминирован: один seed даёт одни и
+    те же данные. Первичные ключи задаются явно, начиная с first_pk,
+    чтобы набор не пересекался с уже созданными строками. Возвращает
+    списки несохранённых объектов по моделям в порядке загрузки.
+    """
+    rng = random.Random(seed)
+    now = timezone.now().replace(microsecond=0)
+    User = get_user_model()
+    dataset = {User: [], Tag: [], Note: [], NoteTag: []}
+    for user_number in range(users):
+        author = User(
+            pk=first_pk + user_number,
+            username=f'perf_user_{first_pk + user_number}',
+            password='!',
+            date_joined=now,
+        )
+        dataset[User].append(author)
+        author_tags = []
+        for number in range(tags):
+            name = WORDS[number % len(WORDS)]
+            if number >= len(WORDS):
+                name = f'{name} {number // len(WORDS)}'
+            author_tags.append(Tag(
+                pk=first_pk + user_number * tags + number,
+                author=author,
+                name=name,
+                slug=cached_slugify(name),
+            ))
+        dataset[Tag].extend(author_tags)
+        for number in range(notes):
+            pk = first_pk + user_number * notes + number
+            changed = now - timedelta(minutes=notes - number)
+            note = Note(
+                pk=pk,
+                title=f'{rng.choice(WORDS).capitalize()} {number}',
+                text=' '.join(rng.choices(WORDS, k=rng.randint(5, 200))),
+                slug=f'perf-{author.pk}-{number}',
+                author=author,
+                created=changed,
+                updated=changed,
+            )
+            note.refresh_excerpt()
+            dataset[Note].append(note)
+            for tag in rng.sample(
+                author_tags, rng.randint(0, min(tags_per_note, tags))
+            ):
+                tag.note_count += 1
+                dataset[NoteTag].append(NoteTag(
+                    pk=first_pk + len(dataset[NoteTag]),
+                    note=note,
+                    tag=tag,
+                    author=author,
+                ))
+    return dataset
+
+
+def load_dataset(dataset, batch_size=2000):
+    """Быстро загружает набор build_dataset() через bulk_create.
+
+    Как и loaddata, после вставки с явными ключами сбрасывает
+    последовательности, иначе на PostgreSQL следующая вставка
+    получит занятый id.
+    """
+    with transaction.atomic():
+        for model, objects in dataset.items():
+            model.objects.bulk_create(objects, batch_size=batch_size)
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), list(dataset)
+        )
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+
+def measure(func, repeat=20):
+    """Медианное время выполнения func в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+# Сколько раз повторить запрос, упёршийся в блокировку таблицы
+# общей базы SQLite в памяти (см. locked_in_memory).
+MAX_LOCK_RETRIES = 1000
+
+
+def locked_in_memory(error):
+    """Ошибка — блокировка таблицы тестовой базы SQLite в памяти.
+
+    Такая база открыта в режиме общего кэша: занятая таблица сразу
+    даёт «database table is locked», busy_timeout там не действует.
+    База в файле ждёт блокировку (BEGIN IMMEDIATE), и там любая ошибка
+    блокировки — провал, а не повод повторить.
+    """
+    return (
+        connection.vendor == 'sqlite' and connection.is_in_memory_db()
+        and 'table is locked' in str(error)
+    )
+
+
+def retry_locked(func, *args, **kwargs):
+    """func(*args, **kwargs) с повтором при блокировке таблицы в памяти.
+
+    Повторяется только locked_in_memory, остальные ошибки, в том числе
+    ошибки view под тестовым клиентом, пробрасываются.
+    """
+    for _ in range(MAX_LOCK_RETRIES):
+        try:
+            return func(*args, **kwargs)
+        except OperationalError as error:
+            if not locked_in_memory(error):
+                raise
+            time.sleep(0.001)
+    raise OperationalError(
+        f'Таблица занята после {MAX_LOCK_RETRIES} попыток.'
+    )
+
+
+class WorkerClient(Client):
+    """Тестовый клиент для работы в своём потоке.
+
+    Client подписывается на общий сигнал got_request_exception и
+    сохраняет ошибку любого запроса, идущего в это время, в том числе
+    из другого потока: свой успешный запрос вернулся бы чужой ошибкой.
+    Этот клиент сохраняет только ошибки запросов своего потока.
+    """
+
+    def request(self, **request):
+        self.thread = threading.get_ident()
+        return super().request(**request)
+
+    def store_exc_info(self, **kwargs):
+        if threading.get_ident() == self.thread:
+            super().store_exc_info(**kwargs)
+
+
+def login_clients(user, count):
+    """Клиенты WorkerClient, вошедшие как user, по одному на поток.
+
+    Вход пишет сессию в БД, поэтому выполняется до запуска потоков.
+    """
+    clients = []
+    for _ in range(count):
+        client = WorkerClient()
+        client.force_login(user)
+        clients.append(client)
+    return clients
+
+
+def parallel_edits(pk, workers, edits):
+    """Параллельные правки одной заметки через форму редактирования.
+
+    Каждая правка читает заметку, как при открытии формы, и дописывает
+    свой токен, отправляя прочитанную версию. На ответ 409 (заметку
+    изменили) правка перечитывает её и повторяет. Исключение во view
+    (вне тестов — ответ 500) пробрасывается из клиента. Возвращает
+    токены, число конфликтов, число ответов 5xx и затраченное время
+    в секундах.
+    """
+    note = Note.objects.select_related('author').get(pk=pk)
+    url = reverse('notes:edit', args=(note.slug,))
+    clients = login_clients(note.author, workers)
+
+    def edit(client, token):
+        conflicts = errors = 0
+        while True:
+            note = retry_locked(Note.objects.get, pk=pk)
+            response = retry_locked(client.post, url, {
+                'title': note.title,
+                'text': f'{note.text} {token}',
+                'slug': note.slug,
+                'version': note.version,
+            })
+            if response.status_code == HTTPStatus.CONFLICT:
+                conflicts += 1
+                continue
+            if response.status_code >= 500:
+                errors += 1
+            return conflicts, errors
+
+    def work(worker):
+        try:
+            return [
+                (token, *edit(clients[worker], token)) for token in (
+                    f'w{worker}e{number}' for number in range(edits)
+                )
+            ]
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(workers) as executor:
+        results = [
+            result for worker_results in executor.map(work, range(workers))
+            for result in worker_results
+        ]
+    elapsed = time.perf_counter() - started
+    return (
+        [token for token, _, _ in results],
+        sum(conflicts for _, conflicts, _ in results),
+        sum(errors for _, _, errors in results),
+        elapsed,
+    )
@@ -0,0 +1,41 @@
+from django.db import connections, router
+
+
+def bulk_update_rows(model, objs, fields, version_field=None):
+    """Обновляет поля объектов одним executemany.
+
+    В отличие от QuerySet.bulk_update не строит CASE-выражение
+    на каждую строку, поэтому на тысячах объектов в разы быстрее.
+    Сигналы, как и у bulk_update, не отправляются.
+
+    С version_field строка обновляется, только если её версия в БД
+    равна версии объекта (compare-and-swap), и версия растёт на 1.
+    Возвращает число обновлённых строк.
+    """
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    fields = [model._meta.get_field(name) for name in fields]
+    pk = model._meta.pk
+    assignments = ', '.join(f'{quote(field.column)} = %s' for field in fields)
+    condition = f'{quote(pk.column)} = %s'
+    guards = (pk,)
+    if version_field is not None:
+        version = model._meta.get_field(version_field)
+        column = quote(version.column)
+        assignments += f', {column} = {column} + 1'
+        condition += f' AND {column} = %s'
+        guards = (pk, version)
+    sql = (
+        f'UPDATE {quote(model._meta.db_table)} SET {assignments} '
+        f'WHERE {condition}'
+    )
+    params = [
+        [
+            field.get_db_prep_save(getattr(obj, field.attname), connection)
+            for field in (*fields, *guards)
+        ]
+        for obj in objs
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+        return cursor.rowcount
@@ -0,0 +1,99 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+GENERATION_KEY = 'notes:generation:{}'
+FRAGMENT_KEY = 'notes:fragment:{}:{}:{}:{}'
+USER_FRAGMENT_KEY = 'notes:user_fragment:{}:{}:{}'
+
+
+def get_generation(author_id):
+    """Текущее поколение кэша заметок автора.
+
+    Начальное значение берётся из часов, а не с нуля: если ключ
+    поколения вытеснят из кэша раньше фрагментов, новое поколение
+    всё равно не совпадёт ни с одним из старых.
+    """
+    key = GENERATION_KEY.format(author_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def invalidate_author(author_id, using=DEFAULT_DB_ALIAS):
+    """Сбрасывает все закэшированные фрагменты заметок автора.
+
+    Внутри транзакции поколение меняется сразу и ещё раз после
+    коммита: читатель, который до коммита увидел новое поколение,
+    но старые строки, закэширует их под поколением, которое коммит
+    тут же сменит.
+    """
+    _next_generation(author_id)
+    if connections[using].in_atomic_block:
+        transaction.on_commit(
+            lambda: _next_generation(author_id), using=using
+        )
+
+
+def _next_generation(author_id):
+    key = GENERATION_KEY.format(author_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def fragment_key(name, author_id, vary_on):
+    vary = hashlib.md5(
+        ':'.join(str(value) for value in vary_on).encode()
+    ).hexdigest()
+    return FRAGMENT_KEY.format(
+        name, author_id, get_generation(author_id), vary
+    )
+
+
+def user_fragment_key(name, user):
+    """Ключ фрагмента, зависящего только от пользователя.
+
+    Имя пользователя входит в ключ: после его смены фрагмент
+    строится заново без явного сброса. Заметки на ключ не влияют.
+    """
+    username = hashlib.md5(user.get_username().encode()).hexdigest()
+    return USER_FRAGMENT_KEY.format(name, user.pk, username)
+
+
+# Счётчики кэша фрагментов — в памяти процесса, как у notes.hot: запись
+# счётчика в общий кэш на каждое обращение стоила бы дороже попадания,
+# а incr файлового кэша между процессами теряет значения.
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_fragment(key):
+    """Фрагмент из кэша с учётом в счётчиках попаданий и промахов."""
+    content = cache.get(key)
+    with _stats_lock:
+        _stats['hits' if content is not None else 'misses'] += 1
+    return content
+
+
+def set_fragment(key, content):
+    cache.set(key, content, settings.NOTES_FRAGMENT_CACHE_TIMEOUT)
+
+
+def fragment_cache_stats():
+    """Счётчики попаданий и промахов кэша фрагментов в этом процессе."""
+    with _stats_lock:
+        return {name: _stats[name] for name in ('hits', 'misses')}
+
+
+def clear_fragment_cache_stats():
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,18 @@
+from django.conf import settings
+
+
+def configure_sqlite(connection):
+    """Применяет PRAGMA из settings.SQLITE_PRAGMAS к новому соединению.
+
+    WAL позволяет читателям не ждать писателя, synchronous=NORMAL
+    в режиме WAL безопасен и избавляет от fsync на каждый коммит,
+    busy_timeout заставляет ждать блокировку вместо ошибки
+    «database is locked». Ждать по нему умеет только транзакция,
+    которая берёт блокировку сразу (BEGIN IMMEDIATE, см.
+    notes.backends.sqlite3).
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
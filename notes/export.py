@@ -0,0 +1,51 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+FIELDS = ('id', 'slug', 'title', 'text', 'created', 'updated')
+
+
+def iter_rows(queryset, chunk_size):
+    """Строки заметок пачками по курсору id.
+
+    Каждая пачка — отдельный короткий запрос по индексу (author, id):
+    в памяти не больше chunk_size строк, а медленный клиент не держит
+    открытый курсор, блокирующий запись в SQLite.
+    """
+    cursor = 0
+    while True:
+        rows = list(
+            queryset.filter(id__gt=cursor)
+            .order_by('id')
+            .values_list(*FIELDS)[:chunk_size]
+        )
+        if not rows:
+            return
+        yield from rows
+        cursor = rows[-1][0]
+
+
+def ndjson_lines(rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(FIELDS, row))) + '\n'
+
+
+class Echo:
+    """Буфер для csv.writer, который сразу отдаёт записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+FORMATS = {
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+    'csv': (csv_lines, 'text/csv'),
+}
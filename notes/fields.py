@@ -0,0 +1,132 @@
+import zlib
+from collections import UserString
+from functools import lru_cache
+
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+# Тексты короче порога (в байтах UTF-8) хранятся как есть: на них
+# сжатие почти ничего не даёт.
+COMPRESS_THRESHOLD = 4096
+COMPRESS_LEVEL = 6
+
+
+def compress_text(value, threshold=COMPRESS_THRESHOLD):
+    """Сжатый текст (bytes) или сам текст, если сжимать невыгодно."""
+    data = value.encode()
+    if len(data) < threshold:
+        return value
+    packed = zlib.compress(data, COMPRESS_LEVEL)
+    return packed if len(packed) < len(data) else value
+
+
+def decompress_value(value):
+    """Текст из значения столбца: сжатые тексты лежат в нём как BLOB."""
+    if isinstance(value, (bytes, memoryview)):
+        return zlib.decompress(value).decode()
+    return value
+
+
+class CompressedText(UserString):
+    """Сжатый текст из БД, распаковывается при первом обращении.
+
+    Модель получает вместо него строку при первом чтении атрибута
+    (см. дескриптор поля), values() и values_list() — сразу
+    (см. plain_text_iterable).
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    @property
+    def data(self):
+        if '_data' not in self.__dict__:
+            self._data = decompress_value(self.raw)
+        return self._data
+
+
+def _plain(value):
+    return value.data if isinstance(value, CompressedText) else value
+
+
+@lru_cache(maxsize=None)
+def plain_text_iterable(iterable_class):
+    """Итератор строк values()/values_list(), где сжатый текст — str.
+
+    from_db_value не знает, попадёт значение в модель или в словарь
+    values(), поэтому ленивая обёртка убирается уже здесь.
+    """
+
+    class PlainTextIterable(iterable_class):
+
+        def __iter__(self):
+            for row in super().__iter__():
+                if isinstance(row, dict):
+                    yield {key: _plain(value) for key, value in row.items()}
+                elif hasattr(row, '_make'):
+                    yield row._make(map(_plain, row))
+                elif isinstance(row, tuple):
+                    yield tuple(map(_plain, row))
+                else:
+                    yield _plain(row)
+
+    PlainTextIterable.__name__ = f'PlainText{iterable_class.__name__}'
+    return PlainTextIterable
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    """Распаковывает текст при первом чтении атрибута модели."""
+
+    def __get__(self, instance, cls=None):
+        value = super().__get__(instance, cls)
+        if isinstance(value, CompressedText):
+            value = instance.__dict__[self.field.attname] = value.data
+        return value
+
+    def __set__(self, instance, value):
+        # С __set__ дескриптор срабатывает и тогда, когда значение
+        # уже лежит в __dict__ экземпляра.
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedTextField(models.TextField):
+    """Текстовое поле, которое сжимает большие значения zlib.
+
+    Сжимает только на SQLite: там столбец с типом TEXT может хранить
+    BLOB, и сжатое значение отличается от обычного по типу, без
+    отдельного признака. PostgreSQL сам сжимает большие значения
+    (TOAST), поэтому там текст хранится как есть. Распаковка ленивая:
+    страницы, которые не читают текст, её не делают.
+    """
+    descriptor_class = CompressedTextDescriptor
+
+    def __init__(self, *args, threshold=COMPRESS_THRESHOLD, **kwargs):
+        self.threshold = threshold
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.threshold != COMPRESS_THRESHOLD:
+            kwargs['threshold'] = self.threshold
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        if isinstance(value, (bytes, memoryview)):
+            return CompressedText(value)
+        return value
+
+    def to_python(self, value):
+        if isinstance(value, CompressedText):
+            return value.data
+        return super().to_python(value)
+
+    def get_db_prep_save(self, value, connection):
+        if connection.vendor != 'sqlite':
+            return super().get_db_prep_save(value, connection)
+        if isinstance(value, CompressedText):
+            # Текст не менялся: повторно сжимать незачем.
+            return value.raw
+        value = super().get_db_prep_save(value, connection)
+        if value is None:
+            return value
+        return compress_text(value, self.threshold)
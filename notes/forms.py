@@ -1,29 +1,96 @@
-from pytils.translit import slugify
-
 from django import forms
-from django.core.exceptions import ValidationError
 
-from .models import Note
+from .models import Note, Tag
+from .tags import parse_tags, set_tags
 
 WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
+CONFLICT = ('Заметку уже изменили в другом окне (версия {}). Ваш текст '
+            'сохранён в форме: отправьте её ещё раз, чтобы записать его '
+            'поверх.')
+MAX_TAGS = 20
 
 
 class NoteForm(forms.ModelForm):
     """Форма для создания или обновления заметки."""
+    # Версия, с которой начато редактирование. Без неё сохранение
+    # сверяется с версией, прочитанной при обработке запроса.
+    version = forms.IntegerField(
+        widget=forms.HiddenInput, required=False, min_value=1
+    )
+    tags = forms.CharField(
+        label='Теги',
+        required=False,
+        help_text='Через запятую, например: работа, идеи',
+    )
 
     class Meta:
         model = Note
-        fields = ('title', 'text', 'slug')
-
-    def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
-                slug=slug
-        ).exclude(id=self.instance.pk).exists():
-            raise ValidationError(slug + WARNING)
-        return slug
+        fields = ('title', 'text', 'slug', 'version')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Текущие теги нужны только для показа пустой формы.
+        if self.instance.pk is not None and not self.is_bound:
+            self.initial['tags'] = ', '.join(
+                self.instance.tags.order_by('name').values_list(
+                    'name', flat=True
+                )
+            )
+
+    def clean_tags(self):
+        tags = parse_tags(self.cleaned_data['tags'])
+        max_length = Tag._meta.get_field('name').max_length
+        if len(tags) > MAX_TAGS:
+            raise forms.ValidationError(f'Не больше {MAX_TAGS} тегов.')
+        for slug, name in tags.items():
+            if not slug or len(name) > max_length:
+                raise forms.ValidationError(
+                    f'Некорректный тег «{name[:max_length]}».'
+                )
+        return tags
+
+    def save(self, commit=True):
+        adding = self.instance._state.adding
+        note = super().save(commit)
+        if commit:
+            # У новой заметки тегов ещё нет, их незачем запрашивать.
+            set_tags(
+                note, self.cleaned_data['tags'], {} if adding else None
+            )
+        return note
+
+    def clean_version(self):
+        return self.cleaned_data['version'] or self.instance.version
+
+    def validate_unique(self):
+        """Уникальность slug проверяет индекс БД при сохранении.
+
+        Пустой slug формирует модель, занятый явный slug превращается
+        в ошибку формы во view (см. NoteFormBase).
+        """
+
+
+class NoteImportForm(forms.Form):
+    """Форма загрузки файла с заметками."""
+    file = forms.FileField(label='Файл')
+    import_format = forms.ChoiceField(
+        label='Формат',
+        choices=(('ndjson', 'NDJSON'), ('csv', 'CSV')),
+    )
+
+
+# Поля модели, которых нет в форме, при проверке без формы пропускаются.
+NOT_IN_FORM = tuple(
+    field.name for field in Note._meta.fields
+    if field.name not in NoteForm.Meta.fields
+)
+
+
+def clean_note(note):
+    """Проверяет заметку по тем же правилам, что и NoteForm.
+
+    Правила полей формы берутся из модели, поэтому для пакетной
+    обработки заметка проверяется напрямую, без формы на каждую.
+    Уникальность slug, как и в форме, обеспечивает БД.
+    """
+    note.full_clean(exclude=NOT_IN_FORM, validate_unique=False)
@@ -0,0 +1,118 @@
+"""Кэш часто открываемых заметок в памяти процесса.
+
+Страницы заметки, правки и удаления снова и снова читают одни и те же
+заметки. Кэш хранит последние из них по ключу (автор, slug) и
+вытесняет давно не нужные (LRU) и устаревшие по времени (TTL).
+
+Отдельно сбрасывать кэш при записи не нужно: запись заметки уже
+меняет поколение кэша автора (notes.cache.invalidate_author), и
+заметка из прошлого поколения считается устаревшей. Между процессами
+это работает, только пока кэш 'default' общий (файловый по умолчанию,
+Redis, memcached); с LocMemCache поколение у каждого процесса своё,
+и другие процессы до конца TTL отдают старую заметку.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .cache import get_generation
+
+STATS = ('hits', 'misses', 'evictions', 'expired', 'stale')
+
+
+class HotNoteCache:
+    """LRU заметок с ограничением по числу и времени жизни.
+
+    Один экземпляр на процесс, потоки сервера работают с ним под
+    блокировкой. Заметка отдаётся копией: view и форма меняют свой
+    экземпляр, не трогая закэшированный. size и ttl по умолчанию
+    берутся из NOTES_HOT_NOTES_SIZE и NOTES_HOT_NOTES_TTL.
+    """
+
+    def __init__(self, size=None, ttl=None, clock=time.monotonic):
+        self._size = size
+        self._ttl = ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.stats = dict.fromkeys(STATS, 0)
+
+    @property
+    def size(self):
+        return self._size or settings.NOTES_HOT_NOTES_SIZE
+
+    @property
+    def ttl(self):
+        return self._ttl or settings.NOTES_HOT_NOTES_TTL
+
+    def get(self, author_id, slug, generation=None):
+        """Копия заметки или None, если её нет или она устарела."""
+        if generation is None:
+            generation = get_generation(author_id)
+        key = (author_id, slug)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            note, note_generation, expires = entry
+            if note_generation != generation or expires <= self.clock():
+                del self.entries[key]
+                self.stats[
+                    'stale' if note_generation != generation else 'expired'
+                ] += 1
+                self.stats['misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return copy.copy(note)
+
+    def put(self, note, generation=None):
+        """Запоминает заметку, вытесняя самые давние сверх size."""
+        if generation is None:
+            generation = get_generation(note.author_id)
+        key = (note.author_id, note.slug)
+        entry = (copy.copy(note), generation, self.clock() + self.ttl)
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def get_or_load(self, author_id, slug, load):
+        """Заметка из кэша, иначе load() с сохранением в кэш.
+
+        Поколение читается до загрузки: если заметку изменят, пока
+        она загружается, в кэше окажется уже устаревшая запись.
+        """
+        generation = get_generation(author_id)
+        note = self.get(author_id, slug, generation)
+        if note is None:
+            note = load()
+            self.put(note, generation)
+        return note
+
+    def discard(self, author_id, slug):
+        with self.lock:
+            self.entries.pop((author_id, slug), None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.stats = dict.fromkeys(STATS, 0)
+
+    def summary(self):
+        """Размер, счётчики и доля попаданий."""
+        with self.lock:
+            stats = dict(self.stats)
+            stats['size'] = len(self.entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else None
+        return stats
+
+
+hot_notes = HotNoteCache()
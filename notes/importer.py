@@ -0,0 +1,190 @@
+import csv
+import json
+import time
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .cache import invalidate_author
+from .forms import clean_note
+from .models import Note
+from .slugs import MAX_ATTEMPTS, allocate_slugs
+
+FIELDS = ('title', 'text', 'slug')
+FORMATS = ('ndjson', 'csv')
+MAX_REPORTED_ERRORS = 100
+# Файлы открываются с этим режимом ошибок: байты не в UTF-8 доходят
+# до читателя суррогатами, и ошибкой становится одна строка, а не
+# весь импорт.
+ENCODING_ERRORS = 'surrogateescape'
+NOT_UTF8 = 'Строка не в кодировке UTF-8.'
+
+
+class ImportReport:
+    """Итоги импорта: сколько строк загружено, ошибки и скорость."""
+
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    def add_error(self, line, error):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, error))
+
+    @property
+    def processed(self):
+        return self.created + self.failed
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.processed / self.elapsed if self.elapsed else 0
+
+    def __str__(self):
+        return (
+            f'Загружено {self.created}, с ошибками {self.failed}, '
+            f'{self.rows_per_second:.0f} строк/с'
+        )
+
+
+def is_utf8(text):
+    try:
+        text.encode()
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def read_ndjson(lines):
+    """Пары (номер строки, запись) из потока NDJSON.
+
+    Вместо записи строки с ошибкой кодировки идёт текст ошибки.
+    """
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        if not is_utf8(line):
+            yield number, NOT_UTF8
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield number, record
+
+
+def read_csv(lines):
+    """Пары (номер строки, запись) из потока CSV с заголовком.
+
+    Вместо записи строки, которую не разобрал csv или с ошибкой
+    кодировки, идёт текст ошибки.
+    """
+    reader = csv.DictReader(lines)
+    while True:
+        try:
+            record = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as error:
+            # DictReader обновляет line_num только после удачной строки.
+            yield reader.reader.line_num, f'Ошибка CSV: {error}.'
+            continue
+        if all(is_utf8(value) for value in record.values()
+               if isinstance(value, str)):
+            yield reader.line_num, record
+        else:
+            yield reader.line_num, NOT_UTF8
+
+
+READERS = {'ndjson': read_ndjson, 'csv': read_csv}
+
+
+def import_notes(author, lines, import_format, batch_size=1000,
+                 progress=None):
+    """Потоково загружает заметки автора из NDJSON или CSV.
+
+    Записи проверяются по правилам NoteForm и вставляются пачками
+    через bulk_create, каждая пачка в своей транзакции. Slug для пачки
+    подбираются разом; запись с уже занятым явным slug пропускается.
+    После каждой пачки вызывается progress(report).
+    """
+    report = ImportReport()
+    records = READERS[import_format](lines)
+    seen_slugs = set()
+    try:
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            notes = build_notes(author, batch, seen_slugs, report)
+            report.created += save_notes(notes, report)
+            if progress is not None:
+                progress(report)
+    finally:
+        invalidate_author(author.pk)
+    return report
+
+
+def save_notes(notes, report):
+    """Вставляет пачку и возвращает число загруженных заметок.
+
+    Если slug заняли между подбором и вставкой, пачка откатывается,
+    slug подбираются заново, и вставка повторяется.
+    """
+    max_slug_length = Note._meta.get_field('slug').max_length
+    auto = [note for note in notes.values() if not note.slug]
+    for _ in range(MAX_ATTEMPTS):
+        for note in auto:
+            note.slug = ''
+        conflicts = set(
+            allocate_slugs(Note, list(notes.values()), max_slug_length)
+        )
+        for line, note in list(notes.items()):
+            if note.slug in conflicts:
+                report.add_error(line, {'slug': ['Slug уже занят.']})
+                del notes[line]
+        try:
+            with transaction.atomic():
+                Note.objects.bulk_create(notes.values())
+        except IntegrityError:
+            continue
+        return len(notes)
+    for line in notes:
+        report.add_error(line, {'slug': ['Не удалось подобрать slug.']})
+    return 0
+
+
+def build_notes(author, batch, seen_slugs, report):
+    """Проверенные заметки пачки по номерам строк."""
+    notes = {}
+    for line, record in batch:
+        if isinstance(record, str):
+            report.add_error(line, record)
+            continue
+        if not isinstance(record, dict):
+            report.add_error(line, 'Ожидается объект с полями заметки.')
+            continue
+        note = Note(
+            author=author,
+            **{field: record.get(field) or '' for field in FIELDS}
+        )
+        try:
+            clean_note(note)
+        except ValidationError as error:
+            report.add_error(line, error.message_dict)
+            continue
+        note.refresh_excerpt()
+        if note.slug:
+            if note.slug in seen_slugs:
+                report.add_error(line, {'slug': ['Slug повторяется.']})
+                continue
+            seen_slugs.add(note.slug)
+        notes[line] = note
+    return notes
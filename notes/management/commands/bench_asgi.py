@@ -0,0 +1,173 @@
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from notes.benchmarks import benchmark_database, seed_notes
+from notes.models import Note
+
+User = get_user_model()
+
+HOST = 'localhost'
+
+
+def split(total, parts):
+    """Делит total запросов между parts соединениями."""
+    return [total // parts + (number < total % parts)
+            for number in range(parts)]
+
+
+class Command(BaseCommand):
+    help = ('Пропускная способность страниц чтения при параллельных '
+            'соединениях: WSGI (yanote/wsgi.py) против ASGI с синхронными '
+            'и асинхронными view. Приложения вызываются в процессе, без '
+            'сети: сравнивается работа Django, а не HTTP-сервера.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notes', type=int, default=1_000)
+        parser.add_argument(
+            '--concurrency', nargs='+', type=int, default=[1, 10, 50],
+            help='Число одновременных соединений для каждого замера.',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Число запросов в каждом замере.',
+        )
+
+    def handle(self, *args, notes, concurrency, requests, **options):
+        # Соединение с БД открывается на каждый запрос и добавляет PRAGMA
+        # к счёту запросов: бюджеты здесь только засоряли бы вывод.
+        with override_settings(NOTES_QUERY_BUDGETS={}), \
+                benchmark_database(on_disk=True):
+            author = User.objects.create(username='bench_author')
+            seed_notes(author, notes)
+            client = Client()
+            client.force_login(author)
+            name = settings.SESSION_COOKIE_NAME
+            cookie = f'{name}={client.cookies[name].value}'
+            slug = Note.objects.filter(author=author).values_list(
+                'slug', flat=True
+            ).first()
+            paths = {
+                'list': reverse('notes:list'),
+                'detail': reverse('notes:detail', args=(slug,)),
+                'api_list': reverse('notes:api_list'),
+                'api_detail': reverse('notes:api_detail', args=(slug,)),
+            }
+            self.stdout.write(
+                f'{"view":>10} {"conns":>6} {"wsgi rps":>9} '
+                f'{"asgi sync":>10} {"asgi async":>11}'
+            )
+            for view_name, path in paths.items():
+                for connections in concurrency:
+                    wsgi = self.run_wsgi(path, cookie, connections, requests)
+                    with override_settings(ROOT_URLCONF='yanote.urls'):
+                        asgi_sync = self.run_asgi(
+                            path, cookie, connections, requests
+                        )
+                    with override_settings(ROOT_URLCONF='yanote.async_urls'):
+                        asgi_async = self.run_asgi(
+                            path, cookie, connections, requests
+                        )
+                    self.stdout.write(
+                        f'{view_name:>10} {connections:>6} {wsgi:>9.0f} '
+                        f'{asgi_sync:>10.0f} {asgi_async:>11.0f}'
+                    )
+
+    def check_status(self, path, status):
+        if status != 200:
+            raise CommandError(f'{path}: ответ {status}, ожидался 200.')
+
+    def run_wsgi(self, path, cookie, connections, requests):
+        """Запросы к WSGI-приложению из пула потоков, rps."""
+        application = WSGIHandler()
+
+        def call():
+            statuses = []
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'SCRIPT_NAME': '',
+                'PATH_INFO': path,
+                'QUERY_STRING': '',
+                'SERVER_NAME': HOST,
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': HOST,
+                'HTTP_COOKIE': cookie,
+                'wsgi.input': io.BytesIO(),
+                'wsgi.url_scheme': 'http',
+            }
+            response = application(
+                environ, lambda status, headers: statuses.append(status)
+            )
+            b''.join(response)
+            response.close()
+            self.check_status(path, int(statuses[0].split()[0]))
+
+        def worker(count):
+            try:
+                for _ in range(count):
+                    call()
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(connections) as pool:
+            list(pool.map(worker, split(requests, connections)))
+        return requests / (time.perf_counter() - started)
+
+    def run_asgi(self, path, cookie, connections, requests):
+        """Запросы к ASGI-приложению из одновременных корутин, rps."""
+        application = ASGIHandler()
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [
+                (b'host', HOST.encode()), (b'cookie', cookie.encode())
+            ],
+            'server': (HOST, 80),
+            'client': ('127.0.0.1', 0),
+        }
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def call():
+            statuses = []
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+
+            await application(dict(scope), receive, send)
+            self.check_status(path, statuses[0])
+
+        async def worker(count):
+            for _ in range(count):
+                await call()
+
+        async def run():
+            await asyncio.gather(
+                *(worker(count) for count in split(requests, connections))
+            )
+
+        started = time.perf_counter()
+        asyncio.run(run())
+        return requests / (time.perf_counter() - started)
@@ -0,0 +1,118 @@
+import random
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from notes.benchmarks import benchmark_database, measure
+from notes.models import Note
+from notes.views import NotesList
+
+User = get_user_model()
+
+LEVELS = ('DEBUG', 'INFO', 'INFO', 'INFO', 'WARNING', 'ERROR')
+
+
+def log_text(size):
+    """Текст, похожий на вставленный журнал приложения."""
+    lines = []
+    length = 0
+    while length < size:
+        line = (
+            f'2026-10-18 12:{random.randrange(60):02}:'
+            f'{random.randrange(60):02} {random.choice(LEVELS)} '
+            f'worker-{random.randrange(8)}: задача {random.randrange(10**6)} '
+            f'выполнена за {random.randrange(1000)} мс\n'
+        )
+        lines.append(line)
+        length += len(line)
+    return ''.join(lines)
+
+
+class Command(BaseCommand):
+    help = ('Размер БД, время чтения и записи заметок с большими '
+            'текстами: без сжатия и со сжатием CompressedTextField.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notes', type=int, default=2_000)
+        parser.add_argument(
+            '--size', type=int, default=20_000,
+            help='Длина текста заметки в символах.',
+        )
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, notes, size, repeat, **options):
+        if connection.vendor != 'sqlite':
+            self.stderr.write('Сжатие работает только на SQLite.')
+            return
+        random.seed(0)
+        texts = [log_text(size) for _ in range(50)]
+        field = Note._meta.get_field('text')
+        threshold = field.threshold
+        self.stdout.write(
+            f'{"mode":>10} {"db, MB":>8} {"write, ms":>10} '
+            f'{"read, ms":>9} {"list, ms":>9}'
+        )
+        try:
+            for mode, mode_threshold in (
+                ('raw', sys.maxsize), ('zlib', threshold)
+            ):
+                field.threshold = mode_threshold
+                with benchmark_database(on_disk=True):
+                    self.stdout.write(
+                        f'{mode:>10} '
+                        + self.run(notes, texts, repeat)
+                    )
+        finally:
+            field.threshold = threshold
+
+    def run(self, count, texts, repeat):
+        author = User.objects.create(username='bench_author')
+        seeded = [
+            Note(
+                title=f'Журнал {number}',
+                text=texts[number % len(texts)],
+                slug=f'bench-{number}',
+                author=author,
+            )
+            for number in range(count)
+        ]
+        for note in seeded:
+            note.refresh_excerpt()
+        Note.objects.bulk_create(seeded, batch_size=500)
+        pks = list(
+            Note.objects.filter(author=author).values_list('pk', flat=True)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM')
+            cursor.execute('PRAGMA page_count')
+            pages = cursor.fetchone()[0]
+            cursor.execute('PRAGMA page_size')
+            size_mb = pages * cursor.fetchone()[0] / 2**20
+        numbers = iter(range(count, count + repeat))
+
+        def write():
+            number = next(numbers)
+            Note.objects.create(
+                title=f'Журнал {number}',
+                text=texts[number % len(texts)],
+                slug=f'bench-{number}',
+                author=author,
+            )
+
+        write_ms = measure(write, repeat)
+        read_ms = measure(
+            lambda: Note.objects.get(pk=random.choice(pks)).text, repeat
+        )
+        list_ms = measure(
+            lambda: list(
+                Note.objects.filter(author=author)
+                .only(*NotesList.list_fields).order_by('id')[:50]
+            ),
+            repeat,
+        )
+        return (
+            f'{size_mb:>8.1f} {write_ms:>10.2f} {read_ms:>9.2f} '
+            f'{list_ms:>9.2f}'
+        )
@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from notes.benchmarks import benchmark_database, parallel_edits
+from notes.models import Note
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Параллельные правки одной заметки через форму: доля '
+            'конфликтов версий, число успешных правок в секунду '
+            'и ответов 5xx.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+        parser.add_argument(
+            '--edits', type=int, default=100,
+            help='Число правок на поток.',
+        )
+
+    def handle(self, *args, threads, edits, **options):
+        self.stdout.write(
+            f'{"threads":>8} {"edits/s":>9} {"conflicts":>10} '
+            f'{"rate":>6} {"lost":>5} {"errors":>7}'
+        )
+        for workers in threads:
+            with benchmark_database(
+                on_disk=connection.vendor == 'sqlite'
+            ):
+                author = User.objects.create(username='bench_author')
+                note = Note.objects.create(
+                    title='Общая заметка', text='Начало', author=author)
+                tokens, conflicts, errors, elapsed = parallel_edits(
+                    note.pk, workers, edits)
+                note.refresh_from_db()
+                lost = len(set(tokens) - set(note.text.split()))
+            total = workers * edits
+            self.stdout.write(
+                f'{workers:>8} {total / elapsed:>9.0f} {conflicts:>10} '
+                f'{conflicts / (conflicts + total):>6.1%} {lost:>5} '
+                f'{errors:>7}'
+            )
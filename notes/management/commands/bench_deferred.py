@@ -0,0 +1,53 @@
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from notes.benchmarks import benchmark_database, measure, seed_notes
+from notes.models import Note
+from notes.views import NotesList
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает страницу списка из полных строк заметок '
+            'и из колонок, нужных шаблону, на больших текстах.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notes', type=int, default=500)
+        parser.add_argument(
+            '--text-size', type=int, default=100 * 1024,
+            help='Размер текста каждой заметки в символах.',
+        )
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, notes, text_size, page_size, repeat,
+               **options):
+        with benchmark_database():
+            author = User.objects.create(username='bench_author')
+            seed_notes(author, notes, text='ы' * text_size, batch_size=50)
+            queryset = Note.objects.filter(author=author).order_by('id')
+            variants = (
+                ('full rows', queryset),
+                ('only()', queryset.only(*NotesList.list_fields)),
+            )
+            self.stdout.write(
+                f'{"variant":>10} {"ms/page":>10} {"peak, MiB":>10}'
+            )
+            for name, variant in variants:
+                def load_page():
+                    return [
+                        (note.slug, note.title, note.excerpt)
+                        for note in variant[:page_size]
+                    ]
+
+                elapsed = measure(load_page, repeat)
+                tracemalloc.start()
+                load_page()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                self.stdout.write(
+                    f'{name:>10} {elapsed:>10.2f} {peak / 2 ** 20:>10.2f}'
+                )
@@ -0,0 +1,60 @@
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from notes.benchmarks import benchmark_database, seed_notes
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Замеряет пиковую память и скорость потоковой выгрузки '
+            'при росте числа заметок.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int,
+            default=[10_000, 100_000, 1_000_000],
+            help='Количество заметок автора для каждого замера.',
+        )
+        parser.add_argument(
+            '--format', dest='export_format', default='ndjson',
+            choices=('ndjson', 'csv'),
+        )
+
+    def handle(self, *args, sizes, export_format, **options):
+        with benchmark_database():
+            author = User.objects.create(username='bench_author')
+            client = Client()
+            client.force_login(author)
+            url = reverse('notes:export', args=(export_format,))
+            self.stdout.write(
+                f'{"notes":>10} {"peak, MiB":>10} {"MiB out":>10} '
+                f'{"rows/s":>10}'
+            )
+            seeded = 0
+            for size in sorted(sizes):
+                seed_notes(author, size - seeded, start=seeded)
+                seeded = size
+                started = time.perf_counter()
+                sent = self.download(client, url)
+                elapsed = time.perf_counter() - started
+                # Трассировка памяти сильно замедляет выгрузку,
+                # поэтому память меряется отдельным проходом.
+                tracemalloc.start()
+                self.download(client, url)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                self.stdout.write(
+                    f'{size:>10} {peak / 2 ** 20:>10.2f} '
+                    f'{sent / 2 ** 20:>10.1f} {size / elapsed:>10.0f}'
+                )
+
+    def download(self, client, url):
+        return sum(
+            len(chunk) for chunk in client.get(url).streaming_content
+        )
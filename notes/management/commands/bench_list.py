@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from notes.benchmarks import benchmark_database, measure, seed_notes
+from notes.models import Note
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Замеряет время страницы списка заметок на разной глубине '
+            'при росте числа заметок автора.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int,
+            default=[1_000, 10_000, 100_000],
+            help='Количество заметок автора для каждого замера.',
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, sizes, repeat, **options):
+        with benchmark_database():
+            author = User.objects.create(username='bench_author')
+            client = Client()
+            client.force_login(author)
+            url = reverse('notes:list')
+            page_size = 50
+            self.stdout.write(
+                f'{"notes":>10} {"first, ms":>10} {"last, ms":>10} '
+                f'{"keyset sql":>11} {"offset sql":>11}'
+            )
+            seeded = 0
+            for size in sorted(sizes):
+                seed_notes(author, size - seeded, start=seeded)
+                seeded = size
+                notes = Note.objects.filter(author=author)
+                last_cursor = notes.order_by('-id').values_list(
+                    'id', flat=True
+                )[page_size]
+                first = measure(lambda: client.get(url), repeat)
+                last = measure(
+                    lambda: client.get(url, {'after': last_cursor}), repeat
+                )
+                keyset = measure(
+                    lambda: list(
+                        notes.filter(id__gt=last_cursor)
+                        .order_by('id')[:page_size]
+                    ),
+                    repeat,
+                )
+                offset = measure(
+                    lambda: list(
+                        notes.order_by('id')[size - page_size:size]
+                    ),
+                    repeat,
+                )
+                self.stdout.write(
+                    f'{size:>10} {first:>10.2f} {last:>10.2f} '
+                    f'{keyset:>11.2f} {offset:>11.2f}'
+                )
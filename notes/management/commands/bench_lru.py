@@ -0,0 +1,98 @@
+import random
+import time
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from notes.benchmarks import benchmark_database, seed_notes
+from notes.cache import invalidate_author
+from notes.hot import HotNoteCache
+from notes.models import Note
+
+User = get_user_model()
+
+
+def zipf_log(keys, requests, skew, rng):
+    """Журнал обращений: k-й по популярности ключ берётся с весом 1/k^skew."""
+    weights = list(accumulate(1 / rank ** skew for rank in
+                              range(1, len(keys) + 1)))
+    return rng.choices(keys, cum_weights=weights, k=requests)
+
+
+class Command(BaseCommand):
+    help = ('Прогоняет журнал обращений к заметкам с распределением Ципфа '
+            'через кэш горячих заметок разного размера: доля попаданий, '
+            'вытеснения и время на обращение против чтения из БД.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', type=int, default=20)
+        parser.add_argument(
+            '--notes', type=int, default=500, help='Заметок у автора.'
+        )
+        parser.add_argument('--requests', type=int, default=20_000)
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель распределения Ципфа.',
+        )
+        parser.add_argument(
+            '--writes', type=float, default=0.01,
+            help='Доля обращений-записей, сбрасывающих кэш автора.',
+        )
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[100, 1000, 5000],
+            help='Размеры кэша для замеров.',
+        )
+
+    def handle(self, *args, authors, notes, requests, skew, writes, sizes,
+               **options):
+        rng = random.Random(0)
+        with benchmark_database():
+            keys = []
+            for number in range(authors):
+                author = User.objects.create(username=f'bench_author_{number}')
+                seed_notes(author, notes)
+                keys.extend(
+                    (author.pk, f'bench-{author.pk}-{note}')
+                    for note in range(notes)
+                )
+            # Популярность не связана с порядком создания.
+            rng.shuffle(keys)
+            log = [
+                (author_id, slug, rng.random() < writes)
+                for author_id, slug in zipf_log(keys, requests, skew, rng)
+            ]
+            self.stdout.write(
+                f'{"cache size":>10} {"hit rate":>9} {"evictions":>10} '
+                f'{"stale":>7} {"us/lookup":>10}'
+            )
+            self.stdout.write(
+                f'{"no cache":>10} {"-":>9} {"-":>10} {"-":>7} '
+                f'{self.replay(log, None):>10.1f}'
+            )
+            for size in sizes:
+                cache = HotNoteCache(size=size, ttl=3600)
+                elapsed = self.replay(log, cache)
+                summary = cache.summary()
+                self.stdout.write(
+                    f'{size:>10} {summary["hit_rate"]:>9.1%} '
+                    f'{summary["evictions"]:>10} {summary["stale"]:>7} '
+                    f'{elapsed:>10.1f}'
+                )
+
+    def replay(self, log, cache):
+        """Среднее время обращения к заметке в микросекундах."""
+        started = time.perf_counter()
+        for author_id, slug, write in log:
+            if write:
+                invalidate_author(author_id)
+                continue
+
+            def load():
+                return Note.objects.get(author_id=author_id, slug=slug)
+
+            if cache is None:
+                load()
+            else:
+                cache.get_or_load(author_id, slug, load)
+        return (time.perf_counter() - started) / len(log) * 10 ** 6
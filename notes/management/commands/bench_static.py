@@ -0,0 +1,120 @@
+import re
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from notes.benchmarks import measure
+
+# Блокирующие отрисовку ресурсы: стили и скрипты без async и defer.
+STYLESHEET = re.compile(r'<link\b[^>]*\brel="stylesheet"[^>]*>', re.S)
+SCRIPT = re.compile(r'<script\b[^>]*\bsrc="[^"]+"[^>]*>', re.S)
+URL = re.compile(r'\b(?:href|src)="([^"]+)"')
+ACCEPT = {'identity': '', 'gzip': 'gzip', 'br': 'br, gzip'}
+
+
+def blocking_urls(html):
+    """Адреса стилей и синхронных скриптов из <head> страницы."""
+    head = html.split('</head>', 1)[0]
+    tags = STYLESHEET.findall(head) + [
+        tag for tag in SCRIPT.findall(head)
+        if ' async' not in tag and ' defer' not in tag
+    ]
+    return [URL.search(tag).group(1) for tag in tags]
+
+
+class Command(BaseCommand):
+    help = ('Офлайн-замер в духе Lighthouse: сколько байт передаётся и '
+            'сколько времени ресурсы блокируют первую отрисовку страницы '
+            'на медленной сети, без сжатия, с gzip и brotli, при повторном '
+            'визите и для стилей с внешнего CDN.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rtt', type=float, default=150,
+            help='Задержка сети туда-обратно, мс (Lighthouse: Slow 4G).',
+        )
+        parser.add_argument(
+            '--throughput', type=float, default=1638.4,
+            help='Пропускная способность, Кбит/с.',
+        )
+        parser.add_argument(
+            '--handshake', type=int, default=3,
+            help='RTT на DNS, TCP и TLS для нового домена.',
+        )
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, rtt, throughput, handshake, repeat, **options):
+        self.rtt = rtt
+        self.bytes_per_ms = throughput * 1024 / 8 / 1000
+        static_root = tempfile.mkdtemp()
+        try:
+            with override_settings(
+                STATIC_ROOT=static_root,
+                STATICFILES_STORAGE=(
+                    'notes.static.CompressedManifestStaticFilesStorage'
+                ),
+            ):
+                call_command(
+                    'collectstatic', interactive=False, verbosity=0,
+                    ignore_patterns=['admin'],
+                )
+                self.run(handshake, repeat)
+        finally:
+            shutil.rmtree(static_root)
+
+    def run(self, handshake, repeat):
+        client = Client()
+        html = client.get(reverse('notes:home')).content
+        urls = blocking_urls(html.decode())
+        self.stdout.write(
+            f'HTML: {len(html)} байт, блокирующих ресурсов: {len(urls)}'
+        )
+        self.stdout.write(
+            f'{"scenario":>12} {"bytes":>9} {"blocking, ms":>13} '
+            f'{"serve, ms":>10}'
+        )
+        sizes = {}
+        for encoding, accept in ACCEPT.items():
+            sizes[encoding] = 0
+            for url in urls:
+                response = client.get(url, HTTP_ACCEPT_ENCODING=accept)
+                sizes[encoding] += int(response['Content-Length'])
+                response.close()
+            serve_ms = measure(
+                lambda: [
+                    client.get(url, HTTP_ACCEPT_ENCODING=accept).close()
+                    for url in urls
+                ],
+                repeat,
+            )
+            self.report(
+                encoding, sizes[encoding],
+                self.blocking(sizes[encoding], len(urls)), f'{serve_ms:.2f}',
+            )
+        # Файлы с хэшем кэшируются как immutable: браузер их не запрашивает.
+        self.report('repeat visit', 0, 0.0, '-')
+        # Те же байты с внешнего домена: плюс соединение с ним.
+        self.report(
+            'cdn', sizes['br'],
+            self.blocking(sizes['br'], len(urls), handshake * self.rtt), '-',
+        )
+
+    def blocking(self, size, requests, connect_ms=0.0):
+        """Время, на которое ресурсы задерживают первую отрисовку, мс.
+
+        Ресурсы грузятся параллельно по уже открытому соединению:
+        один RTT на запрос и передача всех байт.
+        """
+        if not requests:
+            return 0.0
+        return connect_ms + self.rtt + size / self.bytes_per_ms
+
+    def report(self, scenario, size, blocking_ms, serve_ms):
+        self.stdout.write(
+            f'{scenario:>12} {size:>9} {blocking_ms:>13.0f} {serve_ms:>10}'
+        )
@@ -0,0 +1,117 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.template.engine import Engine
+from django.test import RequestFactory
+from django.urls import reverse
+
+from notes.benchmarks import benchmark_database, measure, seed_notes
+from notes.cache import invalidate_author
+from notes.views import NotesList
+
+User = get_user_model()
+
+ROW_URL_TAG = (
+    '{% for note in object_list %}'
+    '<a href="{% url \'notes:detail\' note.slug %}">{{ note.title }}</a>'
+    '{% endfor %}'
+)
+ROW_ABSOLUTE_URL = (
+    '{% for note in object_list %}'
+    '<a href="{{ note.get_absolute_url }}">{{ note.title }}</a>'
+    '{% endfor %}'
+)
+HEADER = '{% include "includes/header.html" %}'
+HEADER_CACHED = (
+    '{% load notes_cache %}'
+    '{% user_cache "header" %}{% include "includes/header.html" %}'
+    '{% enduser_cache %}'
+)
+
+
+class Command(BaseCommand):
+    help = ('Замеряет отрисовку списка заметок: время на строку с {% url %} '
+            'и с готовыми адресами, страницу целиком без кэша фрагментов и '
+            'из него, шапку с кэшем и без, разбор шаблона без кэша '
+            'загрузчика.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--notes', type=int, default=10_000,
+            help='Заметок в отрисовываемом списке.',
+        )
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, notes, repeat, **options):
+        self.repeat = repeat
+        with benchmark_database():
+            author = User.objects.create(username='bench_author')
+            seed_notes(author, notes)
+            request = RequestFactory().get(reverse('notes:list'))
+            request.user = author
+            view = NotesList()
+            view.setup(request)
+            object_list = list(view.get_queryset().order_by('id'))
+            context = {'object_list': object_list, 'page_obj': None}
+            self.stdout.write(
+                f'{"scenario":>16} {"rows":>7} {"ms":>9} {"us/row":>8}'
+            )
+            self.render(
+                'url tag', ROW_URL_TAG, context, request, len(object_list)
+            )
+            self.render(
+                'absolute url', ROW_ABSOLUTE_URL, context, request,
+                len(object_list),
+            )
+            template = engines['django'].get_template('notes/list.html')
+
+            def render_list():
+                # Новое поколение кэша автора: фрагмент списка строится.
+                invalidate_author(author.pk)
+                template.render(context, request)
+
+            self.report(
+                'list.html', len(object_list), measure(render_list, repeat)
+            )
+            self.report(
+                'list.html cached', len(object_list),
+                measure(lambda: template.render(context, request), repeat),
+            )
+            self.render('header', HEADER, context, request, 1)
+            self.render('header cached', HEADER_CACHED, context, request, 1)
+            self.loaders()
+
+    def render(self, scenario, source, context, request, rows):
+        template = engines['django'].from_string(source)
+        template.render(context, request)
+        self.report(
+            scenario, rows,
+            measure(lambda: template.render(context, request), self.repeat),
+        )
+
+    def loaders(self):
+        """Получение list.html с кэшированным загрузчиком и без него."""
+        cached = engines['django'].engine
+        # Загрузчики заданы явно: иначе Engine без debug сам их кэширует.
+        uncached = Engine(
+            dirs=cached.dirs, libraries=cached.libraries, loaders=[
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ],
+        )
+        for scenario, engine in (
+            ('parse', uncached), ('cached loader', cached)
+        ):
+            self.report(
+                scenario, 1,
+                measure(
+                    lambda: engine.get_template('notes/list.html'),
+                    self.repeat,
+                ),
+            )
+
+    def report(self, scenario, rows, elapsed_ms):
+        self.stdout.write(
+            f'{scenario:>16} {rows:>7} {elapsed_ms:>9.3f} '
+            f'{elapsed_ms * 1000 / rows:>8.2f}'
+        )
@@ -0,0 +1,304 @@
+import io
+import json
+import platform
+import random
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from notes.benchmarks import benchmark_database, seed_notes
+from notes.metrics import percentiles, registry
+from notes.models import Note
+
+User = get_user_model()
+
+HOST = 'localhost'
+SCENARIOS = ('list', 'detail', 'add', 'edit', 'delete')
+# Имена URL, под которыми middleware записывает замеры сценария.
+URL_NAMES = {name: f'notes:{name}' for name in SCENARIOS}
+
+
+def split(total, parts):
+    """Делит total запросов между parts потоками."""
+    return [total // parts + (number < total % parts)
+            for number in range(parts)]
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный замер страниц заметок: список, заметка, '
+            'создание, правка и удаление при заданном числе потоков. '
+            'WSGI-приложение вызывается в процессе, без сети. Результаты '
+            'сохраняются в JSON и сравниваются с прошлым прогоном.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=8,
+            help='Число авторов; не меньше --concurrency.',
+        )
+        parser.add_argument(
+            '--notes', type=int, default=500, help='Заметок у автора.'
+        )
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--requests', type=int, default=400,
+            help='Число запросов в каждом сценарии.',
+        )
+        parser.add_argument(
+            '--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS
+        )
+        parser.add_argument('--output', help='Куда сохранить JSON.')
+        parser.add_argument(
+            '--baseline', help='JSON прошлого прогона для сравнения.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимое ухудшение p95 и rps, доля (0.2 = 20%%).',
+        )
+
+    def handle(self, *args, users, notes, concurrency, requests,
+               scenarios, output, baseline, tolerance, **options):
+        if users < concurrency:
+            raise CommandError(
+                'Нужно --users не меньше --concurrency: у каждого потока '
+                'свой автор, иначе правки одной заметки конфликтуют.'
+            )
+        if 'delete' in scenarios and -(-requests // concurrency) > notes:
+            raise CommandError('Для удаления не хватит заметок: '
+                               'увеличьте --notes.')
+        baseline = self.load_baseline(baseline)
+        random.seed(0)
+        with override_settings(NOTES_QUERY_BUDGETS={}), \
+                benchmark_database(on_disk=True), \
+                self.persistent_connections():
+            sessions = self.seed(users, notes)
+            results = {
+                scenario: self.run(
+                    scenario, sessions[:concurrency], requests
+                )
+                for scenario in scenarios
+            }
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'vendor': connection.vendor,
+                'users': users,
+                'notes': notes,
+                'concurrency': concurrency,
+                'requests': requests,
+            },
+            'results': results,
+        }
+        self.print_results(results, baseline)
+        if output:
+            with open(output, 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        # Ответ с ошибкой пользователь видит как 500: замер с ошибками
+        # провален, даже если они были и в прошлом прогоне.
+        failed = [
+            f'{scenario}: ошибок {result["errors"]}'
+            for scenario, result in results.items() if result['errors']
+        ]
+        if failed:
+            raise CommandError('Запросы с ошибкой: ' + '; '.join(failed))
+        if baseline:
+            regressions = self.compare(results, baseline, tolerance)
+            if regressions:
+                raise CommandError(
+                    'Ухудшение относительно прошлого прогона: '
+                    + '; '.join(regressions)
+                )
+
+    def load_baseline(self, path):
+        if path is None:
+            return None
+        try:
+            with open(path, encoding='utf-8') as file:
+                return json.load(file)['results']
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f'Не удалось прочитать {path}: {error}')
+
+    @contextmanager
+    def persistent_connections(self):
+        """Соединения потоков живут весь замер.
+
+        Иначе каждый запрос открывал бы новое соединение, и PRAGMA при
+        подключении попадали бы в счёт запросов. Словарь настроек общий
+        для соединений всех потоков.
+        """
+        settings_dict = connection.settings_dict
+        old_max_age = settings_dict['CONN_MAX_AGE']
+        settings_dict['CONN_MAX_AGE'] = None
+        try:
+            yield
+        finally:
+            settings_dict['CONN_MAX_AGE'] = old_max_age
+
+    def seed(self, users, notes):
+        """Авторы с заметками: cookie сессии и slug заметок каждого."""
+        sessions = []
+        for number in range(users):
+            author = User.objects.create(username=f'bench_author_{number}')
+            seed_notes(author, notes)
+            client = Client()
+            client.force_login(author)
+            name = settings.SESSION_COOKIE_NAME
+            csrf = secrets.token_hex(16)
+            sessions.append({
+                'cookie': (
+                    f'{name}={client.cookies[name].value}; '
+                    f'{settings.CSRF_COOKIE_NAME}={csrf}'
+                ),
+                'csrf': csrf,
+                'slugs': list(
+                    Note.objects.filter(author=author).values_list(
+                        'slug', flat=True
+                    )
+                ),
+            })
+        return sessions
+
+    def requests_for(self, scenario, session, count):
+        """Запросы сценария для одного потока: метод, путь, тело."""
+        slugs = session['slugs']
+        for number in range(count):
+            if scenario == 'list':
+                yield 'GET', reverse('notes:list'), None
+            elif scenario == 'detail':
+                slug = random.choice(slugs)
+                yield 'GET', reverse('notes:detail', args=(slug,)), None
+            elif scenario == 'add':
+                yield 'POST', reverse('notes:add'), {
+                    'title': f'Новая заметка {number}',
+                    'text': 'Текст новой заметки',
+                }
+            elif scenario == 'edit':
+                slug = slugs[number % len(slugs)]
+                yield 'POST', reverse('notes:edit', args=(slug,)), {
+                    'title': f'Правка {number}',
+                    'text': f'Текст правки {number}',
+                    'slug': slug,
+                }
+            else:
+                slug = slugs.pop()
+                yield 'POST', reverse('notes:delete', args=(slug,)), {}
+
+    def run(self, scenario, sessions, requests):
+        """Сценарий из len(sessions) потоков: задержки, rps и запросы."""
+        application = WSGIHandler()
+        expected = 200 if scenario in ('list', 'detail') else 302
+        registry.clear()
+
+        def call(session, method, path, data):
+            body = urlencode(data or {}).encode()
+            environ = {
+                'REQUEST_METHOD': method,
+                'SCRIPT_NAME': '',
+                'PATH_INFO': path,
+                'QUERY_STRING': '',
+                'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+                'CONTENT_LENGTH': str(len(body)),
+                'SERVER_NAME': HOST,
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': HOST,
+                'HTTP_COOKIE': session['cookie'],
+                'HTTP_X_CSRFTOKEN': session['csrf'],
+                'wsgi.input': io.BytesIO(body),
+                'wsgi.url_scheme': 'http',
+            }
+            statuses = []
+            started = time.perf_counter()
+            response = application(
+                environ, lambda status, headers: statuses.append(status)
+            )
+            b''.join(response)
+            response.close()
+            elapsed = (time.perf_counter() - started) * 1000
+            return elapsed, int(statuses[0].split()[0]) == expected
+
+        def worker(job):
+            session, count = job
+            timings, errors = [], 0
+            try:
+                for request in self.requests_for(scenario, session, count):
+                    elapsed, ok = call(session, *request)
+                    timings.append(elapsed)
+                    errors += not ok
+            finally:
+                connection.close()
+            return timings, errors
+
+        jobs = list(zip(sessions, split(requests, len(sessions))))
+        started = time.perf_counter()
+        with ThreadPoolExecutor(len(sessions)) as pool:
+            done = list(pool.map(worker, jobs))
+        elapsed = time.perf_counter() - started
+        timings = [value for worker_timings, _ in done
+                   for value in worker_timings]
+        latency = percentiles(timings)
+        queries = registry.summary().get(URL_NAMES[scenario], {})
+        return {
+            'p50_ms': latency['p50'],
+            'p95_ms': latency['p95'],
+            'p99_ms': latency['p99'],
+            'rps': requests / elapsed,
+            'queries': (queries.get('queries') or {}).get('p50'),
+            'errors': sum(errors for _, errors in done),
+        }
+
+    def print_results(self, results, baseline):
+        self.stdout.write(
+            f'{"scenario":>9} {"p50, ms":>8} {"p95, ms":>8} {"p99, ms":>8} '
+            f'{"rps":>7} {"queries":>8} {"errors":>7} {"rps vs base":>12}'
+        )
+        for scenario, result in results.items():
+            base = (baseline or {}).get(scenario)
+            change = (
+                f'{result["rps"] / base["rps"] - 1:>+12.0%}' if base else ''
+            )
+            self.stdout.write(
+                f'{scenario:>9} {result["p50_ms"]:>8.2f} '
+                f'{result["p95_ms"]:>8.2f} {result["p99_ms"]:>8.2f} '
+                f'{result["rps"]:>7.0f} {result["queries"] or "-":>8} '
+                f'{result["errors"]:>7} {change}'
+            )
+
+    def compare(self, results, baseline, tolerance):
+        """Список ухудшений относительно baseline."""
+        regressions = []
+        for scenario, result in results.items():
+            base = baseline.get(scenario)
+            if base is None:
+                continue
+            if result['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+                regressions.append(
+                    f'{scenario}: p95 {result["p95_ms"]:.2f} мс '
+                    f'против {base["p95_ms"]:.2f}'
+                )
+            if result['rps'] < base['rps'] * (1 - tolerance):
+                regressions.append(
+                    f'{scenario}: {result["rps"]:.0f} rps '
+                    f'против {base["rps"]:.0f}'
+                )
+            # Число запросов не шумит: любой рост — регрессия.
+            if (result['queries'] or 0) > (base['queries'] or 0):
+                regressions.append(
+                    f'{scenario}: {result["queries"]} SQL-запросов '
+                    f'против {base["queries"]}'
+                )
+        return regressions
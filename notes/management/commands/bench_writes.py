@@ -0,0 +1,119 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from notes.benchmarks import benchmark_database
+
+User = get_user_model()
+
+# Как у Django без настроек проекта: PRAGMA по умолчанию и отложенный
+# BEGIN, при котором запись на устаревшем снимке сразу получает
+# «database is locked».
+PROFILES = (
+    ('default', {
+        'SQLITE_PRAGMAS': {}, 'SQLITE_TRANSACTION_MODE': 'DEFERRED',
+    }),
+    ('tuned', {}),
+)
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест записи в SQLite из нескольких потоков '
+            'через страницы создания и правки заметок: настройки '
+            'по умолчанию против SQLITE_PRAGMAS и BEGIN IMMEDIATE. '
+            'Любой ответ с ошибкой, в том числе «database is locked», '
+            'для настроек проекта — провал замера.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--writes', type=int, default=100,
+            help='Число созданий заметок на поток, каждое с правкой.',
+        )
+        parser.add_argument(
+            '--reads', type=int, default=1,
+            help='Число чтений списка между записями.',
+        )
+
+    def handle(self, *args, threads, writes, reads, **options):
+        if connection.vendor != 'sqlite':
+            self.stderr.write('Замер имеет смысл только для SQLite.')
+            return
+        self.stdout.write(
+            f'{"profile":>10} {"writes/s":>10} {"errors":>8} '
+            f'{"journal":>8}'
+        )
+        failed = 0
+        for profile, overrides in PROFILES:
+            with override_settings(NOTES_QUERY_BUDGETS={}, **overrides), \
+                    benchmark_database(on_disk=True):
+                done, errors, elapsed = self.run_load(threads, writes, reads)
+                with connection.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    journal = cursor.fetchone()[0]
+            self.stdout.write(
+                f'{profile:>10} {done / elapsed:>10.0f} {errors:>8} '
+                f'{journal:>8}'
+            )
+            if not overrides:
+                failed = errors
+        if failed:
+            raise CommandError(
+                f'С настройками проекта {failed} записей завершились ошибкой.'
+            )
+
+    def run_load(self, threads, writes, reads):
+        """Записи через view: создание и правка, каждая в транзакции формы.
+
+        Возвращает число успешных записей, число ответов с ошибкой
+        и затраченное время в секундах.
+        """
+        clients = []
+        for number in range(threads):
+            client = Client(raise_request_exception=False)
+            client.force_login(
+                User.objects.create(username=f'writer_{number}')
+            )
+            clients.append((f'writer-{number}', client))
+
+        def work(job):
+            prefix, client = job
+            done = errors = 0
+            try:
+                for number in range(writes):
+                    slug = f'{prefix}-{number}'
+                    for url, data in (
+                        (reverse('notes:add'), {
+                            'title': f'Заметка {number}', 'text': 'Текст',
+                            'slug': slug,
+                        }),
+                        (reverse('notes:edit', args=(slug,)), {
+                            'title': f'Заметка {number}',
+                            'text': 'Текст после правки', 'slug': slug,
+                        }),
+                    ):
+                        if client.post(url, data).status_code == 302:
+                            done += 1
+                        else:
+                            errors += 1
+                    for _ in range(reads):
+                        client.get(reverse('notes:list'))
+            finally:
+                connection.close()
+            return done, errors
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(threads) as executor:
+            results = list(executor.map(work, clients))
+        elapsed = time.perf_counter() - started
+        return (
+            sum(done for done, _ in results),
+            sum(errors for _, errors in results),
+            elapsed,
+        )
@@ -0,0 +1,65 @@
+import gzip
+from itertools import chain
+
+from django.core import serializers
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.benchmarks import build_dataset
+
+
+def unsaved(objects):
+    """Объекты ещё не в БД: их связи многие-ко-многим пусты.
+
+    Иначе сериализатор запросил бы группы и права каждого автора.
+    """
+    for obj in objects:
+        obj._prefetched_objects_cache = {
+            field.name: field.related_model.objects.none()
+            for field in obj._meta.many_to_many
+        }
+        yield obj
+
+
+class Command(BaseCommand):
+    help = ('Создаёт фикстуру с большим набором данных для замеров: '
+            'авторы, заметки и теги. Файл загружается loaddata; '
+            'с окончанием .gz сжимается gzip.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Файл фикстуры, .json или .gz.')
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument(
+            '--notes', type=int, default=1000, help='Заметок у автора.'
+        )
+        parser.add_argument(
+            '--tags', type=int, default=20, help='Тегов у автора.'
+        )
+        parser.add_argument(
+            '--tags-per-note', type=int, default=3,
+            help='Наибольшее число тегов у заметки.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--first-pk', type=int, default=1_000_000,
+            help='Первый id объектов; loaddata заменяет строки с теми же id.',
+        )
+
+    def handle(self, *args, output, users, notes, tags, tags_per_note,
+               seed, first_pk, **options):
+        if min(users, notes, tags, tags_per_note) < 0 or first_pk < 1:
+            raise CommandError('Размеры не могут быть отрицательными.')
+        dataset = build_dataset(
+            users, notes, tags, tags_per_note, seed, first_pk
+        )
+        opener = gzip.open if output.endswith('.gz') else open
+        with opener(output, 'wt', encoding='utf-8') as file:
+            serializers.serialize(
+                'json', unsaved(chain.from_iterable(dataset.values())),
+                stream=file,
+                ensure_ascii=False,
+            )
+        counts = ', '.join(
+            f'{model._meta.label}: {len(objects)}'
+            for model, objects in dataset.items()
+        )
+        self.stdout.write(f'{output}: {counts}')
@@ -0,0 +1,51 @@
+import io
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.importer import ENCODING_ERRORS, FORMATS, import_notes
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Загружает заметки пользователя из файла NDJSON или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path', help='Путь к файлу или - для stdin.')
+        parser.add_argument(
+            '--format', dest='import_format', choices=FORMATS,
+            help='Формат файла, по умолчанию — по расширению.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, username, path, import_format, batch_size,
+               **options):
+        try:
+            author = User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь {username} не найден.')
+        import_format = import_format or path.rpartition('.')[2]
+        if import_format not in FORMATS:
+            raise CommandError('Укажите формат: --format ndjson или csv.')
+        if path == '-':
+            lines = io.TextIOWrapper(
+                sys.stdin.buffer, encoding='utf-8', errors=ENCODING_ERRORS,
+                newline='',
+            )
+            report = self.load(author, lines, import_format, batch_size)
+        else:
+            with open(path, encoding='utf-8', errors=ENCODING_ERRORS,
+                      newline='') as lines:
+                report = self.load(author, lines, import_format, batch_size)
+        for line, error in report.errors:
+            self.stderr.write(f'Строка {line}: {error}')
+        self.stdout.write(self.style.SUCCESS(str(report)))
+
+    def load(self, author, lines, import_format, batch_size):
+        return import_notes(
+            author, lines, import_format, batch_size,
+            progress=lambda report: self.stdout.write(str(report)),
+        )
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.trash import delete_user, purge_trash
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Очищает корзину от заметок старше NOTES_TRASH_DAYS дней '
+            'и удаляет пользователей с заметками пачками. Запускается '
+            'по расписанию, например из cron раз в час.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', dest='usernames', action='append', default=[],
+            help='Удалить пользователя и все его заметки.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.NOTES_PURGE_BATCH,
+            help='Сколько заметок удаляет одна транзакция.',
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Пауза между пачками в секундах.',
+        )
+
+    def handle(self, *args, usernames, batch_size, pause, **options):
+        users = list(User.objects.filter(username__in=usernames))
+        missing = set(usernames) - {user.username for user in users}
+        if missing:
+            raise CommandError(
+                f'Пользователи не найдены: {", ".join(sorted(missing))}.'
+            )
+        for user in users:
+            deleted = delete_user(user, batch_size, pause)
+            self.stdout.write(
+                f'Пользователь {user.username} удалён, заметок: {deleted}.'
+            )
+        deleted = purge_trash(batch_size, pause)
+        self.stdout.write(
+            self.style.SUCCESS(f'Из корзины удалено заметок: {deleted}.')
+        )
@@ -0,0 +1,145 @@
+import multiprocessing
+import os
+import socket
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notes.pool import init_process, run_task
+from notes.tasks import claim_tasks, execute, fail, requeue_stale, task_stats
+
+
+class Command(BaseCommand):
+    help = ('Обработчик фоновых задач: забирает задачи из таблицы '
+            'и выполняет их в пуле процессов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1,
+            help='Размер пула; 0 — выполнять в этом же процессе.',
+        )
+        parser.add_argument(
+            '--poll', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться.',
+        )
+
+    def handle(self, *args, processes, poll, once, **options):
+        self.worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.done = 0
+        self.started = time.perf_counter()
+        self.next_requeue = 0
+        try:
+            if processes:
+                self.run_pool(processes, poll, once)
+            else:
+                self.run_inline(poll, once)
+        except KeyboardInterrupt:
+            pass
+        self.report()
+
+    def requeue_stale(self):
+        """Раз в четверть NOTES_TASK_TIMEOUT возвращает зависшие задачи.
+
+        Задачи пропавших обработчиков ищет каждый работающий
+        обработчик, а не только запускающийся.
+        """
+        now = time.monotonic()
+        if now < self.next_requeue:
+            return
+        self.next_requeue = now + settings.NOTES_TASK_TIMEOUT / 4
+        requeued = requeue_stale()
+        if requeued:
+            self.stdout.write(f'Возвращено в очередь задач: {requeued}.')
+
+    def run_inline(self, poll, once):
+        while True:
+            self.requeue_stale()
+            tasks = claim_tasks(self.worker, 1)
+            if not tasks:
+                if once:
+                    return
+                time.sleep(poll)
+                continue
+            execute(tasks[0].pk)
+            self.done += 1
+
+    def run_pool(self, processes, poll, once):
+        # spawn, а не fork: процесс пула не должен унаследовать
+        # открытые соединения с БД.
+        context = multiprocessing.get_context('spawn')
+        while True:
+            with ProcessPoolExecutor(
+                processes, mp_context=context, initializer=init_process
+            ) as pool:
+                if self.run_in(pool, processes, poll, once):
+                    return
+            self.stderr.write('Пул процессов упал, создаётся новый.')
+
+    def run_in(self, pool, processes, poll, once):
+        """Выполняет задачи в пуле; False — пул сломан и нужен новый."""
+        running = {}
+        while True:
+            self.requeue_stale()
+            free = processes - len(running)
+            for task in claim_tasks(self.worker, free) if free else ():
+                try:
+                    running[pool.submit(run_task, task.pk)] = task.pk
+                except BrokenProcessPool:
+                    fail(task.pk, traceback.format_exc())
+                    self.collect(running, wait(running).done)
+                    return False
+            if not running:
+                if once:
+                    return True
+                time.sleep(poll)
+                continue
+            finished, _ = wait(
+                running, timeout=poll, return_when=FIRST_COMPLETED
+            )
+            if not self.collect(running, finished):
+                # Остальные задачи сломанного пула тоже завершатся ошибкой.
+                self.collect(running, wait(running).done)
+                return False
+
+    def collect(self, running, finished):
+        """Учитывает завершённые задачи; False — пул сломан.
+
+        Исключение из пула, а не из самой задачи (её ошибки execute
+        записывает сам), засчитывается задаче как упавшая попытка.
+        """
+        healthy = True
+        for future in finished:
+            pk = running.pop(future)
+            try:
+                future.result()
+            except Exception as error:
+                fail(pk, ''.join(traceback.format_exception(
+                    type(error), error, error.__traceback__
+                )))
+                healthy = healthy and not isinstance(
+                    error, BrokenProcessPool
+                )
+            else:
+                self.done += 1
+        return healthy
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        stats = task_stats()
+        self.stdout.write(
+            f'Выполнено задач: {self.done} за {elapsed:.1f} с '
+            f'({self.done / elapsed if elapsed else 0:.1f} в секунду).'
+        )
+        self.stdout.write(
+            f'В очереди: {stats["queued"]}, за час: {stats["done"]} '
+            f'готово, {stats["failed"]} с ошибкой; задержка в очереди, '
+            f'мс: {stats["queue_ms"]}.'
+        )
@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import defaultdict, deque
+
+SAMPLES_PER_VIEW = 1000
+PERCENTILES = (50, 95, 99)
+MEASURES = ('queries', 'db_ms', 'render_ms', 'total_ms')
+
+
+class QueryBudgetExceeded(Exception):
+    """View выполнила больше SQL-запросов, чем разрешено бюджетом."""
+
+
+class QueryTimer:
+    """Обёртка execute_wrapper: считает запросы и время в БД."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.queries += 1
+
+
+class MetricsRegistry:
+    """Последние замеры запросов по именам URL."""
+
+    def __init__(self, size=SAMPLES_PER_VIEW):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(lambda: deque(maxlen=size))
+
+    def record(self, view_name, sample):
+        with self.lock:
+            self.samples[view_name].append(sample)
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+    def summary(self):
+        """Число замеров и перцентили каждой метрики по именам URL."""
+        with self.lock:
+            samples = {
+                name: list(values) for name, values in self.samples.items()
+            }
+        return {
+            name: {
+                'count': len(values),
+                **{
+                    measure: percentiles([
+                        sample[measure] for sample in values
+                        if sample[measure] is not None
+                    ])
+                    for measure in MEASURES
+                },
+            }
+            for name, values in samples.items()
+        }
+
+
+def percentiles(values):
+    """Перцентили по ближайшему рангу, None — нет замеров."""
+    values = sorted(values)
+    if not values:
+        return None
+    return {
+        f'p{rank}': values[
+            min(len(values) - 1, max(0, -(-rank * len(values) // 100) - 1))
+        ]
+        for rank in PERCENTILES
+    }
+
+
+registry = MetricsRegistry()
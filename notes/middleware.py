@@ -0,0 +1,94 @@
+import asyncio
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .metrics import QueryBudgetExceeded, QueryTimer, registry
+
+logger = logging.getLogger('notes.metrics')
+
+
+class QueryMetricsMiddleware:
+    """Замеряет SQL-запросы, время в БД, отрисовку и общее время ответа.
+
+    Замеры копятся в notes.metrics.registry по имени URL
+    (notes:list, notes:detail, ...) и пишутся в лог notes.metrics.
+    Если view превысила бюджет из NOTES_QUERY_BUDGETS, в лог идёт
+    предупреждение, а при NOTES_QUERY_BUDGET_RAISE — исключение.
+    Под ASGI с асинхронными view SQL-запросы не считаются.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # По этому признаку Django вызывает middleware как корутину.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        timer = QueryTimer()
+        request.render_seconds = 0.0
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        self.record(request, response, started, timer)
+        return response
+
+    async def __acall__(self, request):
+        # Под ASGI запросы к БД выполняются в общем потоке sync_to_async
+        # вперемешку с другими запросами, поэтому считается только время.
+        request.render_seconds = 0.0
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, started, None)
+        return response
+
+    def record(self, request, response, started, timer):
+        total = time.perf_counter() - started
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        sample = {
+            'queries': None,
+            'db_ms': None,
+            'render_ms': round(request.render_seconds * 1000, 3),
+            'total_ms': round(total * 1000, 3),
+        }
+        if timer is not None:
+            sample['queries'] = timer.queries
+            sample['db_ms'] = round(timer.seconds * 1000, 3)
+        registry.record(view_name, sample)
+        logger.info(json.dumps({
+            'view': view_name,
+            'method': request.method,
+            'status': response.status_code,
+            **sample,
+        }))
+        if timer is not None:
+            self.check_budget(view_name, timer.queries)
+
+    def process_template_response(self, request, response):
+        started = time.perf_counter()
+
+        def rendered(response):
+            request.render_seconds += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def check_budget(self, view_name, queries):
+        budget = settings.NOTES_QUERY_BUDGETS.get(view_name)
+        if budget is None or queries <= budget:
+            return
+        message = (
+            f'{view_name}: {queries} SQL-запросов при бюджете {budget}'
+        )
+        if settings.NOTES_QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:02
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_note_author_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Создана'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='Изменена'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['author', 'updated'], name='note_author_updated_idx'),
+        ),
+    ]
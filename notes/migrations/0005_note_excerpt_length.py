@@ -0,0 +1,40 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:18
+
+from django.db import migrations, models
+
+EXCERPT_LENGTH = 200
+BATCH_SIZE = 1000
+
+
+def fill_excerpts(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    batch = []
+    for note in Note.objects.only('id', 'text').iterator(BATCH_SIZE):
+        note.excerpt = note.text[:EXCERPT_LENGTH]
+        note.length = len(note.text)
+        batch.append(note)
+        if len(batch) == BATCH_SIZE:
+            Note.objects.bulk_update(batch, ('excerpt', 'length'))
+            batch = []
+    Note.objects.bulk_update(batch, ('excerpt', 'length'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_note_created_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=200, verbose_name='Начало текста'),
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='length',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Длина текста'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
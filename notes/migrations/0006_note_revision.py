@@ -0,0 +1,30 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0005_note_excerpt_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(verbose_name='Номер версии')),
+                ('title', models.CharField(max_length=100, verbose_name='Заголовок')),
+                ('is_snapshot', models.BooleanField(default=False, verbose_name='Снимок целиком')),
+                ('data', models.BinaryField(verbose_name='Сжатые данные')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Заменена')),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='notes.note')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='noterevision',
+            constraint=models.UniqueConstraint(fields=('note', 'number'), name='revision_note_number_uniq'),
+        ),
+    ]
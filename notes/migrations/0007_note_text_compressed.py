@@ -0,0 +1,54 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:33
+
+from django.db import migrations
+import notes.fields
+
+BATCH_SIZE = 1000
+
+
+def compress_texts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Note = apps.get_model('notes', 'Note')
+    # Символ в UTF-8 занимает не больше 4 байт: короткие тексты
+    # отсеиваются по длине без чтения самого текста.
+    queryset = Note.objects.filter(
+        length__gte=notes.fields.COMPRESS_THRESHOLD // 4
+    ).only('id', 'text')
+    batch = []
+    for note in queryset.iterator(BATCH_SIZE):
+        batch.append(note)
+        if len(batch) == BATCH_SIZE:
+            Note.objects.bulk_update(batch, ('text',))
+            batch = []
+    Note.objects.bulk_update(batch, ('text',))
+
+
+def decompress_texts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT id, text FROM notes_note WHERE typeof(text) = 'blob'"
+        )
+        rows = cursor.fetchall()
+        cursor.executemany(
+            'UPDATE notes_note SET text = %s WHERE id = %s',
+            [(notes.fields.decompress_value(text), pk) for pk, text in rows],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0006_note_revision'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='note',
+            name='text',
+            field=notes.fields.CompressedTextField(help_text='Добавьте подробностей', verbose_name='Текст'),
+        ),
+        migrations.RunPython(compress_texts, decompress_texts),
+    ]
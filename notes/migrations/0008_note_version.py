@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0007_note_text_compressed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='version',
+            field=models.PositiveIntegerField(default=1, verbose_name='Версия'),
+        ),
+    ]
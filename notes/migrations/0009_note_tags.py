@@ -0,0 +1,52 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notes', '0008_note_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='Название')),
+                ('slug', models.SlugField(max_length=150, verbose_name='Адрес')),
+                ('note_count', models.PositiveIntegerField(default=0, verbose_name='Заметок')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NoteTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='notes.note')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='notes.tag')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='notes', through='notes.NoteTag', to='notes.Tag', verbose_name='Теги'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('author', 'slug'), name='tag_author_slug_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='notetag',
+            index=models.Index(fields=['author', 'tag', 'note'], name='note_tag_author_tag_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='notetag',
+            constraint=models.UniqueConstraint(fields=('note', 'tag'), name='note_tag_uniq'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0009_note_tags'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='note',
+            name='note_author_id_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='note',
+            name='note_author_updated_idx',
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Удалена'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['author', 'id'], name='note_live_author_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['author', 'updated'], name='note_live_author_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='note_trash_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.15 on 2026-10-18 21:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0011_task'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='note',
+            name='slug',
+            field=models.SlugField(blank=True, help_text='Укажите адрес для страницы заметки. Используйте только латиницу, цифры, дефисы и знаки подчёркивания', max_length=100, verbose_name='Адрес для страницы с заметкой'),
+        ),
+        migrations.AddConstraint(
+            model_name='note',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('slug',), name='note_live_slug_unique'),
+        ),
+    ]
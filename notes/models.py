@@ -1,7 +1,51 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
-from pytils.translit import slugify
+from .fields import CompressedTextField, plain_text_iterable
+from .links import note_url
+from .revisions import SNAPSHOT_EVERY, apply_delta, make_delta, pack, unpack
+from .slugs import save_with_free_slug
+
+EXCERPT_LENGTH = 200
+# Поля, прежние значения которых попадают в историю правок.
+REVISION_FIELDS = ('title', 'text')
+
+
+class NoteConflict(Exception):
+    """Заметку изменили после того, как её версия была прочитана."""
+
+    def __init__(self, current_version):
+        super().__init__(
+            f'Заметку уже изменили, текущая версия {current_version}.'
+        )
+        self.current_version = current_version
+
+
+class NoteQuerySet(models.QuerySet):
+    """Заметки; в values() и values_list() текст всегда обычная строка.
+
+    Ленивая распаковка остаётся только у экземпляров модели.
+    """
+
+    def values(self, *fields, **expressions):
+        clone = super().values(*fields, **expressions)
+        clone._iterable_class = plain_text_iterable(clone._iterable_class)
+        return clone
+
+    def values_list(self, *fields, flat=False, named=False):
+        clone = super().values_list(*fields, flat=flat, named=named)
+        clone._iterable_class = plain_text_iterable(clone._iterable_class)
+        return clone
+
+
+class NoteManager(models.Manager.from_queryset(NoteQuerySet)):
+    """Заметки без удалённых в корзину."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
 
 
 class Note(models.Model):
@@ -11,14 +55,13 @@ class Note(models.Model):
         default='Название заметки',
         help_text='Дайте короткое название заметке'
     )
-    text = models.TextField(
+    text = CompressedTextField(
         'Текст',
         help_text='Добавьте подробностей'
     )
     slug = models.SlugField(
         'Адрес для страницы с заметкой',
         max_length=100,
-        unique=True,
         blank=True,
         help_text=('Укажите адрес для страницы заметки. Используйте только '
                    'латиницу, цифры, дефисы и знаки подчёркивания')
@@ -27,12 +70,397 @@ class Note(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    updated = models.DateTimeField('Изменена', auto_now=True)
+    excerpt = models.CharField(
+        'Начало текста', max_length=EXCERPT_LENGTH, blank=True, editable=False
+    )
+    length = models.PositiveIntegerField(
+        'Длина текста', default=0, editable=False
+    )
+    # Растёт с каждым сохранением: запись проходит, только если версия
+    # в БД совпадает с прочитанной (оптимистическая блокировка).
+    version = models.PositiveIntegerField('Версия', default=1)
+    # Время переноса в корзину; у живых заметок пусто.
+    deleted_at = models.DateTimeField(
+        'Удалена', null=True, blank=True, editable=False
+    )
+    tags = models.ManyToManyField(
+        'Tag',
+        through='NoteTag',
+        related_name='notes',
+        blank=True,
+        verbose_name='Теги',
+    )
+
+    objects = NoteManager()
+    all_objects = NoteQuerySet.as_manager()
+
+    class Meta:
+        # Частичные индексы: страницы читают только живые заметки,
+        # и корзина не увеличивает ни индексы, ни выборки по ним.
+        indexes = (
+            models.Index(
+                fields=('author', 'id'),
+                name='note_live_author_id_idx',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            models.Index(
+                fields=('author', 'updated'),
+                name='note_live_author_upd_idx',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+            models.Index(
+                fields=('deleted_at',),
+                name='note_trash_deleted_idx',
+                condition=models.Q(deleted_at__isnull=False),
+            ),
+        )
+        # slug уникален среди живых заметок: slug заметки в корзине
+        # может занять новая, при возврате старая получит slug-N.
+        constraints = (
+            models.UniqueConstraint(
+                fields=('slug',),
+                name='note_live_slug_unique',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+        )
 
     def __str__(self):
         return self.title
 
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+    def get_absolute_url(self):
+        return note_url('notes:detail', self.slug)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        note = super().from_db(db, field_names, values)
+        # Загруженные значения нужны, чтобы сохранить прежнюю версию.
+        note._loaded = {
+            name: value for name, value in zip(field_names, values)
+            if name in REVISION_FIELDS
+        }
+        return note
+
+    def remember_loaded(self):
+        self._loaded = {
+            name: getattr(self, name) for name in REVISION_FIELDS
+        }
+
+    def is_changed(self):
+        """Изменились ли заголовок или текст с момента загрузки."""
+        loaded = getattr(self, '_loaded', {})
+        return all(name in loaded for name in REVISION_FIELDS) and any(
+            getattr(self, name) != loaded[name] for name in REVISION_FIELDS
+        )
+
+    def get_version(self, number):
+        """Заголовок и текст версии number из истории правок."""
+        last_needed = -(-number // SNAPSHOT_EVERY) * SNAPSHOT_EVERY
+        revisions = list(
+            self.revisions.filter(
+                number__gte=number, number__lte=last_needed
+            ).order_by('-number')
+        )
+        if not revisions or revisions[-1].number != number:
+            raise NoteRevision.DoesNotExist(f'Нет версии {number}.')
+        text = self.text
+        for revision in revisions:
+            text = revision.restore_text(text)
+        return revisions[-1].title, text
+
+    def refresh_excerpt(self):
+        """Пересчитывает превью и длину текста для списков."""
+        self.excerpt = self.text[:EXCERPT_LENGTH]
+        self.length = len(self.text)
+
+    @property
+    def is_truncated(self):
+        return self.length > len(self.excerpt)
+
+    def save(self, *args, revision=True, **kwargs):
+        """Сохраняет заметку и её прежнюю версию в истории правок.
+
+        revision=False не добавляет новую версию, а сливает правку с
+        последней: так автосохранение сводит серию частых правок в одну
+        версию. Последняя версия пересчитывается от нового текста,
+        иначе её дельта собрала бы из него не тот текст.
+        """
+        update_fields = kwargs.get('update_fields')
+        if 'text' not in self.get_deferred_fields():
+            self.refresh_excerpt()
+            if update_fields is not None and 'text' in update_fields:
+                kwargs['update_fields'] = {
+                    *update_fields, 'excerpt', 'length'
+                }
+        if update_fields is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        if self.pk is None or not self.is_changed() or (
+            update_fields is not None
+            and not set(update_fields) & set(REVISION_FIELDS)
+        ):
+            self.save_note(*args, **kwargs)
+        else:
+            with transaction.atomic(
+                using=kwargs.get('using'), savepoint=False
+            ):
+                self.save_note(*args, **kwargs)
+                if revision:
+                    NoteRevision.objects.record([self])
+                else:
+                    NoteRevision.objects.merge(self)
+        self.remember_loaded()
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields,
+                   forced_update):
+        """Compare-and-swap: UPDATE ... WHERE id = %s AND version = %s."""
+        expected = self.version
+        values = [
+            (field, model, expected + 1 if field.name == 'version' else value)
+            for field, model, value in values
+        ]
+        if super()._do_update(
+            base_qs.filter(version=expected), using, pk_val, values,
+            update_fields, forced_update,
+        ):
+            self.version = expected + 1
+            return True
+        current = base_qs.filter(pk=pk_val).values_list(
+            'version', flat=True
+        ).first()
+        if current is not None:
+            raise NoteConflict(current)
+        return False
+
+    def save_note(self, *args, **kwargs):
+        if self.slug:
+            super().save(*args, **kwargs)
+            return
+        max_slug_length = self._meta.get_field('slug').max_length
+        save_with_free_slug(
+            self, lambda: super(Note, self).save(*args, **kwargs),
+            max_slug_length,
+        )
+
+
+class NoteRevisionManager(models.Manager):
+
+    def record(self, notes):
+        """Сохраняет прежние версии изменённых заметок одним запросом."""
+        changed = [note for note in notes if note.is_changed()]
+        if not changed:
+            return []
+        last_numbers = dict(
+            self.filter(note__in=changed).values('note')
+            .annotate(last=Max('number')).values_list('note', 'last')
+        )
+        revisions = [
+            self.model.from_note(note, last_numbers.get(note.pk, 0) + 1)
+            for note in changed
+        ]
+        self.bulk_create(revisions)
+        for note in changed:
+            note.remember_loaded()
+        return revisions
+
+    def merge(self, note):
+        """Сливает правку заметки с её последней версией в истории.
+
+        Текст последней версии восстанавливается по тексту до правки и
+        сохраняется заново относительно нового. Если истории ещё нет,
+        прежний текст записывается как обычная версия.
+        """
+        latest = self.filter(note=note).order_by('-number').first()
+        if latest is None:
+            return self.record([note])
+        merged = self.model.from_text(
+            note, latest.number, latest.title,
+            latest.restore_text(str(note._loaded['text'])),
+        )
+        latest.is_snapshot = merged.is_snapshot
+        latest.data = merged.data
+        latest.save(update_fields=('is_snapshot', 'data'))
+        note.remember_loaded()
+        return [latest]
+
+
+class NoteRevision(models.Model):
+    """Прежняя версия заметки: сжатая дельта или снимок целиком."""
+    note = models.ForeignKey(
+        Note, on_delete=models.CASCADE, related_name='revisions'
+    )
+    number = models.PositiveIntegerField('Номер версии')
+    title = models.CharField('Заголовок', max_length=100)
+    is_snapshot = models.BooleanField('Снимок целиком', default=False)
+    data = models.BinaryField('Сжатые данные')
+    created = models.DateTimeField('Заменена', auto_now_add=True)
+
+    objects = NoteRevisionManager()
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('note', 'number'), name='revision_note_number_uniq'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.note_id}: {self.number}'
+
+    @classmethod
+    def from_note(cls, note, number):
+        """Версия, которую заменяет текущая правка заметки."""
+        return cls.from_text(
+            note, number, note._loaded['title'], str(note._loaded['text'])
+        )
+
+    @classmethod
+    def from_text(cls, note, number, title, text):
+        """Версия с текстом text, сменённая текущим текстом заметки."""
+        snapshot = pack(text)
+        delta = pack(make_delta(note.text, text))
+        # Дельта большой правки бывает длиннее самого текста.
+        is_snapshot = (
+            number % SNAPSHOT_EVERY == 0 or len(snapshot) <= len(delta)
+        )
+        return cls(
+            note=note,
+            number=number,
+            title=title,
+            is_snapshot=is_snapshot,
+            data=snapshot if is_snapshot else delta,
+        )
+
+    def restore_text(self, newer_text):
+        """Текст этой версии по тексту версии, сменившей её."""
+        if self.is_snapshot:
+            return unpack(self.data)
+        return apply_delta(newer_text, unpack(self.data))
+
+
+class TagQuerySet(models.QuerySet):
+
+    def recount(self):
+        """Пересчитывает счётчики заметок у тегов одним UPDATE.
+
+        Заметки в корзине не считаются.
+        """
+        counts = NoteTag.objects.filter(
+            tag=OuterRef('pk'), note__deleted_at__isnull=True
+        ).values(
+            'tag'
+        ).annotate(count=Count('*')).values('count')
+        return self.update(note_count=Coalesce(Subquery(counts), 0))
+
+
+class Tag(models.Model):
+    """Тег заметок; у каждого автора свой набор тегов."""
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    name = models.CharField('Название', max_length=50)
+    # Транслитерация бывает втрое длиннее названия: «щ» -> «sch».
+    slug = models.SlugField('Адрес', max_length=150)
+    # Хранится, а не считается: облаку тегов не нужен GROUP BY
+    # по всем заметкам автора.
+    note_count = models.PositiveIntegerField('Заметок', default=0)
+
+    objects = TagQuerySet.as_manager()
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('author', 'slug'), name='tag_author_slug_uniq'
+            ),
+        )
+
+    def __str__(self):
+        return self.name
+
+
+class NoteTag(models.Model):
+    """Связь заметки с тегом."""
+    note = models.ForeignKey(Note, on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+    # Автор повторяет автора заметки: заметки с тегом находятся
+    # по индексу (author, tag, note) без чтения таблицы заметок.
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('note', 'tag'), name='note_tag_uniq'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('author', 'tag', 'note'),
+                name='note_tag_author_tag_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.note_id}: {self.tag_id}'
+
+
+class Task(models.Model):
+    """Фоновая задача в очереди на таблице БД (см. notes.tasks)."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=100)
+    payload = models.JSONField('Параметры', default=dict)
+    status = models.CharField(
+        'Состояние', max_length=10, choices=STATUSES, default=QUEUED
+    )
+    # Повторная постановка с тем же ключом возвращает уже созданную
+    # задачу, а не дублирует работу.
+    key = models.CharField(
+        'Ключ идемпотентности', max_length=100, unique=True, null=True,
+        blank=True,
+    )
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveIntegerField('Предел попыток', default=3)
+    result = models.JSONField('Результат', null=True, blank=True)
+    error = models.TextField('Последняя ошибка', blank=True)
+    worker = models.CharField('Обработчик', max_length=100, blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    run_at = models.DateTimeField('Готова к запуску', default=timezone.now)
+    started = models.DateTimeField('Запущена', null=True, blank=True)
+    finished = models.DateTimeField('Завершена', null=True, blank=True)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('run_at', 'id'),
+                name='task_queued_idx',
+                condition=models.Q(status='queued'),
+            ),
+            models.Index(fields=('finished',), name='task_finished_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}: {self.status}'
+
+    @property
+    def is_pending(self):
+        return self.status in (self.QUEUED, self.RUNNING)
@@ -0,0 +1,81 @@
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from .aio import alist
+
+
+class KeysetPage:
+    """Страница заметок, следующих за курсором.
+
+    Вместо OFFSET используется условие WHERE id > cursor LIMIT n,
+    поэтому дальние страницы стоят столько же, сколько первая.
+    Запрос выполняется при первом обращении к заметкам: страница,
+    отрисованная из кэша фрагментов, обходится без запроса к БД.
+    """
+
+    def __init__(self, queryset, cursor, page_size):
+        self.queryset = queryset
+        self.cursor = cursor
+        self.page_size = page_size
+
+    def _query(self):
+        # Одна лишняя запись показывает, есть ли следующая страница.
+        return (
+            self.queryset.filter(id__gt=self.cursor)
+            .order_by('id')[:self.page_size + 1]
+        )
+
+    @cached_property
+    def _notes(self):
+        return list(self._query())
+
+    async def aload(self):
+        """Загружает страницу, не блокируя цикл событий."""
+        if '_notes' not in self.__dict__:
+            self.__dict__['_notes'] = await alist(self._query())
+        return self
+
+    @property
+    def object_list(self):
+        return self._notes[:self.page_size]
+
+    @property
+    def has_next(self):
+        return len(self._notes) > self.page_size
+
+    @property
+    def next_cursor(self):
+        if self.has_next:
+            return self.object_list[-1].id
+        return None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+def paginate_keyset(queryset, cursor, page_size):
+    """Страница заметок из queryset с id больше курсора."""
+    return KeysetPage(queryset, cursor, page_size)
+
+
+class KeysetPaginationMixin:
+    """Постраничный вывод ListView по курсору вместо номера страницы."""
+    paginate_by = 50
+    cursor_kwarg = 'after'
+
+    def get_cursor(self):
+        cursor = self.request.GET.get(self.cursor_kwarg) or 0
+        try:
+            return int(cursor)
+        except ValueError:
+            raise Http404('Некорректный курсор страницы.')
+
+    def paginate_queryset(self, queryset, page_size):
+        page = paginate_keyset(queryset, self.get_cursor(), page_size)
+        return None, page, page, True
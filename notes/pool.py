@@ -0,0 +1,17 @@
+"""Функции процессов пула обработчика задач.
+
+Модуль не импортирует модели: процесс пула загружает его до того,
+как настроит Django.
+"""
+
+
+def init_process():
+    import django
+
+    django.setup()
+
+
+def run_task(pk):
+    from .tasks import execute
+
+    return execute(pk)
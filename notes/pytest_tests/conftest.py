@@ -11,37 +11,93 @@
 
 import pytest
 
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 # Импортируем класс клиента.
 from django.test.client import Client
 
 # Импортируем модель заметки, чтобы создать экземпляр.
+from notes.hot import hot_notes
 from notes.models import Note
+from notes.runner import shared_test_settings
+
+
+AUTHOR = 'Автор'
+NOT_AUTHOR = 'Не автор'
+ADMIN = 'admin'
+
+
+# Те же настройки, что у manage.py test (notes/runner.py).
+@pytest.fixture(scope='session', autouse=True)
+def common_test_settings():
+    with shared_test_settings():
+        yield
+
+
+# Пользователи и их сессии создаются один раз на весь прогон, ещё до
+# транзакций тестов, поэтому откат после теста их не удаляет. С xdist
+# у каждого процесса своя тестовая БД и свой набор пользователей.
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        User = get_user_model()
+        User.objects.create_superuser(ADMIN, 'admin@example.com', 'password')
+        sessions = {}
+        for username in (AUTHOR, NOT_AUTHOR):
+            client = Client()
+            client.force_login(User.objects.create(username=username))
+            sessions[username] = client.cookies[
+                settings.SESSION_COOKIE_NAME].value
+    return sessions
+
+
+def logged_in_client(sessions, username):
+    """Клиент с готовой сессией пользователя, без нового входа."""
+    client = Client()
+    client.cookies[settings.SESSION_COOKIE_NAME] = sessions[username]
+    return client
+
+
+# Кэш страниц живёт между тестами, а id пользователей повторяются.
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    hot_notes.clear()
+
+
+# Превышение бюджета SQL-запросов любой view роняет тест.
+@pytest.fixture(autouse=True)
+def strict_query_budgets(settings):
+    settings.NOTES_QUERY_BUDGET_RAISE = True
 
 
 @pytest.fixture
 # Используем встроенную фикстуру для модели пользователей django_user_model.
-def author(django_user_model):
-    return django_user_model.objects.create(username='Автор')
+def author(django_db_setup, django_user_model):
+    return django_user_model.objects.get(username=AUTHOR)
 
 
 @pytest.fixture
-def not_author(django_user_model):
-    return django_user_model.objects.create(username='Не автор')
+def not_author(django_db_setup, django_user_model):
+    return django_user_model.objects.get(username=NOT_AUTHOR)
 
 
+# Встроенная admin_user хэширует пароль в каждом тесте, это дорого.
 @pytest.fixture
-def author_client(author):  # Вызываем фикстуру автора.
-    # Создаём новый экземпляр клиента, чтобы не менять глобальный.
-    client = Client()
-    client.force_login(author)  # Логиним автора в клиенте.
-    return client
+def admin_user(django_db_setup, django_user_model):
+    return django_user_model.objects.get(username=ADMIN)
 
 
 @pytest.fixture
-def not_author_client(not_author):
-    client = Client()
-    client.force_login(not_author)  # Логиним обычного пользователя в клиенте.
-    return client
+def author_client(django_db_setup, author):  # Вызываем фикстуру автора.
+    # Создаём новый экземпляр клиента с сессией автора.
+    return logged_in_client(django_db_setup, AUTHOR)
+
+
+@pytest.fixture
+def not_author_client(django_db_setup, not_author):
+    return logged_in_client(django_db_setup, NOT_AUTHOR)
 
 
 # Фикстура note создает обьект заметки. Можно вызвать из любого места.
@@ -0,0 +1,49 @@
+"""Сжатые дельты для истории правок заметок.
+
+Прежняя версия текста хранится как обратная дельта по строкам: список
+операций, собирающих её из версии, которая её сменила. Число — это
+[начало, конец) отрезка строк новой версии, строка — вставленный текст.
+Дельта сжимается zlib, так что запись растёт на размер изменения,
+а не на размер заметки.
+"""
+import difflib
+import json
+import zlib
+
+# Каждая SNAPSHOT_EVERY-я версия хранится целиком: восстановление любой
+# версии применяет не больше SNAPSHOT_EVERY дельт.
+SNAPSHOT_EVERY = 20
+
+
+def pack(value):
+    return zlib.compress(json.dumps(value, ensure_ascii=False).encode())
+
+
+def unpack(data):
+    return json.loads(zlib.decompress(data))
+
+
+def make_delta(source, target):
+    """Операции, собирающие target из строк source."""
+    source_lines = source.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(
+        None, source_lines, target_lines, autojunk=False
+    )
+    delta = []
+    for tag, start, end, target_start, target_end in matcher.get_opcodes():
+        if tag == 'equal':
+            delta.append([start, end])
+        elif target_end > target_start:
+            delta.append(''.join(target_lines[target_start:target_end]))
+    return delta
+
+
+def apply_delta(source, delta):
+    """Собирает текст по операциям make_delta из строк source."""
+    lines = source.splitlines(keepends=True)
+    return ''.join(
+        ''.join(lines[operation[0]:operation[1]])
+        if isinstance(operation, list) else operation
+        for operation in delta
+    )
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner, default_test_processes
+from django.test.utils import override_settings
+
+
+def shared_test_settings(caches=True):
+    """Настройки, общие для тестов unittest и pytest.
+
+    Кэши — в памяти процесса: файловые кэши общие для всех процессов,
+    а у каждого процесса тестов своя БД с теми же id пользователей и
+    авторов. Замеры оставляют кэши проекта (caches=False, см.
+    notes.benchmarks). Статика без манифеста: тесты не запускают
+    collectstatic.
+    """
+    overrides = {
+        'STATICFILES_STORAGE': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    }
+    if caches:
+        overrides['CACHES'] = {
+            'default': {
+                **settings.CACHES['default'],
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'yanote',
+            },
+            'auth': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'yanote-auth',
+            },
+        }
+    return override_settings(**overrides)
+
+
+class ParallelTestRunner(DiscoverRunner):
+    """Запускает тесты в нескольких процессах, по числу ядер.
+
+    Тестовая БД мигрируется один раз, затем каждый процесс получает
+    свою копию: для SQLite Django копирует готовую базу в память.
+    Тесты с потоками и TransactionTestCase работают каждый в своей
+    копии и не мешают друг другу. Число процессов задаёт --parallel
+    или переменная DJANGO_TEST_PROCESSES, --parallel 1 отключает.
+    """
+
+    def __init__(self, parallel=0, pdb=False, buffer=False, **kwargs):
+        # Отладчик и буферизация вывода с процессами не работают.
+        if pdb or buffer:
+            parallel = 1
+        super().__init__(parallel=parallel, pdb=pdb, buffer=buffer, **kwargs)
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(parallel=default_test_processes())
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_settings = shared_test_settings()
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,219 @@
+import re
+
+from django.db import connection, connections, transaction
+from django.db.models import Q
+
+from .fields import decompress_value
+from .models import Note
+
+TABLE = Note._meta.db_table
+FTS_TABLE = f'{TABLE}_fts'
+WORD = re.compile(r'\w+')
+
+PENDING_TABLE = f'{TABLE}_fts_pending'
+# Индекс хранит свою копию текста. Триггеры обходятся встроенными
+# функциями SQLite и работают из любого клиента (dbshell, sqlite3,
+# скрипты обслуживания). Сжатый текст (BLOB) распаковать в SQL нечем:
+# триггер ставит заметку в очередь, а текст в индекс кладёт
+# index_pending() перед поиском.
+FTS_SQL = (
+    f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+    'title, text, author_id, '
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+PENDING_SQL = f'CREATE TABLE {PENDING_TABLE} (id INTEGER PRIMARY KEY)'
+SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_insert': f"""
+        CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON {TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, title, text, author_id)
+            VALUES (new.id, new.title,
+                    CASE WHEN typeof(new.text) = 'blob'
+                         THEN '' ELSE new.text END,
+                    new.author_id);
+            INSERT OR IGNORE INTO {PENDING_TABLE}(id)
+            SELECT new.id WHERE typeof(new.text) = 'blob';
+        END
+    """,
+    f'{FTS_TABLE}_delete': f"""
+        CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON {TABLE} BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+            DELETE FROM {PENDING_TABLE} WHERE id = old.id;
+        END
+    """,
+    f'{FTS_TABLE}_update': f"""
+        CREATE TRIGGER {FTS_TABLE}_update
+        AFTER UPDATE OF title, text, author_id ON {TABLE} BEGIN
+            UPDATE {FTS_TABLE} SET
+                title = new.title,
+                author_id = new.author_id,
+                text = CASE WHEN typeof(new.text) = 'blob'
+                            THEN text ELSE new.text END
+            WHERE rowid = new.id;
+            INSERT OR IGNORE INTO {PENDING_TABLE}(id)
+            SELECT new.id
+            WHERE typeof(new.text) = 'blob' AND new.text IS NOT old.text;
+        END
+    """,
+}
+POSTGRESQL_DOCUMENT = (
+    f"to_tsvector('russian', {TABLE}.title || ' ' || {TABLE}.text)"
+)
+
+
+def ensure_search_index(using='default'):
+    """Создаёт поисковый индекс заметок, если его ещё нет.
+
+    Вызывается после каждой миграции: при изменении схемы SQLite
+    пересоздаёт таблицу заметок вместе с её триггерами, поэтому
+    пропавшие триггеры создаются заново, а индекс перестраивается.
+    """
+    db = connections[using]
+    if TABLE not in db.introspection.table_names():
+        return
+    with db.cursor() as cursor:
+        if db.vendor == 'sqlite':
+            _ensure_sqlite_index(cursor)
+        elif db.vendor == 'postgresql':
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {TABLE}_search_idx '
+                f'ON {TABLE} USING GIN ({POSTGRESQL_DOCUMENT})'
+            )
+
+
+def _ensure_sqlite_index(cursor):
+    cursor.execute(
+        "SELECT name, sql FROM sqlite_master WHERE name IN (%s, %s) "
+        "OR (type = 'trigger' AND tbl_name = %s)",
+        [FTS_TABLE, PENDING_TABLE, TABLE],
+    )
+    existing = dict(cursor.fetchall())
+    tables = {FTS_TABLE: FTS_SQL, PENDING_TABLE: PENDING_SQL}
+    # Таблица или триггер пересоздаются, если пропали или их текст
+    # устарел; после этого индекс перестраивается целиком.
+    stale_tables = [
+        name for name, sql in tables.items()
+        if _normalize(existing.get(name, '')) != _normalize(sql)
+    ]
+    stale_triggers = [
+        name for name, sql in SQLITE_TRIGGERS.items()
+        if _normalize(existing.get(name, '')) != _normalize(sql)
+    ]
+    if not stale_tables and not stale_triggers:
+        return
+    for name in stale_tables:
+        cursor.execute(f'DROP TABLE IF EXISTS {name}')
+        cursor.execute(tables[name])
+    for name in stale_triggers:
+        cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(SQLITE_TRIGGERS[name])
+    cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    cursor.execute(
+        f'INSERT INTO {FTS_TABLE}(rowid, title, text, author_id) '
+        f"SELECT id, title, CASE WHEN typeof(text) = 'blob' THEN '' "
+        f'ELSE text END, author_id FROM {TABLE}'
+    )
+    cursor.execute(f'DELETE FROM {PENDING_TABLE}')
+    cursor.execute(
+        f'INSERT INTO {PENDING_TABLE}(id) '
+        f"SELECT id FROM {TABLE} WHERE typeof(text) = 'blob'"
+    )
+    _index_pending(cursor)
+
+
+def index_pending(using='default'):
+    """Кладёт в индекс сжатые тексты, которые поставили в очередь триггеры.
+
+    Когда очередь пуста, это один запрос к пустой таблице.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'SELECT 1 FROM {PENDING_TABLE} LIMIT 1')
+        if cursor.fetchone() is None:
+            return
+    with transaction.atomic(using=using), \
+            connections[using].cursor() as cursor:
+        _index_pending(cursor)
+
+
+def _index_pending(cursor, batch_size=500):
+    while True:
+        cursor.execute(
+            f'SELECT {PENDING_TABLE}.id, {TABLE}.text FROM {PENDING_TABLE} '
+            f'JOIN {TABLE} ON {TABLE}.id = {PENDING_TABLE}.id LIMIT %s',
+            [batch_size],
+        )
+        rows = cursor.fetchall()
+        cursor.executemany(
+            f'UPDATE {FTS_TABLE} SET text = %s WHERE rowid = %s',
+            [(decompress_value(text), pk) for pk, text in rows],
+        )
+        cursor.executemany(
+            f'DELETE FROM {PENDING_TABLE} WHERE id = %s',
+            [(pk,) for pk, _ in rows],
+        )
+        if len(rows) < batch_size:
+            return
+
+
+def _normalize(sql):
+    return ' '.join(sql.split())
+
+
+def search_notes(author, query, limit, offset=0):
+    """Ищет заметки автора по заголовку и тексту.
+
+    Возвращает заметки в порядке релевантности.
+    """
+    words = WORD.findall(query.lower())
+    if not words:
+        return []
+    notes = Note.objects.filter(author=author)
+    if connection.vendor == 'sqlite':
+        index_pending()
+        ids = _search_sqlite(author, words, limit, offset)
+    elif connection.vendor == 'postgresql':
+        ids = _search_postgresql(author, words, limit, offset)
+    else:
+        return list(_search_fallback(notes, words)[offset:offset + limit])
+    found = notes.in_bulk(ids)
+    return [found[pk] for pk in ids if pk in found]
+
+
+def _search_sqlite(author, words, limit, offset):
+    # Автор тоже проиндексирован: отбор его заметок идёт по индексу,
+    # а слова запроса ищутся только в заголовке и тексте.
+    terms = ' '.join(f'"{word}"*' for word in words)
+    match = f'author_id : {author.pk} AND {{title text}} : ({terms})'
+    with connection.cursor() as cursor:
+        # Заметки в корзине остаются в индексе, их отсекает соединение
+        # с таблицей заметок по первичному ключу.
+        cursor.execute(
+            f'SELECT {FTS_TABLE}.rowid FROM {FTS_TABLE} '
+            f'JOIN {TABLE} ON {TABLE}.id = {FTS_TABLE}.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s AND {TABLE}.deleted_at IS NULL '
+            # Совпадение в заголовке весит вдвое больше, чем в тексте.
+            f'ORDER BY bm25({FTS_TABLE}, 2.0, 1.0, 0.0) LIMIT %s OFFSET %s',
+            [match, limit, offset],
+        )
+        return [pk for pk, in cursor.fetchall()]
+
+
+def _search_postgresql(author, words, limit, offset):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT id FROM {TABLE}, '
+            "plainto_tsquery('russian', %s) AS query "
+            f'WHERE {POSTGRESQL_DOCUMENT} @@ query AND author_id = %s '
+            'AND deleted_at IS NULL '
+            f'ORDER BY ts_rank({POSTGRESQL_DOCUMENT}, query) DESC, id '
+            'LIMIT %s OFFSET %s',
+            [' '.join(words), author.pk, limit, offset],
+        )
+        return [pk for pk, in cursor.fetchall()]
+
+
+def _search_fallback(notes, words):
+    for word in words:
+        notes = notes.filter(
+            Q(title__icontains=word) | Q(text__icontains=word)
+        )
+    return notes.order_by('id')
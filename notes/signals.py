@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .auth import forget_user
+from .cache import invalidate_author
+from .db import configure_sqlite
+from .models import Note
+from .search import ensure_search_index, index_pending
+
+
+@receiver(post_migrate)
+def create_search_index(sender, using, **kwargs):
+    """Поддерживает поисковый индекс заметок после миграций."""
+    if sender.name == 'notes':
+        ensure_search_index(using)
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+def invalidate_notes_cache(sender, instance, using, **kwargs):
+    """Сбрасывает кэш страниц автора изменённой заметки."""
+    invalidate_author(instance.author_id, using)
+
+
+@receiver(post_save, sender=Note)
+def index_compressed_text(sender, instance, using, **kwargs):
+    """Кладёт в поисковый индекс только что сжатый текст заметки.
+
+    Триггеры SQLite не распаковывают текст и ставят заметку в очередь;
+    сохранённую форму индексируем сразу, а не при следующем поиске.
+    """
+    text = instance.__dict__.get('text')
+    if (connections[using].vendor == 'sqlite'
+            and isinstance(text, str)
+            and len(text.encode()) >= Note._meta.get_field('text').threshold):
+        index_pending(using)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_changed_user(sender, instance, **kwargs):
+    """Убирает изменённого или удалённого пользователя из кэша."""
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_in)
+@receiver(user_logged_out)
+def forget_signed_user(sender, request, user, **kwargs):
+    """Вход и выход начинают с пользователя из БД."""
+    if user is not None:
+        forget_user(user.pk)
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    """Настраивает каждое новое соединение с SQLite."""
+    configure_sqlite(connection)
@@ -0,0 +1,129 @@
+from collections import Counter
+from functools import lru_cache
+
+from django.db import IntegrityError, transaction
+from pytils.translit import slugify
+
+# Занятость slug проверяется по менеджеру модели по умолчанию: у заметок
+# это живые заметки, slug заметки в корзине может занять новая.
+
+SUFFIXES_PER_QUERY = 100
+MAX_ATTEMPTS = 10
+
+
+@lru_cache(maxsize=4096)
+def cached_slugify(title):
+    """Транслитерация заголовка; повторяющиеся заголовки берутся из кэша."""
+    return slugify(title)
+
+
+def with_suffix(base, number, max_length):
+    suffix = f'-{number}'
+    return base[:max_length - len(suffix)] + suffix
+
+
+def first_free_slug(model, base, max_length, reserved=()):
+    """Подбирает свободный slug вида base-N одним запросом к индексу.
+
+    reserved — slug, которые уже заняты, но ещё не видны в БД.
+    """
+    start = 2
+    while True:
+        candidates = [
+            with_suffix(base, number, max_length)
+            for number in range(start, start + SUFFIXES_PER_QUERY)
+        ]
+        taken = set(
+            model._default_manager.filter(
+                slug__in=candidates
+            ).values_list('slug', flat=True)
+        )
+        for slug in candidates:
+            if slug not in taken and slug not in reserved:
+                return slug
+        start += SUFFIXES_PER_QUERY
+
+
+def save_with_free_slug(note, save, max_length):
+    """Сохраняет заметку со slug, сформированным из заголовка.
+
+    Сначала заметка просто вставляется с базовым slug: уникальность
+    гарантирует индекс БД, отдельная проверка не нужна. Только при
+    конфликте подбирается свободный суффикс, и вставка повторяется.
+    """
+    base = cached_slugify(note.title)[:max_length] or 'note'
+    note.slug = base
+    for _ in range(MAX_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                save()
+            return
+        except IntegrityError:
+            model = type(note)
+            if not model._default_manager.filter(slug=note.slug).exists():
+                raise
+            note.slug = first_free_slug(model, base, max_length)
+    raise IntegrityError(f'Не удалось подобрать свободный slug для {base}')
+
+
+def allocate_slugs(model, notes, max_length):
+    """Назначает slug пачке новых заметок.
+
+    Заметкам без slug выдаётся slug по заголовку: базовые варианты
+    проверяются одним запросом, суффиксы для совпавших — ещё одним.
+    Возвращает явно заданные slug, которые уже заняты.
+    """
+    auto = [
+        (note, cached_slugify(note.title)[:max_length] or 'note')
+        for note in notes if not note.slug
+    ]
+    explicit = Counter(note.slug for note in notes if note.slug)
+    wanted = set(explicit) | {base for _, base in auto}
+    used = set(
+        model._default_manager.filter(
+            slug__in=wanted
+        ).values_list('slug', flat=True)
+    )
+    conflicts = sorted(
+        slug for slug, count in explicit.items() if slug in used or count > 1
+    )
+    used.update(explicit)
+    pending = []
+    for note, base in auto:
+        if base in used:
+            pending.append((note, base))
+        else:
+            note.slug = base
+            used.add(base)
+    start = Counter({base: 2 for _, base in pending})
+    while pending:
+        needed = Counter(base for _, base in pending)
+        candidates = {
+            base: [
+                with_suffix(base, number, max_length)
+                for number in range(
+                    start[base], start[base] + count + SUFFIXES_PER_QUERY
+                )
+            ]
+            for base, count in needed.items()
+        }
+        used.update(
+            model._default_manager.filter(
+                slug__in=[slug for slugs in candidates.values()
+                          for slug in slugs]
+            ).values_list('slug', flat=True)
+        )
+        free = {base: iter(slugs) for base, slugs in candidates.items()}
+        still_pending = []
+        for note, base in pending:
+            note.slug = next(
+                (slug for slug in free[base] if slug not in used), None
+            )
+            if note.slug is None:
+                still_pending.append((note, base))
+            else:
+                used.add(note.slug)
+        for base, count in needed.items():
+            start[base] += count + SUFFIXES_PER_QUERY
+        pending = still_pending
+    return conflicts
@@ -0,0 +1,253 @@
+"""Статика без CDN: сборка с хэшами в именах, сжатие и раздача.
+
+collectstatic с CompressedManifestStaticFilesStorage кладёт в
+STATIC_ROOT файлы с хэшем содержимого в имени и рядом их сжатые копии
+(.gz и, если установлен brotli, .br). StaticFilesMiddleware отдаёт их
+из того же WSGI-приложения: подходящую браузеру сжатую копию,
+с кэшированием на год для файлов с хэшем.
+
+Развёртывание: manage.py collectstatic, затем перезапуск сервера.
+До collectstatic страницы ссылаются на файлы по исходным именам, а
+middleware отдаёт их прямо из каталогов статики без сжатия и с
+коротким кэшированием.
+"""
+import asyncio
+import gzip
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.finders import get_finders
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_etags
+
+try:
+    import brotli
+except ImportError:  # Без brotli сжатые копии только в gzip.
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.map', '.txt', '.xml')
+# Файлы меньше порога умещаются в первые пакеты ответа и без сжатия.
+MIN_COMPRESS_SIZE = 512
+# Файл с хэшем в имени никогда не меняется: браузер не перепроверяет его.
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Файлы без хэша (admin подключает их по старым именам) перепроверяются.
+MUTABLE = 'public, max-age=60'
+
+
+def compress_gzip(data):
+    # mtime=0: одинаковые файлы дают одинаковые .gz.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compress_brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+ENCODINGS = (('br', '.br', compress_brotli), ('gzip', '.gz', compress_gzip))
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хранилище с хэшами в именах и сжатыми копиями файлов.
+
+    Копия сохраняется, только если она заметно меньше исходника;
+    при повторном collectstatic свежие копии не пересжимаются. Файл,
+    которого нет в манифесте (collectstatic ещё не запускали),
+    подключается по исходному имени, а не роняет страницу.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE) and self.exists(name):
+                for compressed in self.compress(name):
+                    yield name, compressed, True
+
+    def compress(self, name):
+        """Сохраняет сжатые копии файла, возвращает их имена."""
+        path = self.path(name)
+        with open(path, 'rb') as file:
+            data = file.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return []
+        saved = []
+        for encoding, suffix, compress in ENCODINGS:
+            if encoding == 'br' and brotli is None:
+                continue
+            target = path + suffix
+            if (
+                os.path.exists(target)
+                and os.path.getmtime(target) >= os.path.getmtime(path)
+            ):
+                continue
+            packed = compress(data)
+            if len(packed) < len(data) * 0.95:
+                with open(target, 'wb') as file:
+                    file.write(packed)
+                saved.append(name + suffix)
+        return saved
+
+
+def make_etag(path, suffix=''):
+    """Сильный ETag по времени изменения и размеру файла path."""
+    stat = os.stat(path)
+    return f'"{int(stat.st_mtime):x}-{stat.st_size:x}{suffix}"'
+
+
+class StaticFile:
+    """Файл из STATIC_ROOT и его сжатые копии: пути, размеры, ETag.
+
+    Сжатые копии — разные представления файла, поэтому у каждой свой
+    ETag: по её размеру и с суффиксом кодировки.
+    """
+
+    def __init__(self, path, immutable):
+        self.content_type = (
+            mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        )
+        self.last_modified = http_date(os.stat(path).st_mtime)
+        self.cache_control = IMMUTABLE if immutable else MUTABLE
+        self.variants = [
+            (encoding, path + suffix, make_etag(path + suffix, suffix))
+            for encoding, suffix, _ in ENCODINGS
+            if os.path.exists(path + suffix)
+        ]
+        self.variants.append((None, path, make_etag(path)))
+
+    def choose(self, accept_encoding):
+        """Кодировка, путь и ETag лучшего варианта для Accept-Encoding."""
+        accepted = set()
+        for item in accept_encoding.split(','):
+            encoding, _, params = item.strip().partition(';')
+            if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00'):
+                accepted.add(encoding.strip().lower())
+        for encoding, path, etag in self.variants:
+            if encoding is None or encoding in accepted or '*' in accepted:
+                return encoding, path, etag
+
+
+def scan_static_root(root, url):
+    """Словарь URL -> StaticFile по содержимому STATIC_ROOT."""
+    try:
+        immutable = set(ManifestStaticFilesStorage(
+            location=root, base_url=url
+        ).load_manifest().values())
+    except ValueError:
+        immutable = set()
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.endswith(('.gz', '.br')):
+                continue
+            path = os.path.join(directory, name)
+            relative = os.path.relpath(path, root).replace(os.sep, '/')
+            files[url + relative] = StaticFile(path, relative in immutable)
+    return files
+
+
+def scan_finders(url):
+    """Словарь URL -> StaticFile по исходным каталогам статики.
+
+    Нужен, пока collectstatic не запускали: файлы отдаются без хэшей
+    в именах и без сжатых копий. Из одинаковых путей берётся первый,
+    как в collectstatic.
+    """
+    files = {}
+    for finder in get_finders():
+        for relative, storage in finder.list(['CVS', '.*', '*~']):
+            key = url + relative.replace(os.sep, '/')
+            if key not in files:
+                files[key] = StaticFile(storage.path(relative), False)
+    return files
+
+
+def etag_matches(if_none_match, etag):
+    """Совпадает ли ETag с If-None-Match, как в django.utils.cache.
+
+    Сравнение слабое: W/-метки и списки меток тоже подходят.
+    """
+    etags = parse_etags(if_none_match)
+    if etags == ['*']:
+        return True
+    return etag.strip('W/') in (tag.strip('W/') for tag in etags)
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику раньше остальной обработки запроса.
+
+    Список файлов читается из STATIC_ROOT один раз при запуске: после
+    collectstatic процессы сервера нужно перезапустить. Файл отдаётся
+    FileResponse, то есть через wsgi.file_wrapper (sendfile у
+    gunicorn). Если STATIC_ROOT пуст, файлы берутся из исходных
+    каталогов статики.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        root = settings.STATIC_ROOT
+        self.files = {}
+        if root and os.path.isdir(root):
+            self.files = scan_static_root(str(root), settings.STATIC_URL)
+        if not self.files:
+            self.files = scan_finders(settings.STATIC_URL)
+        if not self.files:
+            raise MiddlewareNotUsed
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        response = self.serve(request)
+        if response is not None:
+            if asyncio.iscoroutinefunction(self.get_response):
+                return self.respond(response)
+            return response
+        return self.get_response(request)
+
+    async def respond(self, response):
+        return response
+
+    def serve(self, request):
+        """Ответ с файлом, 304 или None, если это не статика."""
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return None
+        encoding, path, etag = static_file.choose(
+            request.headers.get('Accept-Encoding', '')
+        )
+        headers = {
+            'ETag': etag,
+            'Last-Modified': static_file.last_modified,
+            'Cache-Control': static_file.cache_control,
+        }
+        if len(static_file.variants) > 1:
+            headers['Vary'] = 'Accept-Encoding'
+        if etag_matches(request.headers.get('If-None-Match', ''), etag):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(
+                open(path, 'rb'), content_type=static_file.content_type
+            )
+            del response['Content-Disposition']
+            if encoding:
+                headers['Content-Encoding'] = encoding
+        for name, value in headers.items():
+            response[name] = value
+        return response
@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.db.models import Count
+
+from .cache import invalidate_author
+from .models import NoteTag, Tag
+from .slugs import cached_slugify
+
+
+def parse_tags(value):
+    """Теги из строки через запятую: словарь slug -> название.
+
+    Названия приводятся к нижнему регистру, повторы отбрасываются.
+    """
+    tags = {}
+    for name in value.split(','):
+        name = ' '.join(name.split()).lower()
+        if name:
+            tags.setdefault(cached_slugify(name), name)
+    return tags
+
+
+def set_tags(note, tags, current=None):
+    """Заменяет теги заметки; tags — словарь slug -> название.
+
+    current — уже известные теги заметки в том же виде, slug -> id.
+    Недостающие теги автора создаются, счётчики заметок
+    пересчитываются только у затронутых тегов.
+    """
+    if current is None:
+        current = dict(
+            NoteTag.objects.filter(note=note).values_list(
+                'tag__slug', 'tag_id'
+            )
+        )
+    added = [slug for slug in tags if slug not in current]
+    removed = [
+        tag_id for slug, tag_id in current.items() if slug not in tags
+    ]
+    if not added and not removed:
+        return
+    with transaction.atomic(savepoint=False):
+        added_ids = []
+        if added:
+            Tag.objects.bulk_create(
+                [
+                    Tag(author_id=note.author_id, slug=slug, name=tags[slug])
+                    for slug in added
+                ],
+                ignore_conflicts=True,
+            )
+            added_ids = list(
+                Tag.objects.filter(
+                    author_id=note.author_id, slug__in=added
+                ).values_list('id', flat=True)
+            )
+            NoteTag.objects.bulk_create([
+                NoteTag(note=note, tag_id=tag_id, author_id=note.author_id)
+                for tag_id in added_ids
+            ])
+        if removed:
+            NoteTag.objects.filter(note=note, tag_id__in=removed).delete()
+        Tag.objects.filter(pk__in=[*added_ids, *removed]).recount()
+    invalidate_author(note.author_id)
+
+
+def filter_by_tags(notes, author, slugs):
+    """Заметки, у которых есть все теги из slugs.
+
+    Подходящие заметки отбираются подзапросом по индексу
+    (author, tag, note) таблицы связей, без GROUP BY по заметкам.
+    """
+    slugs = set(slugs)
+    tagged = NoteTag.objects.filter(
+        author=author, tag__slug__in=slugs
+    ).values('note').annotate(
+        matched=Count('tag')
+    ).filter(matched=len(slugs)).values('note')
+    return notes.filter(pk__in=tagged)
+
+
+def recount_note_tags(note_ids):
+    """Пересчитывает счётчики тегов заметок одним UPDATE."""
+    Tag.objects.filter(
+        pk__in=NoteTag.objects.filter(note__in=note_ids).values('tag')
+    ).recount()
@@ -0,0 +1,217 @@
+"""Очередь фоновых задач на таблице Task.
+
+Брокер не нужен: задачи ставятся INSERT в ту же БД, обработчик
+(manage.py run_worker) забирает их одним UPDATE и выполняет в пуле
+процессов. Работает и на одной SQLite.
+"""
+import os
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .importer import ENCODING_ERRORS, import_notes
+from .metrics import percentiles
+from .models import Task
+from .trash import purge_trash
+
+HANDLERS = {}
+FINISHED = (Task.DONE, Task.FAILED)
+
+
+def task(name, max_attempts=3):
+    """Регистрирует функцию как задачу name.
+
+    Функция получает параметры задачи и возвращает результат,
+    пригодный для JSON.
+    """
+    def register(func):
+        func.max_attempts = max_attempts
+        HANDLERS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, owner=None, key=None):
+    """Ставит задачу в очередь и возвращает её.
+
+    Если незавершённая задача с ключом key уже есть, возвращается
+    она, а новая не создаётся. Завершённая задача ключ не держит:
+    та же работа после неё ставится заново.
+    """
+    handler = HANDLERS[name]
+    while True:
+        try:
+            with transaction.atomic():
+                return Task.objects.create(
+                    name=name,
+                    payload=payload or {},
+                    owner=owner,
+                    key=key,
+                    max_attempts=handler.max_attempts,
+                )
+        except IntegrityError:
+            if key is None:
+                raise
+        existing = Task.objects.filter(key=key).first()
+        if existing is not None and existing.status not in FINISHED:
+            return existing
+        Task.objects.filter(key=key, status__in=FINISHED).update(key=None)
+
+
+def claim_tasks(worker, limit):
+    """Забирает до limit готовых задач одним UPDATE.
+
+    Условие status='queued' проверяется и в самом UPDATE, поэтому
+    одну задачу не заберут два обработчика.
+    """
+    now = timezone.now()
+    ready = Task.objects.filter(
+        status=Task.QUEUED, run_at__lte=now
+    ).order_by('run_at', 'id').values('id')[:limit]
+    claimed = Task.objects.filter(
+        pk__in=ready, status=Task.QUEUED
+    ).update(status=Task.RUNNING, worker=worker, started=now)
+    if not claimed:
+        return []
+    return list(
+        Task.objects.filter(
+            status=Task.RUNNING, worker=worker, started=now
+        ).order_by('run_at', 'id')
+    )
+
+
+def requeue_stale(timeout=None):
+    """Возвращает в очередь задачи, обработчик которых пропал.
+
+    Пропавшая попытка засчитывается: задача, исчерпавшая
+    max_attempts, помечается ошибочной и больше не запускается.
+    Возвращает число задач, вернувшихся в очередь.
+    """
+    timeout = timeout or settings.NOTES_TASK_TIMEOUT
+    stale = Task.objects.filter(
+        status=Task.RUNNING,
+        started__lt=timezone.now() - timedelta(seconds=timeout),
+    )
+    stale.filter(attempts__gte=F('max_attempts') - 1).update(
+        status=Task.FAILED,
+        attempts=F('attempts') + 1,
+        error='Обработчик задачи пропал.',
+        worker='',
+        finished=timezone.now(),
+    )
+    return stale.update(
+        status=Task.QUEUED, attempts=F('attempts') + 1, worker=''
+    )
+
+
+def record_failure(task, error):
+    """Учитывает упавшую попытку: повтор с растущей паузой или ошибка."""
+    task.error = error
+    if task.attempts < task.max_attempts:
+        task.status = Task.QUEUED
+        task.run_at = timezone.now() + timedelta(
+            seconds=settings.NOTES_TASK_RETRY_DELAY
+            * 2 ** (task.attempts - 1)
+        )
+    else:
+        task.status = Task.FAILED
+        task.finished = timezone.now()
+
+
+def save_attempt(task):
+    task.save(update_fields=(
+        'attempts', 'result', 'error', 'status', 'run_at', 'finished'
+    ))
+    return task.status
+
+
+def execute(pk):
+    """Выполняет забранную задачу и возвращает её новое состояние.
+
+    Упавшая задача повторяется с растущей паузой, пока не исчерпает
+    max_attempts.
+    """
+    task = Task.objects.get(pk=pk)
+    task.attempts += 1
+    try:
+        task.result = HANDLERS[task.name](**task.payload)
+    except Exception:
+        record_failure(task, traceback.format_exc())
+    else:
+        task.status = Task.DONE
+        task.error = ''
+        task.finished = timezone.now()
+    return save_attempt(task)
+
+
+def fail(pk, error):
+    """Засчитывает попытку, прерванную вне задачи, например падением пула.
+
+    Задача, которую уже успели завершить, не меняется.
+    """
+    task = Task.objects.get(pk=pk)
+    if task.status != Task.RUNNING:
+        return task.status
+    task.attempts += 1
+    record_failure(task, error)
+    return save_attempt(task)
+
+
+def task_stats(window=timedelta(hours=1)):
+    """Размер очереди, пропускная способность и задержки за window.
+
+    Задержка в очереди — время от готовности задачи до её запуска.
+    """
+    since = timezone.now() - window
+    finished = list(
+        Task.objects.filter(finished__gte=since).values_list(
+            'status', 'run_at', 'started', 'finished'
+        )
+    )
+    waits = [
+        (started - run_at).total_seconds() * 1000
+        for _, run_at, started, _ in finished
+    ]
+    durations = [
+        (done - started).total_seconds() * 1000
+        for _, _, started, done in finished
+    ]
+    return {
+        'queued': Task.objects.filter(status=Task.QUEUED).count(),
+        'running': Task.objects.filter(status=Task.RUNNING).count(),
+        'done': sum(status == Task.DONE for status, *_ in finished),
+        'failed': sum(status == Task.FAILED for status, *_ in finished),
+        'per_minute': len(finished) / (window.total_seconds() / 60),
+        'queue_ms': percentiles(waits),
+        'run_ms': percentiles(durations),
+    }
+
+
+@task('notes.import', max_attempts=1)
+def import_file(author_id, path, import_format):
+    """Загружает заметки из сохранённого файла и удаляет его.
+
+    Не повторяется: часть пачек при сбое уже загружена.
+    """
+    author = get_user_model().objects.get(pk=author_id)
+    try:
+        with open(path, encoding='utf-8', errors=ENCODING_ERRORS,
+                  newline='') as lines:
+            report = import_notes(author, lines, import_format)
+    finally:
+        os.remove(path)
+    return {
+        'created': report.created,
+        'failed': report.failed,
+        'errors': report.errors,
+    }
+
+
+@task('notes.purge_trash')
+def purge_trash_task():
+    return {'deleted': purge_trash(settings.NOTES_PURGE_BATCH)}
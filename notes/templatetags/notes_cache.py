@@ -0,0 +1,94 @@
+from django import template
+from django.core.cache import cache
+
+from notes.cache import (
+    fragment_key, get_fragment, set_fragment, user_fragment_key
+)
+
+register = template.Library()
+
+
+class NotesCacheNode(template.Node):
+
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        key = fragment_key(
+            self.name.resolve(context),
+            context['request'].user.pk,
+            [variable.resolve(context) for variable in self.vary_on],
+        )
+        content = get_fragment(key)
+        if content is None:
+            content = self.nodelist.render(context)
+            set_fragment(key, content)
+        return content
+
+
+class UserCacheNode(template.Node):
+
+    def __init__(self, nodelist, name):
+        self.nodelist = nodelist
+        self.name = name
+
+    def render(self, context):
+        key = user_fragment_key(
+            self.name.resolve(context), context['request'].user
+        )
+        content = cache.get(key)
+        if content is None:
+            content = self.nodelist.render(context)
+            set_fragment(key, content)
+        return content
+
+
+@register.tag
+def notes_cache(parser, token):
+    """Кэширует фрагмент страницы для текущего пользователя.
+
+    Использование::
+
+        {% notes_cache 'list' request.get_full_path %}
+            ...
+        {% endnotes_cache %}
+
+    Фрагмент сбрасывается при любом изменении заметок пользователя.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} требует имя фрагмента.'
+        )
+    nodelist = parser.parse(('endnotes_cache',))
+    parser.delete_first_token()
+    return NotesCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
+
+
+@register.tag
+def user_cache(parser, token):
+    """Кэширует фрагмент, который зависит только от пользователя.
+
+    Использование::
+
+        {% user_cache 'header' %}
+            ...
+        {% enduser_cache %}
+
+    Подходит для шапки и меню: изменения заметок фрагмент не
+    сбрасывают и в счётчиках кэша фрагментов не учитываются.
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} требует только имя фрагмента.'
+        )
+    nodelist = parser.parse(('enduser_cache',))
+    parser.delete_first_token()
+    return UserCacheNode(nodelist, parser.compile_filter(bits[1]))
@@ -1,13 +1,18 @@
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from pytils.translit import slugify
 
+from notes.cache import clear_fragment_cache_stats
+from notes.hot import hot_notes
 from notes.models import Note
 
 User = get_user_model()
 
 
+# Превышение бюджета SQL-запросов любой view роняет тест.
+@override_settings(NOTES_QUERY_BUDGET_RAISE=True)
 class BaseTestFixture(TestCase):
     TITLE = 'Тестовое название заметки'
     TEXT = 'Тестовый текст заметки'
@@ -51,3 +56,8 @@ class BaseTestFixture(TestCase):
             author=cls.author_1,
             slug=slugify(cls.TITLE) + '1',
         )
+
+    def setUp(self):
+        cache.clear()
+        clear_fragment_cache_stats()
+        hot_notes.clear()
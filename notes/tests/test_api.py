@@ -0,0 +1,118 @@
+# JSON API заметок:
+# Список и отдельная заметка доступны только автору;
+# Пакет создаёт, изменяет и удаляет заметки в одной транзакции;
+# Slug для пакета подбираются без конфликтов;
+# Ошибки валидации и занятые slug отклоняют пакет целиком;
+# Slug не строкой — ошибка пакета, а не сбой сервера.
+
+import json
+from http import HTTPStatus
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.models import Note
+from notes.tests.fixture import BaseTestFixture
+
+
+class TestNotesApi(BaseTestFixture):
+    API_LIST_URL = reverse('notes:api_list')
+    API_BATCH_URL = reverse('notes:api_batch')
+
+    def post_batch(self, batch, client=None):
+        client = client or self.author_client
+        return client.post(
+            self.API_BATCH_URL, json.dumps(batch),
+            content_type='application/json',
+        )
+
+    def test_list_and_detail(self):
+        """Автор получает свои заметки в JSON->"""
+        response = self.author_client.get(self.API_LIST_URL)
+        self.assertEqual(
+            [note['slug'] for note in response.json()['results']],
+            [self.note.slug],
+        )
+        self.assertIsNone(response.json()['next'])
+        response = self.author_client.get(
+            reverse('notes:api_detail', args=(self.note.slug,)))
+        self.assertEqual(response.json()['text'], self.TEXT)
+
+    def test_other_user_and_anonymous(self):
+        """Чужая заметка не видна, анонимный пользователь получает 401->"""
+        url = reverse('notes:api_detail', args=(self.note.slug,))
+        response = self.reader_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.client.get(self.API_LIST_URL)
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_batch(self):
+        """Пакет создаёт, изменяет и удаляет заметки->"""
+        response = self.post_batch({
+            'create': [{'title': self.TITLE, 'text': 'Один'},
+                       {'title': self.TITLE, 'text': 'Два'},
+                       {'title': 'Своя', 'text': 'Три', 'slug': 'own'}],
+            'update': [{'slug': self.note.slug, 'text': self.NEW_TEXT}],
+            'delete': [self.note_1.slug],
+        })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        created = response.json()['created']
+        self.assertEqual(len(set(created)), 3)
+        self.assertIn('own', created)
+        self.assertEqual(
+            Note.objects.filter(author=self.author).count(), 4)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.text, self.NEW_TEXT)
+        self.assertEqual(self.note.title, self.TITLE)
+        # Чужую заметку удалить нельзя.
+        self.assertEqual(response.json()['deleted'], 0)
+        self.assertTrue(Note.objects.filter(pk=self.note_1.pk).exists())
+
+    def test_invalid_batch_rolled_back(self):
+        """Пакет с ошибками не применяется совсем->"""
+        notes_count = Note.objects.count()
+        response = self.post_batch({
+            'create': [{'title': 'Верная', 'text': 'Текст'},
+                       {'title': 'Без текста'}],
+            'update': [{'slug': self.note_1.slug, 'text': 'Чужая'}],
+        })
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        errors = response.json()['errors']
+        self.assertIn('text', errors['create']['1'])
+        self.assertIn('slug', errors['update']['0'])
+        self.assertEqual(Note.objects.count(), notes_count)
+
+    def test_non_string_slugs(self):
+        """Slug не строкой в правке или удалении — ошибка 400->"""
+        response = self.post_batch({
+            'update': [{'slug': ['список'], 'text': 'Текст'},
+                       {'slug': None}],
+            'delete': [self.note.slug, {'slug': 'объект'}, 5],
+        })
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        errors = response.json()['errors']
+        self.assertEqual(set(errors['update']), {'0', '1'})
+        self.assertEqual(set(errors['delete']), {'1', '2'})
+        self.assertTrue(Note.objects.filter(pk=self.note.pk).exists())
+
+    def test_taken_slug_conflict(self):
+        """Занятый slug отклоняет пакет с кодом 409->"""
+        response = self.post_batch(
+            {'create': [{'title': 'Новая', 'text': 'Текст',
+                         'slug': self.note_1.slug}]})
+        self.assertEqual(response.status_code, HTTPStatus.CONFLICT)
+        self.assertEqual(response.json()['conflicts'], [self.note_1.slug])
+
+    def test_large_batch(self):
+        """Пакет из тысяч заметок выполняется за несколько запросов->"""
+        batch = {'create': [
+            {'title': f'Заметка {number % 10}', 'text': 'Текст'}
+            for number in range(2000)
+        ]}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post_batch(batch)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        # Вставка идёт пачками, а не по запросу на заметку.
+        self.assertLess(len(queries), 30)
+        self.assertEqual(len(set(response.json()['created'])), 2000)
@@ -0,0 +1,97 @@
+# Асинхронные страницы чтения (yanote.async_urls):
+# Анонимный пользователь перенаправляется на вход, API отвечает 401;
+# Список, заметка и API отдают те же данные, что и синхронные view;
+# Чужая заметка недоступна;
+# Повторный запрос с ETag получает 304;
+# Заметка из кэша фрагментов отдаётся без загрузки текста;
+# Заметка берётся из кэша горячих заметок, как в синхронной view.
+
+from http import HTTPStatus
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+
+from notes.hot import hot_notes
+from notes.tests.fixture import BaseTestFixture
+
+
+async def fetch(client, url):
+    return await client.get(url)
+
+
+@override_settings(ROOT_URLCONF='yanote.async_urls')
+class TestAsyncViews(BaseTestFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.author_async = AsyncClient()
+        self.author_async.force_login(self.author)
+        self.detail_url = reverse(self.DETAILS_URL, args=(self.note.slug,))
+
+    async def test_anonymous(self):
+        """Аноним уходит на вход, API отвечает 401->"""
+        client = AsyncClient()
+        response = await client.get(self.LIST_URL)
+        self.assertRedirects(
+            response, f'{self.LOGIN_URL}?next={self.LIST_URL}',
+            fetch_redirect_response=False,
+        )
+        response = await client.get(reverse('notes:api_list'))
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        response = await client.get(self.HOME_URL)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    async def test_pages_show_own_notes(self):
+        """Список и заметка показывают заметки автора->"""
+        response = await self.author_async.get(self.LIST_URL)
+        self.assertIn(self.note, response.context['object_list'])
+        self.assertNotIn(self.note_1, response.context['object_list'])
+        response = await self.author_async.get(self.detail_url)
+        self.assertContains(response, self.TEXT)
+
+    async def test_foreign_note_not_found(self):
+        """Чужая заметка отдаёт 404->"""
+        for url in (
+            reverse(self.DETAILS_URL, args=(self.note_1.slug,)),
+            reverse('notes:api_detail', args=(self.note_1.slug,)),
+        ):
+            with self.subTest(url=url):
+                response = await self.author_async.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_api_matches_sync(self):
+        """API отдаёт то же, что синхронная версия->"""
+        for url in (
+            reverse('notes:api_list'),
+            reverse('notes:api_detail', args=(self.note.slug,)),
+        ):
+            with self.subTest(url=url):
+                response = async_to_sync(fetch)(self.author_async, url)
+                with override_settings(ROOT_URLCONF='yanote.urls'):
+                    expected = self.author_client.get(url)
+                self.assertEqual(response.json(), expected.json())
+
+    async def test_not_modified(self):
+        """Совпавший ETag даёт 304->"""
+        for url in (self.detail_url, self.LIST_URL):
+            with self.subTest(url=url):
+                etag = (await self.author_async.get(url))['ETag']
+                response = await self.author_async.get(
+                    url, **{'If-None-Match': etag})
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_cached_detail_skips_text(self):
+        """Заметка из кэша отдаётся без загрузки текста->"""
+        async_to_sync(fetch)(self.author_async, self.detail_url)
+        # Сессия и пользователь берутся из кэша: только метаданные.
+        with self.assertNumQueries(1):
+            response = async_to_sync(fetch)(self.author_async, self.detail_url)
+        self.assertContains(response, self.TEXT)
+
+    def test_detail_uses_hot_notes(self):
+        """Заметка во второй раз берётся из кэша горячих заметок->"""
+        for _ in range(2):
+            async_to_sync(fetch)(self.author_async, self.detail_url)
+        self.assertEqual(hot_notes.stats['hits'], 1)
@@ -0,0 +1,130 @@
+# Автосохранение заметки:
+# Правки заменяют отрезок текста, дописывают в конец и меняют заголовок;
+# Записываются только изменённые столбцы, slug не проверяется;
+# Частые правки сливаются в одну версию истории;
+# Некорректные правки отклоняются, чужая заметка недоступна.
+
+import json
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from notes.models import Note
+from notes.tests.fixture import BaseTestFixture
+
+
+class TestAutosave(BaseTestFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('notes:api_autosave', args=(self.note.slug,))
+        # Заметку давно не меняли: первая правка попадает в историю.
+        Note.objects.filter(pk=self.note.pk).update(
+            updated=timezone.now() - timedelta(hours=1))
+
+    def autosave(self, patch, client=None):
+        client = client or self.author_client
+        return client.post(
+            self.url, json.dumps(patch), content_type='application/json')
+
+    def test_patches_applied(self):
+        """Замена, дописывание и заголовок применяются к заметке->"""
+        response = self.autosave({
+            'replace': {'offset': 0, 'length': 8, 'text': 'Черновой'},
+            'append': ' и ещё',
+            'title': 'Черновик',
+        })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.text, 'Черновой текст заметки и ещё')
+        self.assertEqual(self.note.title, 'Черновик')
+        self.assertEqual(self.note.length, len(self.note.text))
+        self.assertEqual(response.json()['length'], self.note.length)
+
+    def test_writes_only_changed_columns(self):
+        """UPDATE пишет только изменённые столбцы, slug не проверяется->"""
+        with CaptureQueriesContext(connection) as queries:
+            self.autosave({'append': '!'})
+        statements = [query['sql'] for query in queries]
+        update = next(sql for sql in statements if sql.startswith('UPDATE'))
+        self.assertIn('"text"', update)
+        self.assertNotIn('"title"', update)
+        self.assertNotIn('"slug"', update)
+        self.assertFalse([
+            sql for sql in statements
+            if sql.startswith('SELECT') and '"slug" IN' in sql
+        ])
+
+    def test_rapid_patches_coalesced(self):
+        """Серия частых правок даёт одну версию истории->"""
+        for word in ('раз', 'два', 'три'):
+            self.autosave({'append': f' {word}'})
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.revisions.count(), 1)
+        self.assertEqual(self.note.get_version(1)[1], self.TEXT)
+        with override_settings(NOTES_AUTOSAVE_WINDOW=0):
+            self.autosave({'append': ' четыре'})
+        self.assertEqual(self.note.revisions.count(), 2)
+
+    def test_coalesced_history_restores_text(self):
+        """Слитые правки многострочного текста не портят историю->"""
+        original = 'line1\nline2\nline3\n'
+        Note.objects.filter(pk=self.note.pk).update(
+            text=original, updated=timezone.now() - timedelta(hours=1))
+        self.autosave({'append': 'A\n'})
+        self.autosave({'replace': {'offset': 0, 'length': 6, 'text': ''}})
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.text, 'line2\nline3\nA\n')
+        self.assertEqual(self.note.revisions.count(), 1)
+        self.assertEqual(self.note.get_version(1)[1], original)
+
+    def test_fresh_note_keeps_original(self):
+        """Правки сразу после создания или формы сохраняют историю->"""
+        Note.objects.filter(pk=self.note.pk).update(updated=timezone.now())
+        self.autosave({'append': '\nвторая строка'})
+        self.autosave({'append': '\nтретья строка'})
+        self.author_client.post(
+            reverse(self.EDITS_URL, args=(self.note.slug,)),
+            {'title': self.TITLE, 'text': 'Из формы',
+             'slug': self.note.slug},
+        )
+        self.autosave({'append': '\nпосле формы'})
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.text, 'Из формы\nпосле формы')
+        self.assertEqual(self.note.revisions.count(), 2)
+        self.assertEqual(self.note.get_version(1)[1], self.TEXT)
+        self.assertEqual(
+            self.note.get_version(2)[1],
+            f'{self.TEXT}\nвторая строка\nтретья строка',
+        )
+
+    def test_bad_patches_rejected(self):
+        """Некорректные правки отклоняются->"""
+        for patch in (
+            [],
+            {'append': 1},
+            {'replace': {'offset': 100, 'text': 'x'}},
+            {'replace': {'offset': -1, 'text': 'x'}},
+            {'replace': 'x'},
+            {'title': 'x' * 101},
+            {'replace': {'offset': 0, 'length': 100, 'text': ''}},
+        ):
+            with self.subTest(patch=patch):
+                response = self.autosave(patch)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.text, self.TEXT)
+
+    def test_foreign_and_anonymous(self):
+        """Чужая заметка не найдена, аноним получает 401->"""
+        response = self.autosave({'append': '!'}, self.auth_client_1)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.client.post(
+            self.url, '{}', content_type='application/json')
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
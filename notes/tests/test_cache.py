@@ -0,0 +1,96 @@
+# Кэш страниц заметок:
+# Повторный просмотр списка берётся из кэша без запроса заметок;
+# Создание, изменение и удаление заметки сбрасывают кэш автора;
+# Кэш сбрасывается и после коммита записи;
+# Кэш одного пользователя не влияет на другого;
+# Кэш работает и с файловым бэкендом;
+# По умолчанию кэш общий для процессов сервера.
+
+import os
+import tempfile
+from unittest import skipIf
+
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+
+from notes.cache import fragment_cache_stats, get_generation
+from notes.models import Note
+from notes.tests.fixture import BaseTestFixture
+from yanote import settings as project_settings
+
+
+class TestPageCache(BaseTestFixture):
+
+    def test_repeated_list_served_from_cache(self):
+        """Повторный просмотр списка не запрашивает заметки->"""
+        self.author_client.get(self.LIST_URL)
+        # Сессия, пользователь и поколение для ETag — из кэша.
+        with self.assertNumQueries(0):
+            response = self.author_client.get(self.LIST_URL)
+        self.assertContains(response, self.note.title)
+        self.assertEqual(fragment_cache_stats(), {'hits': 1, 'misses': 1})
+
+    def test_cache_invalidated_on_create_update_delete(self):
+        """Изменения заметок сразу видны на закэшированных страницах->"""
+        detail_url = reverse(self.DETAILS_URL, args=(self.note.slug,))
+        self.author_client.get(self.LIST_URL)
+        self.author_client.get(detail_url)
+        self.author_client.post(
+            self.ADD_URL, data={'title': 'Свежая', 'text': 'Текст'})
+        self.assertContains(self.author_client.get(self.LIST_URL), 'Свежая')
+        self.author_client.post(
+            reverse(self.EDITS_URL, args=(self.note.slug,)),
+            data={'title': 'Исправленная', 'text': 'Текст',
+                  'slug': self.note.slug},
+        )
+        self.assertContains(self.author_client.get(detail_url), 'Исправленная')
+        self.author_client.post(
+            reverse(self.DELETES_URL, args=(self.note.slug,)))
+        self.assertNotContains(
+            self.author_client.get(self.LIST_URL), 'Исправленная')
+
+    def test_invalidated_after_commit(self):
+        """Поколение, увиденное до коммита правки, после него устаревает->"""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.author_client.post(
+                reverse(self.EDITS_URL, args=(self.note.slug,)),
+                {'title': self.TITLE, 'text': self.NEW_TEXT,
+                 'slug': self.note.slug},
+            )
+            self.assertRedirects(response, self.SUCCESS_URL)
+            # Так поколение видит читатель, пока правка не закоммичена.
+            before_commit = get_generation(self.author.pk)
+        self.assertNotEqual(get_generation(self.author.pk), before_commit)
+
+    def test_cache_is_per_user(self):
+        """Кэш списка одного пользователя не виден другому->"""
+        self.author_client.get(self.LIST_URL)
+        response = self.auth_client_1.get(self.LIST_URL)
+        self.assertContains(response, f'{self.note_1.id}:')
+        self.assertNotContains(response, f'{self.note.id}:')
+
+    def test_file_based_cache(self):
+        """Кэш работает с файловым бэкендом->"""
+        with tempfile.TemporaryDirectory() as location:
+            with override_settings(CACHES={**settings.CACHES, 'default': {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            }}):
+                self.author_client.get(self.LIST_URL)
+                Note.objects.create(
+                    title='Из файла', text=self.TEXT, author=self.author)
+                response = self.author_client.get(self.LIST_URL)
+                self.assertContains(response, 'Из файла')
+                self.author_client.get(self.LIST_URL)
+                self.assertEqual(
+                    fragment_cache_stats(), {'hits': 1, 'misses': 2})
+
+    @skipIf(os.getenv('CACHE_BACKEND'), 'кэш задан окружением')
+    def test_default_cache_shared(self):
+        """По умолчанию кэш не в памяти процесса->"""
+        # Тесты подменяют кэши на LocMemCache, поэтому смотрим
+        # на сами настройки проекта.
+        self.assertNotIn(
+            'locmem', project_settings.CACHES['default']['BACKEND'])
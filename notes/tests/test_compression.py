@@ -0,0 +1,124 @@
+# Сжатие текста заметок:
+# Большой текст хранится сжатым, короткий — как есть;
+# Текст распаковывается только при обращении к нему;
+# Сжатые заметки находятся поиском и выгружаются целиком;
+# Поисковый индекс обновляется и при записи в обход Django;
+# values() и values_list() отдают текст обычной строкой;
+# Миграция сжимает уже сохранённые большие тексты.
+
+import importlib
+import json
+import zlib
+
+from django.apps import apps
+from django.db import connection
+from django.urls import reverse
+
+from notes.fields import COMPRESS_THRESHOLD, CompressedText
+from notes.models import Note
+from notes.search import search_notes
+from notes.tests.fixture import BaseTestFixture
+
+LOG_LINE = 'INFO 2026-10-18 12:00:00 worker: задача выполнена за 15 мс\n'
+
+
+class TestCompression(BaseTestFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.big_text = LOG_LINE * (COMPRESS_THRESHOLD // len(LOG_LINE) + 1)
+        self.big = Note.objects.create(
+            title='Журнал', text=self.big_text, author=self.author,
+            slug='zhurnal',
+        )
+
+    def stored_type(self, note):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT typeof(text) FROM notes_note WHERE id = %s',
+                [note.pk],
+            )
+            return cursor.fetchone()[0]
+
+    def test_big_text_compressed(self):
+        """Большой текст сжимается, короткий хранится как есть->"""
+        self.assertEqual(self.stored_type(self.big), 'blob')
+        self.assertEqual(self.stored_type(self.note), 'text')
+        note = Note.objects.get(pk=self.big.pk)
+        self.assertEqual(note.text, self.big_text)
+        self.assertIs(type(note.text), str)
+
+    def test_lazy_decompression(self):
+        """Текст распаковывается при первом обращении->"""
+        note = Note.objects.get(pk=self.big.pk)
+        self.assertIsInstance(note.__dict__['text'], CompressedText)
+        note.text
+        self.assertIs(type(note.__dict__['text']), str)
+
+    def test_search_and_export(self):
+        """Сжатая заметка находится поиском и выгружается целиком->"""
+        response = self.author_client.get(
+            reverse('notes:search'), {'q': 'выполнена'})
+        self.assertIn(self.big, response.context['object_list'])
+        response = self.author_client.get(
+            reverse('notes:export', args=('ndjson',)))
+        rows = [
+            json.loads(line) for line in
+            b''.join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertIn(self.big_text, [row['text'] for row in rows])
+
+    def test_raw_write_indexed(self):
+        """Сжатый текст, записанный в обход Django, находится поиском->"""
+        text = self.big_text.replace('выполнена', 'отменена')
+        # Так пишет dbshell: без функций, которые регистрирует Django.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE notes_note SET text = %s WHERE id = %s',
+                [zlib.compress(text.encode()), self.big.pk],
+            )
+        for query, found in (('отменена', True), ('выполнена', False)):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    self.big in search_notes(self.author, query, 10), found)
+
+    def test_values_plain_str(self):
+        """values() и values_list() отдают текст строкой->"""
+        notes = Note.objects.filter(pk=self.big.pk)
+        values = (
+            notes.values('text').get()['text'],
+            notes.values_list('text', flat=True).get(),
+            notes.values_list('id', 'text').get()[1],
+            notes.values_list('text', named=True).get().text,
+            Note.all_objects.filter(pk=self.big.pk)
+            .values_list('text', flat=True).get(),
+        )
+        for value in values:
+            self.assertIs(type(value), str)
+            self.assertEqual(value, self.big_text)
+
+    def test_edit_compressed(self):
+        """Правка сжатой заметки сохраняет прежнюю версию->"""
+        note = Note.objects.get(pk=self.big.pk)
+        note.text += 'ERROR конец журнала\n'
+        note.save()
+        self.assertEqual(note.get_version(1)[1], self.big_text)
+        self.assertEqual(self.stored_type(note), 'blob')
+
+    def test_migration_compresses_existing(self):
+        """Миграция сжимает сохранённые раньше большие тексты->"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE notes_note SET text = %s WHERE id = %s',
+                [self.big_text, self.big.pk],
+            )
+        self.assertEqual(self.stored_type(self.big), 'text')
+        migration = importlib.import_module(
+            'notes.migrations.0007_note_text_compressed')
+        # Только данные: схему функции миграции не трогают.
+        editor = connection.schema_editor()
+        migration.compress_texts(apps, editor)
+        self.assertEqual(self.stored_type(self.big), 'blob')
+        migration.decompress_texts(apps, editor)
+        self.assertEqual(self.stored_type(self.big), 'text')
+        self.assertEqual(Note.objects.get(pk=self.big.pk).text, self.big_text)
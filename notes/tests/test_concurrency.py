@@ -0,0 +1,129 @@
+# Оптимистическая блокировка заметок:
+# Сохранение устаревшей копии заметки не затирает чужую правку;
+# Форма с устаревшей версией возвращается с ответом 409 и текстом автора;
+# API отклоняет правки с устаревшей версией и сообщает текущую;
+# Параллельные правки одной заметки через форму не теряются и не дают 5xx.
+
+import json
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from notes.benchmarks import parallel_edits
+from notes.models import Note, NoteConflict
+from notes.tests.fixture import BaseTestFixture
+
+User = get_user_model()
+
+
+class TestOptimisticLocking(BaseTestFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.edit_url = reverse(self.EDITS_URL, args=(self.note.slug,))
+
+    def touch(self):
+        """Правка заметки «из другого окна»."""
+        note = Note.objects.get(pk=self.note.pk)
+        note.text = self.NEW_TEXT
+        note.save()
+        return note.version
+
+    def test_stale_copy_not_saved(self):
+        """Устаревшая копия не сохраняется поверх свежей->"""
+        stale = Note.objects.get(pk=self.note.pk)
+        current = self.touch()
+        self.assertEqual(current, 2)
+        stale.text = 'Устаревшая правка'
+        with self.assertRaises(NoteConflict) as context:
+            with transaction.atomic():
+                stale.save()
+        self.assertEqual(context.exception.current_version, current)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.text, self.NEW_TEXT)
+
+    def test_form_conflict(self):
+        """Форма с устаревшей версией получает 409 и сохраняет текст->"""
+        current = self.touch()
+        data = {**self.data, 'slug': self.note.slug, 'version': 1}
+        response = self.author_client.post(self.edit_url, data)
+        self.assertEqual(response.status_code, HTTPStatus.CONFLICT)
+        form = response.context['form']
+        self.assertEqual(form['text'].value(), self.data['text'])
+        self.assertEqual(form['version'].value(), current)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.text, self.NEW_TEXT)
+        # Повторная отправка с текущей версией записывает текст.
+        response = self.author_client.post(
+            self.edit_url, {**data, 'version': current})
+        self.assertRedirects(response, self.SUCCESS_URL)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.text, self.data['text'])
+        self.assertEqual(self.note.version, current + 1)
+
+    def test_api_conflicts(self):
+        """API отклоняет правки с устаревшей версией->"""
+        current = self.touch()
+        response = self.author_client.post(
+            reverse('notes:api_batch'),
+            json.dumps({'update': [
+                {'slug': self.note.slug, 'text': 'Пакет', 'version': 1}
+            ]}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CONFLICT)
+        self.assertEqual(response.json()['versions'], {
+            self.note.slug: current
+        })
+        response = self.author_client.post(
+            reverse('notes:api_autosave', args=(self.note.slug,)),
+            json.dumps({'append': '!', 'version': 1}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CONFLICT)
+        self.assertEqual(response.json()['version'], current)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.text, self.NEW_TEXT)
+
+    def test_api_returns_new_version(self):
+        """API возвращает версию заметки после правки->"""
+        response = self.author_client.post(
+            reverse('notes:api_batch'),
+            json.dumps({'update': [
+                {'slug': self.note.slug, 'text': 'Пакет', 'version': 1}
+            ]}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['updated'], {self.note.slug: 2})
+        response = self.author_client.post(
+            reverse('notes:api_autosave', args=(self.note.slug,)),
+            json.dumps({'append': '!', 'version': 2}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['version'], 3)
+
+
+class TestParallelWriters(TransactionTestCase):
+    WORKERS = 8
+    EDITS_PER_WORKER = 5
+
+    def test_parallel_edits_not_lost(self):
+        """Параллельные правки через форму не теряются и не дают 5xx->"""
+        author = User.objects.create(username='parallel_author')
+        note = Note.objects.create(
+            title='Общая заметка', text='Начало', author=author)
+        tokens, conflicts, errors, elapsed = parallel_edits(
+            note.pk, self.WORKERS, self.EDITS_PER_WORKER)
+        self.assertEqual(errors, 0)
+        note.refresh_from_db()
+        total = self.WORKERS * self.EDITS_PER_WORKER
+        self.assertEqual(note.version, 1 + total)
+        self.assertEqual(set(note.text.split()[1:]), set(tokens))
+        self.assertEqual(len(note.text.split()), 1 + total)
+        # Доля конфликтов и пропускная способность: каждая правка
+        # проходит с конечным числом повторов.
+        self.assertLess(conflicts / (conflicts + total), 1)
+        self.assertGreater(total / elapsed, 0)
@@ -0,0 +1,88 @@
+# Условные GET-запросы:
+# Страницы заметки и списка отдают ETag, заметка — и Last-Modified;
+# Повторный запрос с If-None-Match получает 304 без загрузки заметок;
+# ETag списка не требует запроса к заметкам;
+# Last-Modified не отдаётся, пока идёт секунда изменения заметки;
+# После изменения заметки отдаётся новая страница.
+
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.urls import reverse
+from django.utils import timezone
+
+from notes.models import Note
+from notes.tests.fixture import BaseTestFixture
+
+
+class TestConditionalGet(BaseTestFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.detail_url = reverse(self.DETAILS_URL, args=(self.note.slug,))
+        # Заметку изменили не в текущую секунду.
+        Note.objects.filter(pk=self.note.pk).update(
+            updated=timezone.now() - timedelta(minutes=1))
+
+    def test_validators_sent(self):
+        """Страницы отдают ETag, заметка — и Last-Modified->"""
+        for url, last_modified in ((self.detail_url, True),
+                                   (self.LIST_URL, False)):
+            with self.subTest(url=url):
+                response = self.author_client.get(url)
+                self.assertIn('ETag', response.headers)
+                self.assertEqual(
+                    'Last-Modified' in response.headers, last_modified)
+
+    def test_not_modified_without_loading_notes(self):
+        """Совпавший ETag даёт 304 без загрузки заметок->"""
+        # Сессия и пользователь из кэша: заметке нужен запрос
+        # метаданных, списку хватает поколения кэша автора.
+        for url, queries in ((self.detail_url, 1), (self.LIST_URL, 0)):
+            with self.subTest(url=url):
+                etag = self.author_client.get(url)['ETag']
+                with self.assertNumQueries(queries):
+                    response = self.author_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(response.content, b'')
+
+    def test_detail_not_modified_since(self):
+        """Заметка не отдаётся повторно по If-Modified-Since->"""
+        last_modified = self.author_client.get(
+            self.detail_url)['Last-Modified']
+        response = self.author_client.get(
+            self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_no_last_modified_within_second(self):
+        """Только что изменённая заметка отдаётся без Last-Modified->"""
+        self.note.title = 'Новый заголовок'
+        self.note.save()
+        response = self.author_client.get(self.detail_url)
+        self.assertIn('ETag', response.headers)
+        self.assertNotIn('Last-Modified', response.headers)
+
+    def test_changes_produce_new_etag(self):
+        """Изменение или удаление заметки меняет ETag->"""
+        detail_etag = self.author_client.get(self.detail_url)['ETag']
+        list_etag = self.author_client.get(self.LIST_URL)['ETag']
+        self.note.title = 'Новый заголовок'
+        self.note.save()
+        response = self.author_client.get(
+            self.detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        Note.objects.create(
+            title='Временная', text=self.TEXT, author=self.author
+        ).delete()
+        self.note.delete()
+        response = self.author_client.get(
+            self.LIST_URL, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_etag_is_per_user(self):
+        """Чужой ETag не даёт ответа 304->"""
+        etag = self.author_client.get(self.LIST_URL)['ETag']
+        response = self.auth_client_1.get(
+            self.LIST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
@@ -3,10 +3,13 @@
 # В список заметок одного пользователя не попадают заметки другого пользователя;
 # На страницы создания и редактирования заметки передаются формы.
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from notes.tests.fixture import BaseTestFixture
 from notes.forms import NoteForm
+from notes.models import Note
 
 
 class TestContent(BaseTestFixture):
@@ -33,3 +36,45 @@ class TestContent(BaseTestFixture):
         response = self.author_client.get(self.ADD_URL)
         self.assertIn('form', response.context)
         self.assertIsInstance(response.context['form'], NoteForm)
+
+    def test_notes_list_paginated_by_cursor(self):
+        """Список заметок выводится страницами по курсору->"""
+        Note.objects.bulk_create(
+            Note(title=self.TITLE, text=self.TEXT,
+                 slug=f'page-{number}', author=self.author)
+            for number in range(60)
+        )
+        response = self.author_client.get(self.LIST_URL)
+        first_page = response.context['object_list']
+        self.assertEqual(len(first_page), 50)
+        self.assertEqual(first_page[0], self.note)
+        next_cursor = response.context['page_obj'].next_cursor
+        self.assertEqual(next_cursor, first_page[-1].id)
+        response = self.author_client.get(
+            self.LIST_URL, {'after': next_cursor})
+        second_page = response.context['object_list']
+        self.assertEqual(len(second_page), 11)
+        self.assertTrue(all(note.id > next_cursor for note in second_page))
+        self.assertFalse(response.context['page_obj'].has_next)
+
+    def test_notes_list_does_not_load_text(self):
+        """Список показывает превью, не читая текст заметок->"""
+        self.note.text = 'Длинный текст ' * 1000
+        self.note.save()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.author_client.get(self.LIST_URL)
+        notes_query = next(
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT "notes_note"."id"')
+        )
+        self.assertNotIn('"notes_note"."text"', notes_query)
+        self.assertContains(response, self.note.text[:200] + '…')
+
+    def test_excerpt_follows_text(self):
+        """Превью и длина текста пересчитываются при сохранении->"""
+        self.note.text = 'Короткий'
+        self.note.save(update_fields=('text',))
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.excerpt, 'Короткий')
+        self.assertEqual(self.note.length, len('Короткий'))
+        self.assertFalse(self.note.is_truncated)
@@ -0,0 +1,83 @@
+# Большой набор данных для тестов производительности:
+# Набор загружается один раз на класс и согласован: счётчики тегов верны;
+# Страницы автора с сотнями заметок укладываются в бюджет запросов;
+# Фикстура generate_fixtures загружается loaddata и совпадает с набором;
+# Один seed даёт одни и те же данные.
+
+import io
+import os
+import tempfile
+from http import HTTPStatus
+
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from notes.benchmarks import build_dataset, load_dataset
+from notes.models import Note, NoteTag, Tag
+from notes.tests.fixture import BaseTestFixture
+
+
+class TestDataset(BaseTestFixture):
+    USERS = 3
+    NOTES = 300
+    TAGS = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.dataset = build_dataset(cls.USERS, cls.NOTES, cls.TAGS)
+        load_dataset(cls.dataset)
+        cls.perf_author = next(iter(cls.dataset.values()))[0]
+        cls.perf_client = Client()
+        cls.perf_client.force_login(cls.perf_author)
+
+    def test_dataset_consistent(self):
+        """Заметки загружены, счётчики тегов совпадают со связями->"""
+        self.assertEqual(
+            Note.objects.filter(slug__startswith='perf-').count(),
+            self.USERS * self.NOTES)
+        counts = dict(
+            NoteTag.objects.values_list('tag').annotate(Count('id')))
+        for tag in Tag.objects.filter(author=self.perf_author):
+            self.assertEqual(tag.note_count, counts.get(tag.pk, 0))
+
+    def test_pages_within_budget(self):
+        """Список, фильтр по тегу и заметка укладываются в бюджет->"""
+        note = self.dataset[Note][self.NOTES - 1]
+        tag = self.dataset[Tag][0]
+        for url in (
+            reverse('notes:list'),
+            reverse('notes:list') + f'?tag={tag.slug}',
+            reverse('notes:detail', args=(note.slug,)),
+        ):
+            with self.subTest(url=url):
+                response = self.perf_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_fixture_loads(self):
+        """Фикстура generate_fixtures загружается loaddata->"""
+        first_pk = 2_000_000
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'perf.json.gz')
+            call_command(
+                'generate_fixtures', path, '--users=2', '--notes=20',
+                '--tags=5', f'--first-pk={first_pk}', stdout=io.StringIO())
+            call_command('loaddata', path, verbosity=0)
+        dataset = build_dataset(2, 20, 5, first_pk=first_pk)
+        loaded = Note.objects.filter(pk__gte=first_pk).order_by('pk')
+        self.assertEqual(
+            list(loaded.values_list('slug', 'title', 'text')),
+            [(note.slug, note.title, note.text) for note in dataset[Note]])
+        self.assertEqual(
+            NoteTag.objects.filter(pk__gte=first_pk).count(),
+            len(dataset[NoteTag]))
+
+    def test_same_seed_same_data(self):
+        """Один seed даёт одинаковые данные, другой — другие->"""
+        def texts(seed):
+            return [note.text for note in build_dataset(1, 20, seed=seed)[
+                Note]]
+        self.assertEqual(texts(1), texts(1))
+        self.assertNotEqual(texts(1), texts(2))
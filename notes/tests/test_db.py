@@ -0,0 +1,35 @@
+# Настройка соединения с БД:
+# К новым соединениям с SQLite применяются PRAGMA из настроек;
+# Транзакция сразу берёт блокировку записи (BEGIN IMMEDIATE).
+
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Только для SQLite.')
+class TestSqlitePragmas(SimpleTestCase):
+    databases = {'default'}
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied(self):
+        """Соединение настроено по SQLITE_PRAGMAS->"""
+        pragmas = settings.SQLITE_PRAGMAS
+        self.assertEqual(self.pragma('busy_timeout'), pragmas['busy_timeout'])
+        self.assertEqual(self.pragma('cache_size'), pragmas['cache_size'])
+        # synchronous=NORMAL хранится как 1.
+        self.assertEqual(self.pragma('synchronous'), 1)
+
+    def test_begin_immediate(self):
+        """Транзакция начинается с BEGIN IMMEDIATE->"""
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                pass
+        self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
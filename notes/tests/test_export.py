@@ -0,0 +1,51 @@
+# Выгрузка заметок:
+# Пользователь выгружает только свои заметки в NDJSON и CSV;
+# Ответ отдаётся потоком;
+# Неизвестный формат даёт 404.
+
+import csv
+import io
+import json
+from http import HTTPStatus
+
+from django.urls import reverse
+
+from notes.models import Note
+from notes.tests.fixture import BaseTestFixture
+
+
+class TestExport(BaseTestFixture):
+
+    def export(self, export_format):
+        response = self.author_client.get(
+            reverse('notes:export', args=(export_format,)))
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_export(self):
+        """Выгрузка NDJSON содержит все заметки автора пачками->"""
+        Note.objects.bulk_create(
+            Note(title=self.TITLE, text=self.TEXT,
+                 slug=f'export-{number}', author=self.author)
+            for number in range(2500)
+        )
+        lines = self.export('ndjson').splitlines()
+        self.assertEqual(len(lines), 2501)
+        first = json.loads(lines[0])
+        self.assertEqual(first['slug'], self.note.slug)
+        self.assertEqual(first['text'], self.TEXT)
+        ids = [json.loads(line)['id'] for line in lines]
+        self.assertEqual(ids, sorted(set(ids)))
+
+    def test_csv_export(self):
+        """Выгрузка CSV содержит заголовок и только свои заметки->"""
+        rows = list(csv.reader(io.StringIO(self.export('csv'))))
+        self.assertEqual(rows[0][:4], ['id', 'slug', 'title', 'text'])
+        self.assertEqual(rows[1][1:4], [self.note.slug, self.TITLE, self.TEXT])
+        self.assertEqual(len(rows), 2)
+
+    def test_unknown_format(self):
+        """Неизвестный формат выгрузки даёт 404->"""
+        response = self.author_client.get(
+            reverse('notes:export', args=('xml',)))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -0,0 +1,99 @@
+# Кэш горячих заметок:
+# Повторный просмотр, правка и удаление не читают заметку из БД;
+# Запись заметки делает закэшированную копию устаревшей;
+# Вытеснение по размеру (LRU) и по времени жизни, счётчики и доля попаданий;
+# Кэш отдаёт копии и работает из нескольких потоков.
+
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from django.urls import reverse
+
+from notes.cache import invalidate_author
+from notes.hot import HotNoteCache, hot_notes
+from notes.models import Note
+from notes.tests.fixture import BaseTestFixture
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHotNotes(BaseTestFixture):
+
+    def make_note(self, number):
+        return Note(pk=number, title=f'Заметка {number}', text=self.TEXT,
+                    slug=f'hot-{number}', author=self.author)
+
+    def test_pages_skip_note_query(self):
+        """Повторные страницы заметки берут её из кэша->"""
+        for name in (self.DETAILS_URL, self.EDITS_URL, self.DELETES_URL):
+            with self.subTest(name=name):
+                url = reverse(name, args=(self.note.slug,))
+                self.author_client.get(url)
+                hits = hot_notes.summary()['hits']
+                response = self.author_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertEqual(hot_notes.summary()['hits'], hits + 1)
+        self.assertEqual(hot_notes.summary()['size'], 1)
+
+    def test_write_makes_copy_stale(self):
+        """После правки страница показывает новый текст->"""
+        url = reverse(self.DETAILS_URL, args=(self.note.slug,))
+        edit_url = reverse(self.EDITS_URL, args=(self.note.slug,))
+        self.author_client.get(url)
+        self.author_client.post(edit_url, {
+            'title': self.TITLE, 'text': self.NEW_TEXT,
+            'slug': self.note.slug, 'version': self.note.version})
+        self.assertContains(self.author_client.get(url), self.NEW_TEXT)
+        self.assertEqual(hot_notes.summary()['stale'], 1)
+
+    def test_lru_and_ttl_eviction(self):
+        """Давние заметки вытесняются, просроченные не отдаются->"""
+        clock = Clock()
+        notes = HotNoteCache(size=2, ttl=10, clock=clock)
+        for number in (1, 2):
+            notes.put(self.make_note(number))
+        self.assertIsNotNone(notes.get(self.author.pk, 'hot-1'))
+        notes.put(self.make_note(3))
+        self.assertIsNone(notes.get(self.author.pk, 'hot-2'))
+        clock.now = 10
+        self.assertIsNone(notes.get(self.author.pk, 'hot-3'))
+        self.assertEqual(notes.summary(), {
+            'hits': 1, 'misses': 2, 'evictions': 1, 'expired': 1,
+            'stale': 0, 'size': 1, 'hit_rate': 1 / 3,
+        })
+
+    def test_generation_and_copies(self):
+        """Смена поколения автора устаревает копии, копии независимы->"""
+        notes = HotNoteCache(size=10, ttl=60)
+        notes.put(self.make_note(1))
+        note = notes.get(self.author.pk, 'hot-1')
+        note.text = 'Изменено в view'
+        self.assertEqual(notes.get(self.author.pk, 'hot-1').text, self.TEXT)
+        invalidate_author(self.author.pk)
+        self.assertIsNone(notes.get(self.author.pk, 'hot-1'))
+        self.assertEqual(notes.summary()['stale'], 1)
+
+    def test_threads(self):
+        """Параллельные чтения и записи не превышают размер кэша->"""
+        notes = HotNoteCache(size=50, ttl=60)
+        generation = 1
+
+        def work(worker):
+            for number in range(500):
+                key = (worker * 7 + number) % 200
+                if notes.get(self.author.pk, f'hot-{key}',
+                             generation) is None:
+                    notes.put(self.make_note(key), generation)
+
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(work, range(8)))
+        summary = notes.summary()
+        self.assertEqual(summary['size'], 50)
+        self.assertEqual(summary['hits'] + summary['misses'], 8 * 500)
@@ -0,0 +1,151 @@
+# Загрузка заметок:
+# Заметки загружаются из NDJSON и CSV пачками;
+# Строки с ошибками и занятыми slug пропускаются с отчётом;
+# Битая кодировка и ошибка CSV не прерывают загрузку;
+# Slug, занятый между подбором и вставкой, подбирается заново;
+# Выгрузка загружается обратно без потерь;
+# Загрузка доступна через страницу (фоновой задачей) и команду manage.py.
+
+import csv
+import io
+import json
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+
+from notes import importer
+from notes.importer import import_notes
+from notes.models import Note, Task
+from notes.tests.fixture import BaseTestFixture
+
+
+class TestImport(BaseTestFixture):
+    IMPORT_URL = reverse('notes:import')
+
+    def test_ndjson_import_in_batches(self):
+        """NDJSON загружается пачками, slug подбираются сами->"""
+        lines = io.StringIO(''.join(
+            json.dumps({'title': 'Импорт', 'text': f'Текст {number}'}) + '\n'
+            for number in range(25)
+        ))
+        progress = []
+        report = import_notes(
+            self.author, lines, 'ndjson', batch_size=10,
+            progress=lambda report: progress.append(report.created),
+        )
+        self.assertEqual(report.created, 25)
+        self.assertEqual(progress, [10, 20, 25])
+        slugs = Note.objects.filter(title='Импорт').values_list(
+            'slug', flat=True)
+        self.assertEqual(len(set(slugs)), 25)
+
+    def test_invalid_rows_reported(self):
+        """Ошибочные строки пропускаются и попадают в отчёт->"""
+        lines = io.StringIO(
+            'title,text,slug\n'
+            f'Первая,Текст,{self.note_1.slug}\n'
+            'Вторая,,\n'
+            'Третья,Текст,tret\n'
+            'Четвёртая,Текст,tret\n'
+        )
+        report = import_notes(self.author, lines, 'csv')
+        self.assertEqual(report.created, 1)
+        self.assertEqual(
+            sorted(line for line, _ in report.errors), [2, 3, 5])
+        self.assertTrue(Note.objects.filter(slug='tret').exists())
+
+    def test_broken_lines_reported(self):
+        """Строка не в UTF-8 или с ошибкой CSV попадает в отчёт->"""
+        with tempfile.NamedTemporaryFile(suffix='.csv') as file:
+            file.write(
+                'title,text\nПервая,Текст\n'.encode()
+                + b'\xff\xfe,bad\n'
+                + f'Третья,{"x" * 100}\nЧетвёртая,Текст\n'.encode()
+            )
+            file.flush()
+            limit = csv.field_size_limit(50)
+            try:
+                stderr = io.StringIO()
+                call_command(
+                    'import_notes', self.reader.username, file.name,
+                    stdout=io.StringIO(), stderr=stderr)
+            finally:
+                csv.field_size_limit(limit)
+        self.assertIn('Строка 3: Строка не в кодировке UTF-8.',
+                      stderr.getvalue())
+        self.assertIn('Строка 4: Ошибка CSV', stderr.getvalue())
+        self.assertEqual(
+            set(Note.objects.filter(author=self.reader)
+                .values_list('title', flat=True)),
+            {'Первая', 'Четвёртая'},
+        )
+
+    def test_slug_taken_during_insert(self):
+        """Slug, занятый другим запросом перед вставкой, меняется->"""
+        allocate_slugs = importer.allocate_slugs
+
+        def take_slug_once(*args):
+            conflicts = allocate_slugs(*args)
+            if not Note.objects.filter(slug='gonka').exists():
+                Note.objects.create(
+                    title='Гонка', text=self.TEXT, author=self.author_1)
+            return conflicts
+
+        lines = io.StringIO(
+            json.dumps({'title': 'Гонка', 'text': 'Текст'}) + '\n')
+        with mock.patch.object(
+                importer, 'allocate_slugs', side_effect=take_slug_once):
+            report = importer.import_notes(self.author, lines, 'ndjson')
+        self.assertEqual((report.created, report.failed), (1, 0))
+        self.assertEqual(
+            Note.objects.get(author=self.author, title='Гонка').slug,
+            'gonka-2',
+        )
+
+    def test_export_round_trip(self):
+        """Выгрузка другого пользователя загружается обратно->"""
+        response = self.author_client.get(
+            reverse('notes:export', args=('ndjson',)))
+        exported = b''.join(response.streaming_content).decode()
+        self.note.delete()
+        report = import_notes(
+            self.author_1, io.StringIO(exported), 'ndjson')
+        self.assertEqual(report.created, 1)
+        imported = Note.objects.get(slug=self.note.slug)
+        self.assertEqual(imported.author, self.author_1)
+        self.assertEqual(imported.text, self.TEXT)
+
+    def test_upload_page(self):
+        """Файл со страницы загружается фоновой задачей->"""
+        upload = SimpleUploadedFile(
+            'notes.ndjson',
+            json.dumps({'title': 'Из файла', 'text': 'Текст'}).encode())
+        response = self.author_client.post(
+            self.IMPORT_URL, {'file': upload, 'import_format': 'ndjson'})
+        task = Task.objects.get(owner=self.author)
+        self.assertRedirects(
+            response, reverse('notes:task', args=(task.pk,)))
+        call_command(
+            'run_worker', '--once', '--processes', '0',
+            stdout=io.StringIO(),
+        )
+        response = self.author_client.get(response.url)
+        self.assertEqual(response.context['task'].result['created'], 1)
+        self.assertTrue(
+            Note.objects.filter(title='Из файла', author=self.author).exists())
+
+    def test_management_command(self):
+        """Команда import_notes загружает файл пользователю->"""
+        with tempfile.NamedTemporaryFile(
+                'w', suffix='.csv', encoding='utf-8') as file:
+            file.write('title,text\nИз команды,Текст\n')
+            file.flush()
+            call_command(
+                'import_notes', self.reader.username, file.name,
+                stdout=io.StringIO())
+        self.assertTrue(
+            Note.objects.filter(title='Из команды', author=self.reader)
+            .exists())
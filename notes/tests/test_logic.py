@@ -1,13 +1,16 @@
 # В файле test_logic.py:
 # Залогиненный пользователь может создать заметку, а анонимный — не может. ++
-# Невозможно создать две заметки с одинаковым slug.
+# Невозможно создать две заметки с одинаковым slug;
+# другая ошибка БД не выдаётся за занятый slug.
 # Если при создании заметки не заполнен slug, то он формируется автоматически, +
 # с помощью функции pytils.translit.slugify.
 # Пользователь может редактировать и удалять свои заметки, ++
 # но не может редактировать или удалять чужие. ++
 
 from http import HTTPStatus
+from unittest import mock
 
+from django.db import IntegrityError
 from django.urls import reverse
 from pytils.translit import slugify
 
@@ -89,3 +92,10 @@ class TestNotesCreation(BaseTestFixture):
         response = self.author_client.post(self.ADD_URL, data=newdata)
         self.assertFormError(
             response, 'form', 'slug', errors=(newdata['slug'] + WARNING))
+
+    def test_other_integrity_error_not_slug(self):
+        """Ошибка другого ограничения БД не выдаётся за занятый slug->"""
+        error = IntegrityError('CHECK constraint failed: version')
+        with mock.patch.object(Note, 'save', side_effect=error):
+            with self.assertRaises(IntegrityError):
+                self.author_client.post(self.ADD_URL, data=self.data)
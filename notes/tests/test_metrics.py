@@ -0,0 +1,58 @@
+# Замеры запросов:
+# Для каждого запроса копятся число SQL-запросов и времена по имени URL;
+# Превышение бюджета запросов роняет тест;
+# Сводка с перцентилями доступна только персоналу.
+
+from http import HTTPStatus
+
+from django.test import override_settings
+from django.urls import reverse
+
+from notes.metrics import QueryBudgetExceeded, percentiles, registry
+from notes.tests.fixture import BaseTestFixture
+
+
+class TestMetrics(BaseTestFixture):
+    METRICS_URL = reverse('notes:metrics')
+
+    def setUp(self):
+        super().setUp()
+        registry.clear()
+
+    def test_samples_recorded_by_url_name(self):
+        """Замеры копятся по имени URL->"""
+        self.author_client.get(self.LIST_URL)
+        self.author_client.get(self.LIST_URL)
+        summary = registry.summary()['notes:list']
+        self.assertEqual(summary['count'], 2)
+        # Повторный список целиком из кэша, запросы — у первого.
+        self.assertGreaterEqual(summary['queries']['p99'], 1)
+        self.assertGreater(summary['render_ms']['p99'], 0)
+        self.assertGreaterEqual(
+            summary['total_ms']['p50'], summary['db_ms']['p50'])
+
+    def test_budget_exceeded(self):
+        """Превышение бюджета запросов даёт исключение->"""
+        with override_settings(NOTES_QUERY_BUDGETS={'notes:list': 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.author_client.get(self.LIST_URL)
+
+    def test_metrics_page_for_staff_only(self):
+        """Сводка замеров доступна только персоналу->"""
+        response = self.author_client.get(self.METRICS_URL)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.author.is_staff = True
+        self.author.save()
+        self.author_client.get(self.LIST_URL)
+        response = self.author_client.get(self.METRICS_URL)
+        self.assertIn('notes:list', response.json()['views'])
+        self.assertIn('hit_rate', response.json()['hot_notes'])
+
+    def test_percentiles(self):
+        """Перцентили считаются по ближайшему рангу->"""
+        self.assertEqual(
+            percentiles(list(range(1, 101))),
+            {'p50': 50, 'p95': 95, 'p99': 99},
+        )
+        self.assertEqual(
+            percentiles([7]), {'p50': 7, 'p95': 7, 'p99': 7})
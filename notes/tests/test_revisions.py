@@ -0,0 +1,132 @@
+# История правок:
+# Дельта собирает прежний текст из нового;
+# Правка заметки сохраняет прежнюю версию, текущая остаётся в Note.text;
+# Любая версия восстанавливается и через снимки, и через дельты;
+# Небольшая правка большой заметки занимает мало места;
+# История и возврат версии доступны только автору;
+# Возврат версии и пакетная правка через API попадают в историю.
+
+import json
+import random
+import string
+from http import HTTPStatus
+
+from django.urls import reverse
+
+from notes.models import Note, NoteRevision
+from notes.revisions import SNAPSHOT_EVERY, apply_delta, make_delta
+from notes.tests.fixture import BaseTestFixture
+
+
+class TestRevisions(BaseTestFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.edit_url = reverse(self.EDITS_URL, args=(self.note.slug,))
+        self.history_url = reverse('notes:history', args=(self.note.slug,))
+        self.restore_url = reverse(
+            'notes:restore', args=(self.note.slug, 1)
+        )
+
+    def test_delta_round_trip(self):
+        """Дельта собирает прежний текст из нового->"""
+        cases = (
+            ('', 'новый'),
+            ('первая\nвторая\nтретья', 'первая\nтретья\nчетвёртая'),
+            ('строка без перевода', 'строка без перевода\n'),
+            ('a\nb\nc\n', ''),
+        )
+        for old, new in cases:
+            with self.subTest(old=old, new=new):
+                self.assertEqual(apply_delta(new, make_delta(new, old)), old)
+
+    def test_edit_keeps_previous_version(self):
+        """Правка сохраняет прежнюю версию заметки->"""
+        self.author_client.post(
+            self.edit_url, {**self.data, 'slug': self.note.slug})
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.text, self.data['text'])
+        revision = self.note.revisions.get()
+        self.assertEqual(revision.number, 1)
+        self.assertEqual(self.note.get_version(1), (self.TITLE, self.TEXT))
+
+    def test_versions_restored(self):
+        """Все версии восстанавливаются через снимки и дельты->"""
+        note = Note.objects.get(pk=self.note.pk)
+        texts = [note.text]
+        for number in range(1, SNAPSHOT_EVERY * 2 + 5):
+            note.text = '\n'.join(
+                f'строка {line}' for line in range(number % 7, number + 3)
+            )
+            note.save()
+            texts.append(note.text)
+        self.assertTrue(
+            note.revisions.get(number=SNAPSHOT_EVERY).is_snapshot)
+        for number, text in enumerate(texts[:-1], start=1):
+            with self.subTest(number=number):
+                self.assertEqual(note.get_version(number)[1], text)
+        with self.assertRaises(NoteRevision.DoesNotExist):
+            note.get_version(len(texts))
+
+    def test_small_edit_is_small(self):
+        """Небольшая правка большой заметки занимает мало места->"""
+        lines = [
+            ''.join(random.choices(string.ascii_letters, k=80))
+            for _ in range(1000)
+        ]
+        note = Note.objects.get(pk=self.note.pk)
+        note.text = '\n'.join(lines)
+        note.save()
+        note.text += '\nещё одна строка'
+        note.save()
+        revision = note.revisions.get(number=2)
+        self.assertFalse(revision.is_snapshot)
+        self.assertLess(len(revision.data), 200)
+
+    def test_unchanged_text_not_recorded(self):
+        """Сохранение без изменений не создаёт версию->"""
+        note = Note.objects.get(pk=self.note.pk)
+        note.save()
+        note.slug = 'novyi-adres'
+        note.save(update_fields=('slug',))
+        self.assertFalse(note.revisions.exists())
+
+    def test_foreign_history_not_found(self):
+        """Чужая история недоступна->"""
+        self.note.text = self.NEW_TEXT
+        self.note.save()
+        for url in (self.history_url, self.restore_url):
+            with self.subTest(url=url):
+                response = self.auth_client_1.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.auth_client_1.post(self.restore_url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_history_and_restore(self):
+        """Автор видит историю и возвращает прежнюю версию->"""
+        self.note.text = self.NEW_TEXT
+        self.note.save()
+        response = self.author_client.get(self.history_url)
+        self.assertEqual(len(response.context['revisions']), 1)
+        response = self.author_client.get(self.restore_url)
+        self.assertEqual(response.context['text'], self.TEXT)
+        response = self.author_client.post(self.restore_url)
+        self.assertRedirects(response, self.SUCCESS_URL)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.text, self.TEXT)
+        self.assertEqual(self.note.get_version(2)[1], self.NEW_TEXT)
+        response = self.author_client.get(
+            reverse('notes:restore', args=(self.note.slug, 3)))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_api_update_recorded(self):
+        """Пакетная правка через API попадает в историю->"""
+        self.author_client.post(
+            reverse('notes:api_batch'),
+            json.dumps({'update': [
+                {'slug': self.note.slug, 'text': self.NEW_TEXT}
+            ]}),
+            content_type='application/json',
+        )
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.get_version(1)[1], self.TEXT)
@@ -0,0 +1,65 @@
+# Полнотекстовый поиск:
+# Находит заметки по словам из заголовка и текста, в том числе кириллицей;
+# Не показывает заметки других пользователей;
+# Индекс обновляется при изменении и удалении заметки.
+
+from notes.models import Note
+from notes.tests.fixture import BaseTestFixture
+from django.urls import reverse
+
+
+class TestSearch(BaseTestFixture):
+    SEARCH_URL = reverse('notes:search')
+
+    def search(self, query, client=None):
+        client = client or self.author_client
+        response = client.get(self.SEARCH_URL, {'q': query})
+        return list(response.context['object_list'])
+
+    def test_search_by_title_and_text(self):
+        """Заметка находится по словам заголовка и текста->"""
+        self.assertEqual(self.search('НАЗВАНИЕ'), [self.note])
+        self.assertEqual(self.search('текст заметки'), [self.note])
+        self.assertEqual(self.search('отсутствует'), [])
+
+    def test_search_by_word_prefix(self):
+        """Заметка находится по началу слова->"""
+        self.assertEqual(self.search('тестов'), [self.note])
+
+    def test_search_only_own_notes(self):
+        """Поиск не находит чужие заметки->"""
+        self.assertEqual(self.search('тестовый', self.reader_client), [])
+
+    def test_search_ranking(self):
+        """Более релевантная заметка выводится первой->"""
+        best = Note.objects.create(
+            title='Ёлка', text='ёлка ёлка ёлка', slug='best',
+            author=self.author)
+        Note.objects.create(
+            title='Праздник', text='купить ёлку и игрушки, ёлка',
+            slug='other', author=self.author)
+        self.assertEqual(self.search('ёлка')[0], best)
+
+    def test_index_follows_updates_and_deletes(self):
+        """Индекс обновляется при изменении и удалении заметки->"""
+        self.note.text = 'Совершенно другое содержание'
+        self.note.save()
+        self.assertEqual(self.search('содержание'), [self.note])
+        self.assertEqual(self.search('текст'), [])
+        self.note.delete()
+        self.assertEqual(self.search('содержание'), [])
+
+    def test_search_paginated(self):
+        """Результаты поиска выводятся постранично->"""
+        Note.objects.bulk_create(
+            Note(title='Список', text='покупки', slug=f'list-{number}',
+                 author=self.author)
+            for number in range(25)
+        )
+        response = self.author_client.get(self.SEARCH_URL, {'q': 'покупки'})
+        self.assertEqual(len(response.context['object_list']), 20)
+        self.assertEqual(response.context['next_page'], 2)
+        response = self.author_client.get(
+            self.SEARCH_URL, {'q': 'покупки', 'page': 2})
+        self.assertEqual(len(response.context['object_list']), 5)
+        self.assertNotIn('next_page', response.context)
@@ -0,0 +1,73 @@
+# Сессии и пользователи из кэша:
+# Повторный запрос не читает django_session и auth_user;
+# Сессия пишется и в БД: без кэша пользователь остаётся в системе;
+# Выход, отключение и смена пароля сразу действуют на старую сессию.
+
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from notes.auth import user_cache
+from notes.tests.fixture import BaseTestFixture, User
+
+
+class TestCachedSessions(BaseTestFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='session_user')
+        self.client.force_login(self.user)
+        self.session_key = self.client.cookies[
+            settings.SESSION_COOKIE_NAME].value
+
+    def old_session_client(self):
+        client = Client()
+        client.cookies[settings.SESSION_COOKIE_NAME] = self.session_key
+        return client
+
+    def assert_signed_out(self, client):
+        response = client.get(self.LIST_URL)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertTrue(response.url.startswith(self.LOGIN_URL))
+
+    def test_no_session_and_user_queries(self):
+        """Повторный запрос не читает сессию и пользователя из БД->"""
+        self.client.get(self.LIST_URL)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.LIST_URL)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        tables = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('django_session', tables)
+        self.assertNotIn('auth_user', tables)
+
+    def test_session_written_through(self):
+        """Сессия есть в БД: после очистки кэша вход сохраняется->"""
+        self.assertTrue(
+            Session.objects.filter(session_key=self.session_key).exists())
+        user_cache().clear()
+        response = self.client.get(self.LIST_URL)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_logout_invalidates_session(self):
+        """После выхода старая сессия не действует->"""
+        self.client.get(self.LIST_URL)
+        self.client.get(self.LOGOUT_URL)
+        self.assertFalse(
+            Session.objects.filter(session_key=self.session_key).exists())
+        self.assert_signed_out(self.old_session_client())
+
+    def test_user_changes_applied(self):
+        """Отключённый пользователь и смена пароля выводят из системы->"""
+        self.client.get(self.LIST_URL)
+        self.user.set_password('новый-пароль')
+        self.user.save()
+        self.assert_signed_out(self.old_session_client())
+        self.client.force_login(self.user)
+        self.client.get(self.LIST_URL)
+        self.user.is_active = False
+        self.user.save()
+        self.assert_signed_out(self.client)
@@ -0,0 +1,84 @@
+# Выдача slug:
+# Повторяющиеся заголовки получают slug с числовым суффиксом;
+# Форма не делает отдельного запроса для проверки уникальности slug;
+# Параллельные создания заметок через форму с одинаковым заголовком
+# не дают ответов 5xx и получают разные slug.
+
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.benchmarks import login_clients, retry_locked
+from notes.models import Note
+from notes.slugs import cached_slugify
+from notes.tests.fixture import BaseTestFixture
+
+User = get_user_model()
+
+
+class TestSlugAllocation(BaseTestFixture):
+
+    def test_duplicate_titles_get_suffix(self):
+        """Заметки с одинаковым заголовком получают разные slug->"""
+        slugs = [
+            Note.objects.create(
+                title='Список дел', text=self.TEXT, author=self.author
+            ).slug
+            for _ in range(3)
+        ]
+        self.assertEqual(
+            slugs, ['spisok-del', 'spisok-del-2', 'spisok-del-3'])
+
+    def test_create_makes_no_uniqueness_probe(self):
+        """Создание заметки через форму не проверяет slug отдельным SELECT->"""
+        with CaptureQueriesContext(connection) as queries:
+            self.author_client.post(self.ADD_URL, data=self.data)
+        self.assertFalse(any(
+            'notes_note' in query['sql'] and query['sql'].startswith('SELECT')
+            for query in queries
+        ))
+
+    def test_slugify_is_cached(self):
+        """Результат транслитерации берётся из кэша->"""
+        cached_slugify.cache_clear()
+        cached_slugify(self.TITLE)
+        cached_slugify(self.TITLE)
+        self.assertEqual(cached_slugify.cache_info().hits, 1)
+
+
+class TestConcurrentSlugAllocation(TransactionTestCase):
+    WORKERS = 8
+    NOTES_PER_WORKER = 5
+
+    def test_parallel_creates_with_same_title(self):
+        """Параллельные создания через форму с одним заголовком без 5xx->"""
+        author = User.objects.create(username='parallel_author')
+        clients = login_clients(author, self.WORKERS)
+        url = reverse('notes:add')
+        data = {'title': 'Одинаковый заголовок', 'text': 'Текст'}
+
+        def create_notes(client):
+            # Повтор нужен только тестовой БД SQLite в памяти: она
+            # блокирует таблицу целиком и не ждёт (см. retry_locked).
+            try:
+                return [
+                    retry_locked(client.post, url, data).status_code
+                    for _ in range(self.NOTES_PER_WORKER)
+                ]
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.WORKERS) as executor:
+            results = list(executor.map(create_notes, clients))
+        statuses = [status for worker in results for status in worker]
+        total = self.WORKERS * self.NOTES_PER_WORKER
+        self.assertEqual(statuses, [HTTPStatus.FOUND] * total)
+        slugs = Note.objects.filter(author=author).values_list(
+            'slug', flat=True)
+        self.assertEqual(len(slugs), total)
+        self.assertEqual(len(set(slugs)), total)
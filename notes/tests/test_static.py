@@ -0,0 +1,135 @@
+# Статика без CDN:
+# Страницы подключают CSS со своего сервера по имени с хэшем;
+# collectstatic сохраняет рядом сжатые копии gzip и brotli;
+# Браузер получает подходящую копию, файл с хэшем кэшируется на год;
+# У каждой сжатой копии свой ETag, совпавший ETag даёт 304;
+# Чужие пути и POST идут дальше в приложение;
+# До collectstatic страницы работают, статика берётся из исходников.
+
+import os
+import re
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from notes.static import IMMUTABLE, MUTABLE, brotli
+
+CSS = 'vendor/bootstrap/css/bootstrap.min.css'
+
+
+class TestStaticFiles(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.settings = override_settings(
+            STATIC_ROOT=cls.static_root,
+            STATICFILES_STORAGE=(
+                'notes.static.CompressedManifestStaticFilesStorage'),
+        )
+        cls.settings.enable()
+        call_command(
+            'collectstatic', interactive=False, verbosity=0,
+            ignore_patterns=['admin'])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.static_root)
+        super().tearDownClass()
+
+    def css_url(self):
+        content = self.client.get(reverse('notes:home')).content.decode()
+        self.assertNotIn('cdn.jsdelivr.net', content)
+        return re.search(r'href="(/static/[^"]+\.css)"', content).group(1)
+
+    def test_page_links_hashed_css(self):
+        """Страница подключает CSS со своего сервера с хэшем в имени->"""
+        self.assertRegex(
+            self.css_url(),
+            r'^/static/vendor/bootstrap/css/bootstrap\.min\.\w{12}\.css$')
+
+    def test_compressed_copies_saved(self):
+        """Рядом с CSS лежат сжатые копии меньше исходника->"""
+        path = os.path.join(self.static_root, CSS)
+        suffixes = ['.gz'] + (['.br'] if brotli else [])
+        for suffix in suffixes:
+            with self.subTest(suffix=suffix):
+                self.assertLess(
+                    os.path.getsize(path + suffix), os.path.getsize(path))
+
+    def test_encoding_negotiated(self):
+        """Браузер получает сжатую копию, которую понимает->"""
+        url = self.css_url()
+        cases = [('gzip, deflate', 'gzip'), ('', None), ('gzip;q=0', None)]
+        if brotli:
+            cases.append(('gzip, deflate, br', 'br'))
+        for accept, encoding in cases:
+            with self.subTest(accept=accept):
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING=accept)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertEqual(response.get('Content-Encoding'), encoding)
+                self.assertEqual(response['Content-Type'], 'text/css')
+                self.assertEqual(response['Cache-Control'], IMMUTABLE)
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+                response.close()
+
+    def test_etag_per_encoding(self):
+        """У каждой сжатой копии свой ETag->"""
+        url = self.css_url()
+        etags = set()
+        for accept in ('', 'gzip', 'br, gzip'):
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING=accept)
+            etags.add(response['ETag'])
+            response.close()
+        self.assertEqual(len(etags), 3 if brotli else 2)
+
+    def test_not_modified_and_unhashed(self):
+        """Совпавший ETag даёт 304, файл без хэша кэшируется ненадолго->"""
+        url = self.css_url()
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        response.close()
+        etag = response['ETag']
+        for if_none_match in (etag, f'W/{etag}', f'"other", {etag}', '*'):
+            with self.subTest(if_none_match=if_none_match):
+                response = self.client.get(
+                    url, HTTP_ACCEPT_ENCODING='gzip',
+                    HTTP_IF_NONE_MATCH=if_none_match)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        response.close()
+        response = self.client.get(f'/static/{CSS}')
+        self.assertEqual(response['Cache-Control'], MUTABLE)
+        response.close()
+
+    def test_other_requests_pass_through(self):
+        """Неизвестный файл и POST обрабатывает приложение->"""
+        response = self.client.get('/static/missing.css')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.client.post(self.css_url())
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class TestStaticBeforeCollect(SimpleTestCase):
+
+    def test_pages_work_without_collectstatic(self):
+        """До collectstatic страница открывается, CSS из исходников->"""
+        with tempfile.TemporaryDirectory() as static_root, override_settings(
+            STATIC_ROOT=static_root,
+            STATICFILES_STORAGE=(
+                'notes.static.CompressedManifestStaticFilesStorage'),
+        ):
+            response = self.client.get(reverse('notes:home'))
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            self.assertContains(response, f'href="/static/{CSS}"')
+            response = self.client.get(f'/static/{CSS}')
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            self.assertEqual(response['Cache-Control'], MUTABLE)
+            response.close()
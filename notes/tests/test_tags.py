@@ -0,0 +1,126 @@
+# Теги заметок:
+# Форма задаёт теги, повторы и регистр не создают лишних тегов;
+# Счётчики заметок у тегов меняются при правке и удалении заметок;
+# Список по нескольким тегам показывает заметки со всеми ними;
+# Отбор по тегам идёт по индексу, теги в списке не дают запросов на строку;
+# Теги у каждого автора свои.
+
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.models import Note, Tag
+from notes.tags import filter_by_tags, parse_tags, set_tags
+from notes.tests.fixture import BaseTestFixture
+
+
+class TestTags(BaseTestFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.edit_url = reverse(self.EDITS_URL, args=(self.note.slug,))
+
+    def counts(self, author=None):
+        return dict(
+            Tag.objects.filter(author=author or self.author)
+            .values_list('slug', 'note_count')
+        )
+
+    def add_note(self, number, tags):
+        note = Note.objects.create(
+            title=f'Заметка {number}', text=self.TEXT, author=self.author)
+        set_tags(note, parse_tags(tags))
+        return note
+
+    def test_form_sets_tags(self):
+        """Форма задаёт теги без повторов, счётчики пересчитываются->"""
+        self.author_client.post(self.ADD_URL, {
+            **self.data, 'tags': 'Работа, идеи,  работа ,'
+        })
+        self.assertEqual(self.counts(), {'rabota': 1, 'idei': 1})
+        self.author_client.post(self.edit_url, {
+            **self.data, 'slug': self.note.slug, 'tags': 'работа, дом'
+        })
+        self.assertEqual(
+            self.counts(), {'rabota': 2, 'idei': 1, 'dom': 1})
+        self.author_client.post(self.edit_url, {
+            **self.data, 'slug': self.note.slug, 'tags': 'дом'
+        })
+        self.assertEqual(
+            self.counts(), {'rabota': 1, 'idei': 1, 'dom': 1})
+        response = self.author_client.get(self.edit_url)
+        self.assertEqual(response.context['form']['tags'].value(), 'дом')
+
+    def test_bad_tags_rejected(self):
+        """Теги без букв и цифр и слишком длинные отклоняются->"""
+        for tags in ('++', 'ж' * 51, ', '.join(map(str, range(21)))):
+            with self.subTest(tags=tags):
+                response = self.author_client.post(
+                    self.ADD_URL, {**self.data, 'tags': tags})
+                self.assertTrue(response.context['form'].errors['tags'])
+        self.assertFalse(Tag.objects.exists())
+
+    def test_delete_updates_counts(self):
+        """Удаление заметок уменьшает счётчики их тегов->"""
+        set_tags(self.note, parse_tags('работа, дом'))
+        other = self.add_note(1, 'работа')
+        self.author_client.post(
+            reverse(self.DELETES_URL, args=(self.note.slug,)))
+        self.assertEqual(self.counts(), {'rabota': 1, 'dom': 0})
+        self.author_client.post(
+            reverse('notes:api_batch'),
+            json.dumps({'delete': [other.slug]}),
+            content_type='application/json',
+        )
+        self.assertEqual(self.counts(), {'rabota': 0, 'dom': 0})
+
+    def test_list_filtered_by_all_tags(self):
+        """Список по нескольким тегам показывает заметки со всеми ними->"""
+        both = self.add_note(1, 'работа, срочно')
+        self.add_note(2, 'работа')
+        self.add_note(3, 'срочно')
+        response = self.author_client.get(
+            self.LIST_URL, {'tag': ['rabota', 'srochno']})
+        self.assertEqual(list(response.context['object_list']), [both])
+        self.assertEqual(
+            response.context['selected_tags'], ['rabota', 'srochno'])
+        cloud = {
+            tag.slug: tag.note_count for tag in response.context['tag_cloud']
+        }
+        self.assertEqual(cloud, {'rabota': 2, 'srochno': 2})
+
+    def test_tag_filter_uses_index(self):
+        """Отбор по тегам идёт по индексу (author, tag, note)->"""
+        notes = filter_by_tags(
+            Note.objects.filter(author=self.author), self.author, ['rabota'])
+        with connection.cursor() as cursor:
+            sql, params = notes.query.sql_with_params()
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('note_tag_author_tag_idx', plan)
+
+    def test_list_queries_do_not_grow(self):
+        """Теги в списке не добавляют запросов на каждую заметку->"""
+        self.add_note(1, 'работа, дом')
+
+        def count_queries():
+            self.client.cookies.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.author_client.get(self.LIST_URL, {'after': 0})
+            return len(queries)
+
+        few = count_queries()
+        for number in range(2, 12):
+            self.add_note(number, f'работа, тег {number}')
+        self.assertEqual(count_queries(), few)
+
+    def test_tags_are_per_author(self):
+        """Теги одного автора не видны другому->"""
+        set_tags(self.note, parse_tags('работа'))
+        set_tags(self.note_1, parse_tags('работа'))
+        self.assertEqual(self.counts(), {'rabota': 1})
+        self.assertEqual(self.counts(self.author_1), {'rabota': 1})
+        response = self.auth_client_1.get(self.LIST_URL, {'tag': 'rabota'})
+        self.assertEqual(list(response.context['object_list']), [self.note_1])
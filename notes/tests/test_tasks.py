@@ -0,0 +1,185 @@
+# Фоновые задачи:
+# Задача с тем же ключом идемпотентности не ставится второй раз,
+# пока первая не завершена;
+# Готовую задачу забирает только один обработчик;
+# Упавшая задача повторяется с паузой, затем помечается ошибочной;
+# Зависшие задачи возвращаются в очередь с учётом предела попыток;
+# Обработчик переживает падение пула процессов;
+# Страница задачи доступна только её владельцу, метрики считают очередь.
+
+import io
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from http import HTTPStatus
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from notes.models import Note, Task
+from notes.tasks import (
+    HANDLERS, claim_tasks, enqueue, execute, requeue_stale, task, task_stats
+)
+from notes.tests.fixture import BaseTestFixture
+
+calls = []
+
+
+class BrokenOncePool:
+    """Пул в этом же процессе, первый экземпляр которого сломан."""
+    created = []
+
+    def __init__(self, *args, **kwargs):
+        self.broken = not self.created
+        self.created.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, func, *args):
+        future = Future()
+        if self.broken:
+            future.set_exception(BrokenProcessPool('Процесс пула упал'))
+        else:
+            future.set_result(func(*args))
+        return future
+
+
+def flaky(fail_times):
+    calls.append(fail_times)
+    if len(calls) <= fail_times:
+        raise RuntimeError('Сбой')
+    return {'calls': len(calls)}
+
+
+@override_settings(NOTES_TASK_RETRY_DELAY=10)
+class TestTasks(BaseTestFixture):
+
+    def setUp(self):
+        super().setUp()
+        calls.clear()
+        patcher = mock.patch.dict(HANDLERS)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        task('tests.flaky', max_attempts=3)(flaky)
+
+    def test_idempotency_key(self):
+        """Повторная постановка с тем же ключом возвращает ту же задачу->"""
+        first = enqueue('tests.flaky', {'fail_times': 0}, key='один')
+        second = enqueue('tests.flaky', {'fail_times': 0}, key='один')
+        self.assertEqual(first, second)
+        self.assertNotEqual(enqueue('tests.flaky', {'fail_times': 0}), first)
+        self.assertEqual(Task.objects.count(), 2)
+        for status in (Task.DONE, Task.FAILED):
+            with self.subTest(status=status):
+                Task.objects.filter(key='один').update(status=status)
+                again = enqueue('tests.flaky', {'fail_times': 0}, key='один')
+                self.assertNotEqual(again, first)
+                first = again
+
+    def test_claimed_once(self):
+        """Задачу забирает только один обработчик->"""
+        for _ in range(3):
+            enqueue('tests.flaky', {'fail_times': 0})
+        first = claim_tasks('первый', 2)
+        second = claim_tasks('второй', 2)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse({t.pk for t in first} & {t.pk for t in second})
+        self.assertEqual(claim_tasks('третий', 2), [])
+
+    def test_retry_then_fail(self):
+        """Упавшая задача повторяется с паузой, потом получает ошибку->"""
+        retried = enqueue('tests.flaky', {'fail_times': 1})
+        self.assertEqual(execute(claim_tasks('w', 1)[0].pk), Task.QUEUED)
+        retried.refresh_from_db()
+        self.assertIn('RuntimeError', retried.error)
+        self.assertGreater(retried.run_at, timezone.now())
+        # Пока пауза не прошла, задачу не забирают.
+        self.assertEqual(claim_tasks('w', 1), [])
+        Task.objects.update(run_at=timezone.now())
+        self.assertEqual(execute(claim_tasks('w', 1)[0].pk), Task.DONE)
+        retried.refresh_from_db()
+        self.assertEqual(retried.result, {'calls': 2})
+        self.assertEqual(retried.attempts, 2)
+        failed = enqueue('tests.flaky', {'fail_times': 10})
+        for _ in range(3):
+            Task.objects.filter(pk=failed.pk).update(run_at=timezone.now())
+            status = execute(claim_tasks('w', 1)[0].pk)
+        self.assertEqual(status, Task.FAILED)
+
+    def test_stale_requeued(self):
+        """Задача пропавшего обработчика возвращается в очередь->"""
+        enqueue('tests.flaky', {'fail_times': 0})
+        claimed = claim_tasks('пропавший', 1)[0]
+        self.assertEqual(requeue_stale(timeout=60), 0)
+        Task.objects.filter(pk=claimed.pk).update(
+            started=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(requeue_stale(timeout=60), 1)
+        self.assertEqual(len(claim_tasks('новый', 1)), 1)
+        claimed.refresh_from_db()
+        self.assertEqual(claimed.attempts, 1)
+
+    def test_stale_single_attempt_failed(self):
+        """Зависшая задача без повторов не запускается снова->"""
+        single = enqueue('notes.import', {'path': '/нет/файла'})
+        claim_tasks('пропавший', 1)
+        Task.objects.filter(pk=single.pk).update(
+            started=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(requeue_stale(timeout=60), 0)
+        single.refresh_from_db()
+        self.assertEqual(
+            (single.status, single.attempts), (Task.FAILED, 1))
+        self.assertEqual(claim_tasks('новый', 1), [])
+
+    @override_settings(NOTES_TASK_RETRY_DELAY=0)
+    def test_worker_survives_broken_pool(self):
+        """Упавший пул пересоздаётся, его задачи повторяются->"""
+        tasks = [enqueue('tests.flaky', {'fail_times': 0}) for _ in range(2)]
+        BrokenOncePool.created.clear()
+        errors = io.StringIO()
+        with mock.patch(
+            'notes.management.commands.run_worker.ProcessPoolExecutor',
+            BrokenOncePool,
+        ):
+            call_command(
+                'run_worker', '--once', '--processes', '2',
+                stdout=io.StringIO(), stderr=errors)
+        self.assertEqual(len(BrokenOncePool.created), 2)
+        self.assertIn('Пул процессов упал', errors.getvalue())
+        for queued in tasks:
+            queued.refresh_from_db()
+            self.assertEqual(
+                (queued.status, queued.attempts), (Task.DONE, 2))
+
+    def test_worker_command_and_stats(self):
+        """Обработчик выполняет очередь, метрики считают задачи->"""
+        for _ in range(3):
+            enqueue('tests.flaky', {'fail_times': 0})
+        output = io.StringIO()
+        call_command(
+            'run_worker', '--once', '--processes', '0', stdout=output)
+        self.assertIn('Выполнено задач: 3', output.getvalue())
+        stats = task_stats()
+        self.assertEqual((stats['queued'], stats['done']), (0, 3))
+        self.assertEqual(
+            set(stats['queue_ms']), {'p50', 'p95', 'p99'})
+
+    def test_task_page_for_owner_only(self):
+        """Страница задачи доступна только владельцу->"""
+        purge = enqueue('notes.purge_trash', owner=self.author)
+        url = reverse('notes:task', args=(purge.pk,))
+        response = self.author_client.get(url)
+        self.assertContains(response, 'http-equiv="refresh"')
+        response = self.auth_client_1.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        execute(claim_tasks('w', 1)[0].pk)
+        response = self.author_client.get(url)
+        self.assertNotContains(response, 'http-equiv="refresh"')
+        self.assertTrue(Note.objects.filter(pk=self.note.pk).exists())
@@ -0,0 +1,76 @@
+# Отрисовка шаблонов:
+# Шаблоны разбираются один раз и берутся из кэшированного загрузчика;
+# Адреса заметок в списке строятся без reverse() на каждую строку;
+# Шапка страницы кэшируется для каждого пользователя отдельно.
+
+from unittest import mock
+
+from django.core.cache import cache
+from django.template import engines
+from django.template.loaders.cached import Loader
+from django.test import override_settings
+from django.urls import reverse
+
+from notes import links
+from notes.cache import user_fragment_key
+from notes.models import Note
+from notes.tests.fixture import BaseTestFixture
+
+
+class TestTemplates(BaseTestFixture):
+
+    def test_cached_loader(self):
+        """Шаблон разбирается один раз и дальше берётся из кэша->"""
+        engine = engines['django'].engine
+        self.assertIsInstance(engine.template_loaders[0], Loader)
+        self.assertIs(
+            engine.get_template('notes/list.html'),
+            engine.get_template('notes/list.html'),
+        )
+
+    def test_note_urls_without_reverse(self):
+        """Адреса заметок в списке строятся без reverse на строку->"""
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {number}', text=self.TEXT,
+                 slug=f'row-{number}', author=self.author)
+            for number in range(10)
+        )
+        links.url_template.cache_clear()
+        with mock.patch.object(
+            links, 'reverse', wraps=links.reverse
+        ) as reverse_mock:
+            response = self.author_client.get(self.LIST_URL)
+        self.assertEqual(reverse_mock.call_count, 1)
+        for note in Note.objects.filter(author=self.author):
+            with self.subTest(slug=note.slug):
+                url = reverse(self.DETAILS_URL, args=(note.slug,))
+                self.assertEqual(note.get_absolute_url(), url)
+                self.assertContains(response, f'href="{url}"')
+
+    @override_settings(ROOT_URLCONF='yanote.async_urls')
+    def test_note_url_follows_urlconf(self):
+        """Адрес заметки строится по подключённому набору адресов->"""
+        self.assertEqual(
+            self.note.get_absolute_url(),
+            reverse(self.DETAILS_URL, args=(self.note.slug,)),
+        )
+
+    def test_header_cached_per_user(self):
+        """Шапка кэшируется у каждого пользователя своя->"""
+        for user, client in ((self.author, self.author_client),
+                             (self.reader, self.reader_client)):
+            with self.subTest(user=user.username):
+                self.assertContains(client.get(self.HOME_URL), user.username)
+                self.assertIn(
+                    user.username,
+                    cache.get(user_fragment_key('header', user)),
+                )
+
+    def test_header_follows_username(self):
+        """После смены имени пользователя шапка строится заново->"""
+        self.author_client.get(self.HOME_URL)
+        self.author.username = 'renamed_author'
+        self.author.save()
+        response = self.author_client.get(self.HOME_URL)
+        self.assertContains(response, 'renamed_author')
+        self.assertNotContains(response, 'user_author')
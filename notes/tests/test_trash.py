@@ -0,0 +1,165 @@
+# Корзина:
+# Удалённая заметка пропадает из списка, поиска и счётчиков тегов;
+# Заметка возвращается из корзины, чужая корзина недоступна;
+# Slug заметки в корзине свободен, при возврате она получает slug-N;
+# Списки читают живые заметки по частичному индексу;
+# Очистка удаляет просроченные заметки и пользователей пачками.
+
+import io
+import json
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from notes.models import Note, Tag
+from notes.tags import parse_tags, set_tags
+from notes.tests.fixture import BaseTestFixture
+from notes.views import NotesList
+
+User = get_user_model()
+
+
+class TestTrash(BaseTestFixture):
+
+    def setUp(self):
+        super().setUp()
+        self.delete_url = reverse(self.DELETES_URL, args=(self.note.slug,))
+        self.trash_url = reverse('notes:trash')
+        self.restore_url = reverse(
+            'notes:trash_restore', args=(self.note.slug,))
+
+    def tag_count(self):
+        return Tag.objects.get(author=self.author, slug='rabota').note_count
+
+    def test_deleted_note_in_trash(self):
+        """Удалённая заметка видна только в корзине->"""
+        set_tags(self.note, parse_tags('работа'))
+        response = self.author_client.post(self.delete_url)
+        self.assertRedirects(response, self.SUCCESS_URL)
+        self.assertFalse(Note.objects.filter(pk=self.note.pk).exists())
+        self.assertTrue(Note.all_objects.filter(pk=self.note.pk).exists())
+        self.assertEqual(self.tag_count(), 0)
+        response = self.author_client.get(self.LIST_URL)
+        self.assertNotIn(self.note, response.context['object_list'])
+        response = self.author_client.get(
+            reverse('notes:search'), {'q': 'тестовый'})
+        self.assertNotIn(self.note, response.context['object_list'])
+        response = self.author_client.get(
+            reverse(self.DETAILS_URL, args=(self.note.slug,)))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.author_client.get(self.trash_url)
+        self.assertEqual(list(response.context['object_list']), [self.note])
+
+    def test_restore(self):
+        """Заметка возвращается из корзины вместе со счётчиком тегов->"""
+        set_tags(self.note, parse_tags('работа'))
+        self.author_client.post(self.delete_url)
+        response = self.author_client.post(self.restore_url)
+        self.assertRedirects(response, self.trash_url)
+        self.assertTrue(Note.objects.filter(pk=self.note.pk).exists())
+        self.assertEqual(self.tag_count(), 1)
+        response = self.author_client.post(self.restore_url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_trashed_slug_reused(self):
+        """Slug из корзины занимает новая заметка, старая вернётся с -N->"""
+        slug = self.note.slug
+        self.author_client.post(self.delete_url)
+        response = self.author_client.post(self.ADD_URL, {
+            'title': self.TITLE, 'text': self.TEXT, 'slug': slug,
+        })
+        self.assertRedirects(response, self.SUCCESS_URL)
+        new_note = Note.objects.get(slug=slug)
+        self.author_client.post(
+            reverse(self.DELETES_URL, args=(slug,)))
+        # В корзине две заметки с одним slug: возвращается удалённая
+        # последней, затем вторая — уже с другим slug.
+        self.author_client.post(self.restore_url)
+        self.assertEqual(Note.objects.get(slug=slug), new_note)
+        self.author_client.post(self.restore_url)
+        self.note.refresh_from_db()
+        self.assertIsNone(self.note.deleted_at)
+        self.assertEqual(self.note.slug, f'{slug}-2')
+
+    def test_foreign_trash(self):
+        """Чужую заметку нельзя вернуть из корзины->"""
+        self.author_client.post(self.delete_url)
+        response = self.auth_client_1.post(self.restore_url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.auth_client_1.get(self.trash_url)
+        self.assertFalse(response.context['object_list'])
+
+    def test_api_delete_trashes(self):
+        """Удаление через API тоже переносит заметку в корзину->"""
+        response = self.author_client.post(
+            reverse('notes:api_batch'),
+            json.dumps({'delete': [self.note.slug]}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['deleted'], 1)
+        self.assertIsNotNone(
+            Note.all_objects.get(pk=self.note.pk).deleted_at)
+
+    def test_live_notes_read_by_partial_index(self):
+        """Список живых заметок читается по частичному индексу->"""
+        notes = Note.objects.filter(
+            author=self.author, id__gt=0
+        ).only(*NotesList.list_fields).order_by('id')[:51]
+        with connection.cursor() as cursor:
+            sql, params = notes.query.sql_with_params()
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('note_live_author_id_idx', plan)
+
+
+class TestPurge(BaseTestFixture):
+
+    def trash(self, count, days_ago):
+        notes = [
+            Note.objects.create(
+                title=f'Заметка {number}', text=self.TEXT, author=self.author)
+            for number in range(count)
+        ]
+        Note.objects.filter(pk__in=[note.pk for note in notes]).update(
+            deleted_at=timezone.now() - timedelta(days=days_ago))
+        return notes
+
+    def purge(self, *args):
+        with CaptureQueriesContext(connection) as queries:
+            call_command('purge_notes', *args, stdout=io.StringIO())
+        return [
+            query['sql'] for query in queries
+            if query['sql'].startswith('DELETE FROM "notes_note"')
+        ]
+
+    def test_expired_trash_purged_in_batches(self):
+        """Просроченные заметки удаляются пачками, свежие остаются->"""
+        expired = self.trash(5, days_ago=31)
+        fresh = self.trash(1, days_ago=1)
+        deletes = self.purge('--batch-size', '2', '--pause', '0')
+        self.assertEqual(len(deletes), 3)
+        self.assertFalse(Note.all_objects.filter(
+            pk__in=[note.pk for note in expired]).exists())
+        self.assertTrue(Note.all_objects.filter(pk=fresh[0].pk).exists())
+        self.assertTrue(Note.objects.filter(pk=self.note.pk).exists())
+
+    def test_user_deleted_in_batches(self):
+        """Пользователь удаляется после его заметок, пачками->"""
+        for number in range(4):
+            Note.objects.create(
+                title=f'Заметка {number}', text=self.TEXT, author=self.author)
+        deletes = self.purge(
+            '--user', self.author.username, '--batch-size', '2',
+            '--pause', '0',
+        )
+        self.assertEqual(len(deletes), 3)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertTrue(Note.objects.filter(pk=self.note_1.pk).exists())
+        with self.assertRaises(CommandError):
+            self.purge('--user', 'nobody')
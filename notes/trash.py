@@ -0,0 +1,108 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_author
+from .models import Note
+from .slugs import first_free_slug
+from .tags import recount_note_tags
+
+
+def trash_notes(notes):
+    """Переносит заметки в корзину, возвращает их число.
+
+    Строки остаются в БД до очистки корзины, поэтому удаление
+    не ждёт каскада по истории правок и тегам.
+    """
+    return _set_deleted_at(notes, timezone.now())
+
+
+def restore_notes(notes):
+    """Возвращает заметки из корзины, возвращает их число.
+
+    Пока заметка лежала в корзине, её slug могла занять новая заметка:
+    тогда возвращённая получает первый свободный slug вида slug-N.
+    """
+    rows = list(notes.values_list('pk', 'slug'))
+    max_length = Note._meta.get_field('slug').max_length
+    returned = set()
+    with transaction.atomic():
+        taken = set(Note.objects.filter(
+            slug__in=[slug for _, slug in rows]
+        ).values_list('slug', flat=True))
+        for pk, slug in rows:
+            if slug in taken or slug in returned:
+                slug = first_free_slug(Note, slug, max_length, returned)
+                Note.all_objects.filter(pk=pk).update(slug=slug)
+            returned.add(slug)
+        return _set_deleted_at(
+            Note.all_objects.filter(pk__in=[pk for pk, _ in rows]), None
+        )
+
+
+def _set_deleted_at(notes, deleted_at):
+    rows = list(notes.values_list('pk', 'author_id'))
+    if not rows:
+        return 0
+    pks = [pk for pk, _ in rows]
+    with transaction.atomic(savepoint=False):
+        Note.all_objects.filter(pk__in=pks).update(deleted_at=deleted_at)
+        # Заметки в корзине не входят в счётчики тегов.
+        recount_note_tags(pks)
+    for author_id in {author_id for _, author_id in rows}:
+        invalidate_author(author_id)
+    return len(pks)
+
+
+def trash_expires(deleted_at):
+    """Когда заметку, удалённую в deleted_at, удалит очистка корзины."""
+    return deleted_at + timedelta(days=settings.NOTES_TRASH_DAYS)
+
+
+def delete_in_batches(notes, batch_size, pause=0):
+    """Удаляет заметки из БД пачками, каждую в своей транзакции.
+
+    Короткие транзакции не держат блокировку записи подолгу:
+    между пачками успевают пройти запросы пользователей.
+    Возвращает число удалённых заметок.
+    """
+    deleted = 0
+    while True:
+        pks = list(notes.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        with transaction.atomic():
+            Note.all_objects.filter(pk__in=pks).delete()
+        deleted += len(pks)
+        if pause:
+            time.sleep(pause)
+
+
+def purge_trash(batch_size, pause=0, now=None):
+    """Окончательно удаляет заметки, пролежавшие в корзине дольше срока."""
+    cutoff = (now or timezone.now()) - timedelta(
+        days=settings.NOTES_TRASH_DAYS
+    )
+    return delete_in_batches(
+        Note.all_objects.filter(deleted_at__lt=cutoff).order_by('deleted_at'),
+        batch_size,
+        pause,
+    )
+
+
+def delete_user(user, batch_size, pause=0):
+    """Удаляет пользователя, предварительно удалив его заметки пачками.
+
+    Каскад по всем заметкам за один DELETE пользователя держал бы
+    блокировку записи, пока не удалится вся история правок.
+    """
+    deleted = delete_in_batches(
+        Note.all_objects.filter(author=user).order_by('pk'),
+        batch_size,
+        pause,
+    )
+    user.delete()
+    return deleted
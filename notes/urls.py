@@ -1,6 +1,6 @@
 from django.urls import path
 
-from notes import views
+from notes import api, views
 
 app_name = 'notes'
 
@@ -10,6 +10,41 @@ urlpatterns = [
     path('edit/<slug:slug>/', views.NoteUpdate.as_view(), name='edit'),
     path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
+    path(
+        'history/<slug:slug>/', views.NoteHistory.as_view(), name='history'
+    ),
+    path(
+        'restore/<slug:slug>/<int:number>/',
+        views.NoteRestore.as_view(),
+        name='restore',
+    ),
     path('notes/', views.NotesList.as_view(), name='list'),
+    path('trash/', views.NoteTrash.as_view(), name='trash'),
+    path(
+        'trash/<slug:slug>/restore/',
+        views.NoteTrashRestore.as_view(),
+        name='trash_restore',
+    ),
+    path('search/', views.NoteSearch.as_view(), name='search'),
+    path(
+        'export/<str:export_format>/',
+        views.NoteExport.as_view(),
+        name='export',
+    ),
+    path('import/', views.NoteImport.as_view(), name='import'),
+    path('tasks/<int:pk>/', views.TaskDetail.as_view(), name='task'),
+    path('metrics/', views.Metrics.as_view(), name='metrics'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
+    path('api/notes/', api.NoteApiList.as_view(), name='api_list'),
+    path(
+        'api/notes/<slug:slug>/',
+        api.NoteApiDetail.as_view(),
+        name='api_detail',
+    ),
+    path(
+        'api/notes/<slug:slug>/autosave/',
+        api.NoteApiAutosave.as_view(),
+        name='api_autosave',
+    ),
+    path('api/batch/', api.NoteApiBatch.as_view(), name='api_batch'),
 ]
@@ -1,9 +1,35 @@
-from django.contrib.auth.mixins import LoginRequiredMixin
+import hashlib
+import os
+import tempfile
+import time
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth.mixins import (
+    LoginRequiredMixin, UserPassesTestMixin
+)
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import redirect
 from django.urls import reverse_lazy
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, quote_etag
+)
+from django.utils.http import http_date, urlencode
 from django.views import generic
 
-from .forms import NoteForm
-from .models import Note
+from .cache import fragment_cache_stats, get_generation
+from .export import FORMATS, iter_rows
+from .forms import CONFLICT, WARNING, NoteForm, NoteImportForm
+from .hot import hot_notes
+from .metrics import registry
+from .models import Note, NoteConflict, NoteRevision, Tag, Task
+from .pagination import KeysetPaginationMixin
+from .search import search_notes
+from .tags import filter_by_tags
+from .tasks import enqueue, task_stats
+from .trash import restore_notes, trash_expires, trash_notes
 
 
 class Home(generic.TemplateView):
@@ -26,34 +52,378 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class HotNoteMixin:
+    """На GET заметка берётся из кэша горячих заметок (notes/hot.py).
+
+    POST читает заметку из БД: правка сохраняет прежнюю версию
+    в историю, и эта версия должна быть свежей.
+    """
+
+    def get_object(self, queryset=None):
+        if queryset is not None or self.request.method != 'GET':
+            return super().get_object(queryset)
+        return hot_notes.get_or_load(
+            self.request.user.pk,
+            self.kwargs[self.slug_url_kwarg],
+            super().get_object,
+        )
+
+
+def make_validators(request, parts, last_modified):
+    """Валидаторы ответа: ETag и timestamp изменения, None — нет данных.
+
+    Last-Modified точен до секунды. Пока идёт секунда изменения, в ней
+    возможна ещё одна правка с тем же временем, и ответ по
+    If-Modified-Since был бы устаревшим: такой ответ отдаётся только
+    с ETag.
+    """
+    etag = timestamp = None
+    if parts is not None:
+        etag = quote_etag(hashlib.md5(
+            ':'.join(map(str, (request.user.pk, *parts))).encode()
+        ).hexdigest())
+    if last_modified is not None:
+        timestamp = int(last_modified.timestamp())
+        if timestamp >= int(time.time()):
+            timestamp = None
+    return etag, timestamp
+
+
+def patch_validators(response, etag, timestamp):
+    """Проставляет валидаторы и запрещает отдавать ответ без проверки."""
+    if etag is not None:
+        response.headers.setdefault('ETag', etag)
+    if timestamp is not None:
+        response.headers.setdefault('Last-Modified', http_date(timestamp))
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class ConditionalGetMixin:
+    """Ответ 304 Not Modified по ETag и Last-Modified.
+
+    Валидаторы берутся из лёгкого запроса к метаданным заметок или из
+    кэша, так что при совпадении ETag ни текст заметок, ни шаблон не
+    загружаются.
+    """
+    # Учитывать ли If-Modified-Since.
+    use_last_modified = True
+
+    def get_validators(self):
+        """Части ETag и время последнего изменения, None — нет данных."""
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        etag, timestamp = make_validators(request, *self.get_validators())
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=timestamp if self.use_last_modified else None,
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return patch_validators(response, etag, timestamp)
+
+
+class NoteFormBase(NoteBase):
+    """Базовый класс для создания и редактирования заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        """Занятый slug обнаруживается по ошибке уникального индекса,
+        ошибка любого другого ограничения пробрасывается дальше.
+
+        Если заметку успели изменить, форма возвращается с ответом 409
+        и текущей версией: повторная отправка запишет текст поверх.
+        """
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            if not self.model.objects.filter(
+                slug=form.instance.slug
+            ).exclude(pk=form.instance.pk).exists():
+                raise
+            form.add_error('slug', form.instance.slug + WARNING)
+            return self.form_invalid(form)
+        except NoteConflict as conflict:
+            form.add_error(None, CONFLICT.format(conflict.current_version))
+            form.data = form.data.copy()
+            form.data['version'] = conflict.current_version
+            response = self.form_invalid(form)
+            response.status_code = HTTPStatus.CONFLICT
+            return response
+
+
+class NoteCreate(NoteFormBase, generic.CreateView):
+    """Добавление заметки."""
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteFormBase, HotNoteMixin, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
-class NoteDelete(NoteBase, generic.DeleteView):
-    """Удаление заметки."""
+class NoteDelete(NoteBase, HotNoteMixin, generic.DeleteView):
+    """Удаление заметки в корзину."""
     template_name = 'notes/delete.html'
 
+    def delete(self, request, *args, **kwargs):
+        """Заметка переносится в корзину, строка не удаляется."""
+        notes = self.get_queryset().filter(slug=self.kwargs['slug'])
+        if not trash_notes(notes):
+            raise Http404('Заметка не найдена.')
+        return redirect(self.success_url)
+
+
+class NoteTrash(NoteBase, generic.ListView):
+    """Корзина: удалённые заметки, которые ещё можно вернуть."""
+    template_name = 'notes/trash.html'
+    paginate_by = 50
+
+    def get_queryset(self):
+        return self.model.all_objects.filter(
+            author=self.request.user, deleted_at__isnull=False
+        ).only('id', 'slug', 'title', 'deleted_at').order_by('-deleted_at')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        for note in context['object_list']:
+            note.expires = trash_expires(note.deleted_at)
+        return context
+
+
+class NoteTrashRestore(NoteTrash):
+    """Возврат заметки из корзины."""
+    http_method_names = ['post']
+
+    def post(self, request, slug):
+        """Slug в корзине повторяются: возвращается удалённая последней."""
+        if not restore_notes(self.get_queryset().filter(slug=slug)[:1]):
+            raise Http404('Заметки нет в корзине.')
+        return redirect('notes:trash')
+
+
+class NoteHistory(NoteBase, generic.DetailView):
+    """История правок заметки."""
+    template_name = 'notes/history.html'
+
+    def get_queryset(self):
+        return super().get_queryset().only('id', 'slug', 'title')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['revisions'] = self.object.revisions.defer(
+            'data'
+        ).order_by('-number')
+        return context
 
-class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+
+class NoteRestore(NoteBase, generic.DetailView):
+    """Просмотр прежней версии заметки и возврат к ней."""
+    template_name = 'notes/restore.html'
+
+    def get_version(self):
+        try:
+            return self.object.get_version(self.kwargs['number'])
+        except NoteRevision.DoesNotExist:
+            raise Http404('Версия не найдена.')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['number'] = self.kwargs['number']
+        context['title'], context['text'] = self.get_version()
+        return context
+
+    def post(self, request, *args, **kwargs):
+        """Возврат сам становится правкой и попадает в историю."""
+        self.object = self.get_object()
+        self.object.title, self.object.text = self.get_version()
+        try:
+            with transaction.atomic():
+                self.object.save()
+        except NoteConflict as conflict:
+            self.object = self.get_object()
+            return self.render_to_response(
+                self.get_context_data(conflict=conflict),
+                status=HTTPStatus.CONFLICT,
+            )
+        return redirect(self.success_url)
+
+
+class NotesList(NoteBase, ConditionalGetMixin, KeysetPaginationMixin,
+                generic.ListView):
+    """Список заметок пользователя, постранично по курсору."""
     template_name = 'notes/list.html'
+    # Текст заметок не читается: для превью есть excerpt и length.
+    list_fields = ('id', 'slug', 'title', 'excerpt', 'length')
+
+    def get_queryset(self):
+        notes = super().get_queryset().only(
+            *self.list_fields
+        ).prefetch_related(
+            Prefetch(
+                'tags',
+                queryset=Tag.objects.only('id', 'name', 'slug')
+                .order_by('name'),
+            )
+        )
+        selected = self.get_selected_tags()
+        if selected:
+            notes = filter_by_tags(notes, self.request.user, selected)
+        return notes
+
+    def get_selected_tags(self):
+        """Slug тегов из ?tag=...: показываются заметки со всеми ними."""
+        return sorted(set(self.request.GET.getlist('tag')))
 
+    def get_tag_context(self):
+        selected = self.get_selected_tags()
+        return {
+            'selected_tags': selected,
+            'tag_query': urlencode([('tag', slug) for slug in selected]),
+            'tag_cloud': Tag.objects.filter(
+                author=self.request.user, note_count__gt=0
+            ).only('name', 'slug', 'note_count').order_by('name'),
+        }
 
-class NoteDetail(NoteBase, generic.DetailView):
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(**self.get_tag_context(), **kwargs)
+
+    def get_validators(self):
+        """Валидатор — поколение кэша автора, без запроса к заметкам.
+
+        Поколение меняется при любой записи заметок и тегов автора
+        (notes.cache.invalidate_author), в том числе при удалении,
+        которое не отражается во времени изменения заметок.
+        """
+        return (get_generation(self.request.user.pk),), None
+
+
+class NoteDetail(NoteBase, ConditionalGetMixin, HotNoteMixin,
+                 generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+    def get_validators(self):
+        meta = self.get_queryset().filter(
+            slug=self.kwargs['slug']
+        ).values_list('pk', 'updated').first()
+        if meta is None:
+            return None, None
+        return meta, meta[1]
+
+
+class NoteSearch(LoginRequiredMixin, generic.ListView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+    page_size = 20
+
+    def get_page_number(self):
+        try:
+            return max(int(self.request.GET.get('page', 1)), 1)
+        except ValueError:
+            return 1
+
+    def get_queryset(self):
+        page = self.get_page_number()
+        # Одна лишняя запись показывает, есть ли следующая страница.
+        return search_notes(
+            self.request.user,
+            self.request.GET.get('q', ''),
+            limit=self.page_size + 1,
+            offset=(page - 1) * self.page_size,
+        )
+
+    def get_context_data(self, **kwargs):
+        page = self.get_page_number()
+        notes = self.object_list
+        context = super().get_context_data(
+            object_list=notes[:self.page_size], **kwargs
+        )
+        context['query'] = self.request.GET.get('q', '')
+        if len(notes) > self.page_size:
+            context['next_page'] = page + 1
+        return context
+
+
+class NoteExport(NoteBase, generic.View):
+    """Выгрузка всех заметок пользователя потоком в NDJSON или CSV."""
+    chunk_size = 2000
+
+    def get(self, request, export_format):
+        if export_format not in FORMATS:
+            raise Http404('Неизвестный формат выгрузки.')
+        render_lines, content_type = FORMATS[export_format]
+        response = StreamingHttpResponse(
+            render_lines(iter_rows(self.get_queryset(), self.chunk_size)),
+            content_type=f'{content_type}; charset=utf-8',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="notes.{export_format}"'
+        )
+        return response
+
+
+class NoteImport(LoginRequiredMixin, generic.FormView):
+    """Загрузка заметок из файла NDJSON или CSV."""
+    template_name = 'notes/import.html'
+    form_class = NoteImportForm
+
+    def form_valid(self, form):
+        """Файл сохраняется и загружается фоновой задачей.
+
+        Ключ задачи — хэш файла: повторная отправка того же файла,
+        пока задача не завершена, ведёт на уже созданную задачу.
+        """
+        upload = form.cleaned_data['file']
+        directory = settings.NOTES_TASK_DIR
+        directory.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(
+            dir=directory, suffix='.import', delete=False
+        ) as saved:
+            for chunk in upload.chunks():
+                digest.update(chunk)
+                saved.write(chunk)
+        task = enqueue(
+            'notes.import',
+            {
+                'author_id': self.request.user.pk,
+                'path': saved.name,
+                'import_format': form.cleaned_data['import_format'],
+            },
+            owner=self.request.user,
+            key=f'import:{self.request.user.pk}:{digest.hexdigest()}',
+        )
+        if task.payload['path'] != saved.name:
+            os.remove(saved.name)
+        return redirect('notes:task', pk=task.pk)
+
+
+class TaskDetail(LoginRequiredMixin, generic.DetailView):
+    """Состояние фоновой задачи пользователя."""
+    template_name = 'notes/task.html'
+    context_object_name = 'task'
+
+    def get_queryset(self):
+        return Task.objects.filter(owner=self.request.user)
+
+
+class Metrics(UserPassesTestMixin, generic.View):
+    """Служебная страница с перцентилями замеров по view."""
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request):
+        return JsonResponse({
+            'views': registry.summary(),
+            'fragment_cache': fragment_cache_stats(),
+            'hot_notes': hot_notes.summary(),
+            'tasks': task_stats(),
+        })
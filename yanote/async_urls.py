@@ -0,0 +1,12 @@
+from django.urls import include, path
+
+from . import urls
+
+# Корневые маршруты для ASGI: заметки с асинхронными страницами чтения.
+urlpatterns = [
+    path('', include('notes.async_urls')),
+    *(
+        pattern for pattern in urls.urlpatterns
+        if getattr(pattern, 'namespace', None) != 'notes'
+    ),
+]
@@ -1,3 +1,6 @@
+import hashlib
+import os
+import tempfile
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -22,7 +25,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'notes.middleware.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'notes.static.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -31,13 +36,16 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'yanote.urls'
+# Асинхронные страницы чтения заметок (notes/async_views.py);
+# yanote/asgi.py включает их по умолчанию.
+NOTES_ASYNC_VIEWS = os.getenv('NOTES_ASYNC_VIEWS', '0') == '1'
+
+ROOT_URLCONF = 'yanote.async_urls' if NOTES_ASYNC_VIEWS else 'yanote.urls'
 
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -45,19 +53,167 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Шаблоны разбираются один раз на процесс и при любом DEBUG:
+            # после правки шаблона сервер нужно перезапустить.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
+# manage.py test запускает тесты параллельно (notes/runner.py).
+TEST_RUNNER = 'notes.runner.ParallelTestRunner'
+
+
+# Соединения живут между запросами, а не открываются на каждый.
+CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 60))
+
+if os.getenv('DB_ENGINE') == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'yanote'),
+            'USER': os.getenv('POSTGRES_USER', 'yanote'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            # За пулером pgbouncer в режиме transaction серверные
+            # курсоры не переживают транзакцию, их нужно отключить.
+            'DISABLE_SERVER_SIDE_CURSORS': (
+                os.getenv('DB_POOLER') == 'pgbouncer'
+            ),
+            'OPTIONS': {'connect_timeout': 5},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'notes.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'OPTIONS': {'timeout': 20},
+        }
+    }
+
+# Применяются к каждому новому соединению с SQLite (notes.db).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 20000,
+    'mmap_size': 256 * 2 ** 20,
+    'cache_size': -64000,
+    'temp_store': 'memory',
+}
 
-DATABASES = {
+# Транзакции SQLite начинаются с BEGIN IMMEDIATE: блокировка записи
+# берётся сразу и ждёт по busy_timeout (notes/backends/sqlite3).
+SQLITE_TRANSACTION_MODE = 'IMMEDIATE'
+
+# Префикс ключей зависит от БД: id пользователей и авторов разных баз
+# совпадают, и записи одной базы не должны достаться другой.
+CACHE_KEY_PREFIX = hashlib.md5('{}:{}:{}'.format(
+    DATABASES['default']['ENGINE'],
+    DATABASES['default'].get('HOST', ''),
+    DATABASES['default']['NAME'],
+).encode()).hexdigest()[:12]
+
+# Оба кэша по умолчанию файловые и общие для всех процессов сервера
+# на машине: для нескольких машин нужен общий кэш, например Redis.
+# Каталоги лежат в проекте, а не в общем /tmp: в кэше pickle, чужой
+# каталог подменил бы их. LocMemCache годится только для одного
+# процесса (runserver): у каждого процесса своя копия кэша.
+CACHES = {
+    # Поколения кэша авторов, фрагменты страниц, статистика
+    # (notes/cache.py). По поколению и кэш заметок в памяти процесса
+    # (notes/hot.py) узнаёт о записи в другом процессе.
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache',
+        ),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', str(BASE_DIR / '.cache' / 'default')
+        ),
+        'KEY_PREFIX': CACHE_KEY_PREFIX,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Сессии и пользователи запросов (notes/auth.py): выход из
+    # аккаунта в одном процессе сразу виден остальным.
+    'auth': {
+        'BACKEND': os.getenv(
+            'AUTH_CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache',
+        ),
+        'LOCATION': os.getenv(
+            'AUTH_CACHE_LOCATION', str(BASE_DIR / '.cache' / 'auth')
+        ),
+        'KEY_PREFIX': CACHE_KEY_PREFIX,
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+}
+
+# Сессия читается из кэша, а пишется и в кэш, и в БД.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'auth'
+
+AUTHENTICATION_BACKENDS = ['notes.auth.CachedModelBackend']
+# Сколько секунд пользователь живёт в кэше без изменений.
+NOTES_USER_CACHE_TIMEOUT = 5 * 60
+
+NOTES_FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+# Кэш часто открываемых заметок в памяти процесса (notes/hot.py):
+# сколько заметок он держит и сколько секунд живёт каждая. О записи
+# в другом процессе он узнаёт только через общий кэш 'default'.
+NOTES_HOT_NOTES_SIZE = 1000
+NOTES_HOT_NOTES_TTL = 60
+
+NOTES_API_MAX_BATCH = 5000
+
+# Автосохранения чаще этого интервала (в секундах) сливаются
+# в одну версию истории правок.
+NOTES_AUTOSAVE_WINDOW = 60
+
+# Сколько дней заметка лежит в корзине до окончательного удаления
+# и сколько заметок удаляет одна транзакция очистки.
+NOTES_TRASH_DAYS = 30
+NOTES_PURGE_BATCH = 500
+
+# Очередь фоновых задач (notes.tasks, manage.py run_worker): через
+# сколько секунд задача без ответа от обработчика возвращается
+# в очередь и пауза перед первым повтором упавшей задачи.
+NOTES_TASK_TIMEOUT = 1800
+NOTES_TASK_RETRY_DELAY = 10
+# Куда сохраняются загруженные файлы до обработки задачей.
+NOTES_TASK_DIR = Path(
+    os.getenv('NOTES_TASK_DIR', Path(tempfile.gettempdir()) / 'yanote_tasks')
+)
+
+# Сколько SQL-запросов допустимо на один запрос к view.
+NOTES_QUERY_BUDGETS = {
+    'notes:home': 2,
+    'notes:list': 6,
+    'notes:detail': 4,
+    'notes:add': 11,
+    'notes:edit': 15,
+    'notes:delete': 8,
+    'notes:history': 4,
+    'notes:restore': 9,
+    'notes:search': 4,
+    'notes:success': 2,
+    'notes:api_list': 3,
+    'notes:api_detail': 3,
+    'notes:api_autosave': 8,
 }
+# В тестах превышение бюджета — ошибка, в работе — предупреждение в лог.
+NOTES_QUERY_BUDGET_RAISE = False
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -82,6 +238,13 @@ USE_TZ = True
 
 
 STATIC_URL = '/static/'
+STATICFILES_DIRS = [BASE_DIR / 'static']
+# manage.py collectstatic собирает сюда файлы с хэшами в именах и их
+# сжатые копии; раздаёт их notes.static.StaticFilesMiddleware. После
+# collectstatic сервер нужно перезапустить. До первого collectstatic
+# статика отдаётся из STATICFILES_DIRS без хэшей и сжатия.
+STATIC_ROOT = Path(os.getenv('STATIC_ROOT', BASE_DIR / 'staticfiles'))
+STATICFILES_STORAGE = 'notes.static.CompressedManifestStaticFilesStorage'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 